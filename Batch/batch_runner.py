@@ -0,0 +1,236 @@
+import contextlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+
+# Make the shared modules in common/ and the algorithm scripts importable (their folder names are not packages)
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, repo_dir)
+for folder in ['Naive', 'Greedy', 'Exact', 'alg2-new', 'alg-3']:
+    sys.path.insert(0, os.path.join(repo_dir, folder))
+
+from common.matrix_store import load_instance_matrices
+from common.instrumentation import new_run_stats, phase, profiling, merge_run_stats, flat_run_stats, write_run_stats
+from Naive import random_assignment_one_to_one
+from Greedy_algorithm import greedy_assignment
+from Exact_assignment import exact_assignment
+from alg2 import algorithm_2, calculate_utility
+from Alg3 import algorithm_3
+
+# Directory holding one instance-XX folder per dispatch snapshot, each with orders-XX.csv, workers-XX.csv,
+# the cost CSVs (service-times, delivery-costs, estimated-profits) and optionally the initial WWO population
+# all_feasible_solutions_XX.csv (generated with alg2 when it is missing)
+instances_dir = 'alg-3/alg3-inputs'
+output_base_dir = 'Batch/output'
+
+# Algorithms to run on every instance, and the seeds of the randomized ones (the others run once per instance)
+algorithms = ['naive', 'greedy', 'exact', 'alg2', 'alg3']
+randomized_algorithms = ['naive', 'alg3']
+seeds = [42]
+
+# Number of worker processes (1 runs the jobs one after the other in this process)
+max_workers = os.cpu_count()
+
+# Save a cProfile capture of every job (profile.prof in the job's folder, top functions in its stats.json)
+profile_jobs = False
+
+# Parameters passed to the algorithms, same values as their own scripts use
+algorithm_parameters = {
+    'alg2': {'s_max': 100, 'max_solutions': 20, 'split_depth': 0, 'processes': 1},
+    'exact': {'s_max': 100},
+    'alg3': {'s_max': 15, 'max_iter': 100, 'num_islands': 1, 'migration_interval': 10, 'feasible_moves': True,
+             'batch_neighbors': True, 'time_budget': None, 'stagnation_rounds': None},
+}
+
+
+# Instance numbers of all instance-XX folders in base_dir that have an orders file, sorted
+def discover_instances(base_dir):
+    instance_numbers = []
+    for name in sorted(os.listdir(base_dir)):
+        match = re.fullmatch(r'instance-(.+)', name)
+        if match and os.path.exists(os.path.join(base_dir, name, f'orders-{match.group(1)}.csv')):
+            instance_numbers.append(match.group(1))
+    return instance_numbers
+
+
+def instance_files(instance_dir, instance_num):
+    return {
+        'orders': os.path.join(instance_dir, f'orders-{instance_num}.csv'),
+        'workers': os.path.join(instance_dir, f'workers-{instance_num}.csv'),
+        'service_times': os.path.join(instance_dir, f'service-times-{instance_num}.csv'),
+        'estimated_profits': os.path.join(instance_dir, f'estimated-profits-{instance_num}.csv'),
+        'initial_solutions': os.path.join(instance_dir, f'all_feasible_solutions_{instance_num}.csv'),
+    }
+
+
+# Summary columns of an assignment DataFrame (order_id, worker_id, service_time, delivery_cost, estimated_profit)
+def assignment_metrics(assignments_df):
+    return {
+        'assigned': len(assignments_df),
+        'avg_service_time': assignments_df['service_time'].mean(),
+        'avg_delivery_cost': assignments_df['delivery_cost'].mean(),
+        'avg_estimated_profit': assignments_df['estimated_profit'].mean(),
+        'total_utility': calculate_utility(assignments_df['estimated_profit'], assignments_df['service_time']).sum(),
+    }
+
+
+def run_naive(instance_dir, instance_num, output_dir, seed, parameters, stats=None):
+    files = instance_files(instance_dir, instance_num)
+    assignments_df = random_assignment_one_to_one(instance_num, files['orders'], files['workers'], files['service_times'],
+                                                  seed, output_dir, stats=stats)
+    if assignments_df is None:
+        raise RuntimeError("Random assignment failed, see log.txt")
+    return assignment_metrics(assignments_df)
+
+
+def run_greedy(instance_dir, instance_num, output_dir, seed, parameters, stats=None):
+    files = instance_files(instance_dir, instance_num)
+    assignments_df = greedy_assignment(instance_num, files['service_times'], files['orders'], output_dir, stats=stats)
+    return assignment_metrics(assignments_df)
+
+
+def run_exact(instance_dir, instance_num, output_dir, seed, parameters, stats=None):
+    files = instance_files(instance_dir, instance_num)
+    with phase(stats, 'solve'):  # The exact assignment is timed as a whole
+        assignments_df = exact_assignment(instance_num, instance_dir, files['orders'], files['workers'],
+                                          parameters['s_max'], output_dir)
+    return assignment_metrics(assignments_df)
+
+
+def run_alg2(instance_dir, instance_num, output_dir, seed, parameters, stats=None, output_file=None):
+    files = instance_files(instance_dir, instance_num)
+    if output_file is None:
+        output_file = os.path.join(output_dir, f'feasible_solutions-{instance_num}.csv')
+    count = algorithm_2(files['orders'], files['workers'], files['service_times'], files['estimated_profits'],
+                        parameters['s_max'], output_file, parameters['max_solutions'],
+                        split_depth=parameters['split_depth'], processes=parameters['processes'], stats=stats)
+    if count is None:
+        raise RuntimeError("Enumeration failed, see log.txt")
+    return {'solutions': count}
+
+
+def run_alg3(instance_dir, instance_num, output_dir, seed, parameters, stats=None):
+    # Without an initial population in the instance folder, enumerate one with alg2 first
+    initial_solutions_path = instance_files(instance_dir, instance_num)['initial_solutions']
+    if not os.path.exists(initial_solutions_path):
+        initial_solutions_path = os.path.join(output_dir, f'all_feasible_solutions_{instance_num}.csv')
+        if run_alg2(instance_dir, instance_num, output_dir, seed, algorithm_parameters['alg2'], output_file=initial_solutions_path)['solutions'] == 0:
+            raise RuntimeError("No feasible initial solutions for the WWO")
+
+    assignments_df, fitness = algorithm_3(instance_dir, instance_num, output_dir, parameters['s_max'], seed,
+                                          parameters['max_iter'], initial_solutions_path,
+                                          parameters['num_islands'], parameters['migration_interval'],
+                                          parameters['feasible_moves'], parameters['batch_neighbors'],
+                                          parameters['time_budget'], parameters['stagnation_rounds'], stats=stats)
+    metrics = assignment_metrics(assignments_df)
+    metrics['fitness'] = fitness
+    return metrics
+
+
+job_runners = {
+    'naive': run_naive,
+    'greedy': run_greedy,
+    'exact': run_exact,
+    'alg2': run_alg2,
+    'alg3': run_alg3,
+}
+
+
+# One job per (instance, algorithm, seed); deterministic algorithms get seed None and run once per instance
+def make_jobs(base_dir, instance_numbers, algorithm_names, seed_values, output_dir):
+    jobs = []
+    for instance_num in instance_numbers:
+        for algorithm in algorithm_names:
+            for seed in (seed_values if algorithm in randomized_algorithms else [None]):
+                job_dir = os.path.join(output_dir, f'instance-{instance_num}', algorithm)
+                if seed is not None:
+                    job_dir = os.path.join(job_dir, f'seed-{seed}')
+                jobs.append({
+                    'instance': instance_num,
+                    'algorithm': algorithm,
+                    'seed': seed,
+                    'instance_dir': os.path.join(base_dir, f'instance-{instance_num}'),
+                    'output_dir': job_dir,
+                    'parameters': algorithm_parameters.get(algorithm, {}),
+                })
+    return jobs
+
+
+# Run one job in the current process; the algorithm's printed output goes to log.txt in the job's output folder,
+# its run stats (phase times and counters, common/instrumentation.py) to stats.json and into the result columns.
+# Errors are recorded in the result instead of stopping the batch.
+def run_job(job):
+    result = {'instance': job['instance'], 'algorithm': job['algorithm'], 'seed': job['seed'], 'error': None}
+    os.makedirs(job['output_dir'], exist_ok=True)
+    stats = new_run_stats(f"{job['algorithm']}-{job['instance']}", profile=profile_jobs)
+
+    start = time.perf_counter()
+    try:
+        with open(os.path.join(job['output_dir'], 'log.txt'), 'w') as log, contextlib.redirect_stdout(log), \
+                profiling(stats, os.path.join(job['output_dir'], 'profile.prof')):
+            result.update(job_runners[job['algorithm']](job['instance_dir'], job['instance'], job['output_dir'],
+                                                        job['seed'], job['parameters'], stats))
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['wall_s'] = time.perf_counter() - start
+    write_run_stats(stats, os.path.join(job['output_dir'], 'stats.json'))
+    result['stats'] = stats
+    return result
+
+
+# Convert every instance's cost CSVs to its matrix store up front. The jobs then only memory-map the .npy files,
+# so all processes share the same read-only pages instead of each parsing the CSVs (or racing to convert them).
+def prepare_instances(base_dir, instance_numbers):
+    for instance_num in instance_numbers:
+        load_instance_matrices(os.path.join(base_dir, f'instance-{instance_num}'), instance_num)
+
+
+# Run all jobs over a process pool and return the summary table (one row per job)
+def run_batch(base_dir=instances_dir, output_dir=output_base_dir, algorithm_names=algorithms, seed_values=seeds, workers=max_workers, instance_numbers=None):
+    if instance_numbers is None:
+        instance_numbers = discover_instances(base_dir)
+    prepare_instances(base_dir, instance_numbers)
+    jobs = make_jobs(base_dir, instance_numbers, algorithm_names, seed_values, output_dir)
+    print(f"Running {len(jobs)} jobs on {len(instance_numbers)} instances with {workers} worker process(es)...")
+
+    results = []
+    if workers == 1:
+        for job in jobs:
+            results.append(run_job(job))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run_job, job) for job in jobs]
+            for future in as_completed(futures):
+                result = future.result()
+                status = 'failed' if result['error'] else 'done'
+                print(f"{result['algorithm']} on instance {result['instance']} (seed {result['seed']}) {status} in {result['wall_s']:.2f}s")
+                results.append(result)
+
+    # Run stats summed per algorithm, and each job's phase times and counters as summary columns
+    algorithm_stats = {algorithm: merge_run_stats([r['stats'] for r in results if r['algorithm'] == algorithm], algorithm)
+                       for algorithm in algorithm_names}
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, 'run_stats.json'), 'w') as f:
+        json.dump(algorithm_stats, f, indent=2)
+    results = [dict(r, **flat_run_stats(r.pop('stats'))) for r in results]
+
+    summary_df = pd.DataFrame(results)
+    summary_df['seed'] = summary_df['seed'].astype('Int64')
+    first_columns = ['instance', 'algorithm', 'seed', 'wall_s', 'error']
+    summary_df = summary_df[first_columns + [c for c in summary_df.columns if c not in first_columns]]
+    summary_df = summary_df.sort_values(['instance', 'algorithm', 'seed'], na_position='first').reset_index(drop=True)
+
+    os.makedirs(output_dir, exist_ok=True)
+    summary_df.to_csv(os.path.join(output_dir, 'summary.csv'), index=False)
+    return summary_df
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    summary_df = run_batch()
+    print(summary_df.to_string(index=False, float_format=lambda v: f'{v:.4g}'))
+    print(f"Batch finished in {time.perf_counter() - start:.2f}s, summary saved to {os.path.join(output_base_dir, 'summary.csv')}")
@@ -0,0 +1,167 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # Fall back to the NumPy Hungarian implementation below
+    linear_sum_assignment = None
+
+# Make the shared modules in common/ and alg2's utility importable when running this file as a script
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, repo_dir)
+sys.path.insert(0, os.path.join(repo_dir, 'alg2-new'))
+
+from common.matrix_store import load_instance_matrices, csv_values
+from common.instance_csv import read_orders, read_workers
+from alg2 import calculate_utility
+
+# Cost matrices are read from Alg1's outputs, orders and workers from Alg1's inputs
+matrices_base_dir = 'alg-1/alg1-outputs'
+input_base_dir = 'alg-1/alg1-inputs'
+output_base_dir = 'Exact/output'
+instance_numbers = ['01', '02', '03']  # Define the instances
+
+# Maximum allowed service time of an assigned pair (same cut as alg2)
+s_max = 100
+
+
+# Minimum-cost assignment of a rectangular cost matrix with the Hungarian method (shortest augmenting paths
+# with row/column potentials, O(n^2 m)). Every row is assigned when rows <= columns, otherwise every column.
+# Returns (row_ind, col_ind) sorted by row, like scipy.optimize.linear_sum_assignment.
+def hungarian(cost):
+    cost = np.asarray(cost, dtype=float)
+    if cost.shape[0] > cost.shape[1]:
+        col_ind, row_ind = hungarian(cost.T)
+        order = np.argsort(row_ind)
+        return row_ind[order], col_ind[order]
+
+    n, m = cost.shape
+    # Index 0 is a virtual column used as the root of every augmenting path; rows are 1-based in p
+    u = np.zeros(n + 1)  # Row potentials
+    v = np.zeros(m + 1)  # Column potentials
+    p = np.zeros(m + 1, dtype=int)  # p[j] = row assigned to column j (0 = free)
+    way = np.zeros(m + 1, dtype=int)  # Previous column on the shortest path
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+
+        # Grow the shortest path tree until it reaches a free column
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            improve = free & (reduced < minv[1:])
+            minv[1:][improve] = reduced[improve]
+            way[1:][improve] = j0
+
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[1:][free] -= delta
+
+            j0 = j1
+            if p[j0] == 0:
+                break
+
+        # Flip the augmenting path
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    cols = np.nonzero(p[1:])[0]
+    rows = p[1:][cols] - 1
+    order = np.argsort(rows)
+    return rows[order], cols[order]
+
+
+# Exact one-worker-one-order assignment maximizing the summed utility over a dense (orders x workers) matrix.
+# Pairs that are not feasible (False in feasible) are only used when nothing else is possible and are dropped
+# from the result, so the answer serves as many orders as feasible and, among those, has the highest utility.
+# Returns the chosen (rows, columns) arrays.
+def optimal_matrix_assignment(utility, feasible):
+    utility = np.asarray(utility, dtype=float)
+    feasible = np.asarray(feasible, dtype=bool) & np.isfinite(utility)
+
+    # Minimize cost = -utility. A plan with one more feasible pair may lose up to 2 * max|u| per feasible pair on
+    # utility (utilities have mixed signs), so an infeasible pair costs more than that swing over a full plan
+    feasible_utility = np.where(feasible, utility, 0)
+    big = (2 * np.abs(feasible_utility).max(initial=0) + 1) * (min(utility.shape) + 1)
+    cost = np.where(feasible, -feasible_utility, big)
+
+    solver = linear_sum_assignment if linear_sum_assignment is not None else hungarian
+    rows, cols = solver(cost)
+
+    keep = feasible[rows, cols]
+    return rows[keep], cols[keep]
+
+
+# Function to run the exact assignment for one instance (output_dir defaults to output_base_dir/instance-XX)
+def exact_assignment(instance_number, matrices_dir, orders_file, workers_file, s_max, output_dir=None):
+    orders_df = read_orders(orders_file)
+    workers_df = read_workers(workers_file)
+
+    # Open the instance's matrix store (converted from the cost CSVs in matrices_dir on first use)
+    matrices = load_instance_matrices(matrices_dir, instance_number)
+
+    # Restrict the matrices to the orders and workers of this instance, in file order
+    order_rows = pd.Index(matrices['order_ids']).get_indexer(orders_df['order_id'])
+    worker_cols = pd.Index(matrices['worker_ids']).get_indexer(workers_df['worker_id'])
+    order_rows = order_rows[order_rows >= 0]
+    worker_cols = worker_cols[worker_cols >= 0]
+    grid = np.ix_(order_rows, worker_cols)
+
+    service_time = csv_values(matrices['service_time'][grid])
+    estimated_profit = csv_values(matrices['estimated_profit'][grid])
+    utility = calculate_utility(estimated_profit, service_time)
+
+    start = time.perf_counter()
+    rows, cols = optimal_matrix_assignment(utility, service_time <= s_max)
+    solve_time = time.perf_counter() - start
+
+    assignments_df = pd.DataFrame({
+        'order_id': matrices['order_ids'][order_rows[rows]],
+        'worker_id': matrices['worker_ids'][worker_cols[cols]],
+        'service_time': service_time[rows, cols],
+        'delivery_cost': csv_values(matrices['delivery_cost'][grid][rows, cols]),
+        'estimated_profit': estimated_profit[rows, cols],
+    })
+
+    print(f"\nExact Assignment Results for Instance {instance_number}:")
+    print(f"Assigned orders: {len(assignments_df)} of {len(order_rows)} (solved in {solve_time:.4f}s)")
+    print(f"Total Utility: {utility[rows, cols].sum()}")
+    print(f"Average Service Time: {assignments_df['service_time'].mean()}")
+    print(f"Average Estimated Profit: {assignments_df['estimated_profit'].mean()}")
+
+    # Save the results with the same structure as the greedy, random and WWO assignments
+    if output_dir is None:
+        output_dir = os.path.join(output_base_dir, f'instance-{instance_number}')
+    os.makedirs(output_dir, exist_ok=True)
+    output_file = os.path.join(output_dir, f'exact_assignments_{instance_number}.csv')
+    assignments_df.to_csv(output_file, index=False)
+
+    print(f"Exact assignments saved to {output_file}")
+    return assignments_df
+
+
+if __name__ == '__main__':
+    # Loop over each instance and run the exact assignment
+    for instance_number in instance_numbers:
+        print(f"Processing instance {instance_number} with Exact Assignment...")
+
+        matrices_dir = os.path.join(matrices_base_dir, f'instance-{instance_number}')
+        orders_file = os.path.join(input_base_dir, f'instance-{instance_number}', f'orders-{instance_number}.csv')
+        workers_file = os.path.join(input_base_dir, f'instance-{instance_number}', f'workers-{instance_number}.csv')
+
+        exact_assignment(instance_number, matrices_dir, orders_file, workers_file, s_max)
@@ -1,87 +1,199 @@
 import pandas as pd
+import numpy as np
 import os
+import sys
+
+# Make the shared modules in common/ importable when running this file as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from common.matrix_store import load_matrices_for_csv, csv_values
+from common.candidate_graph import candidate_graph, edge_rows
+from common.instance_csv import read_orders
+from common.instrumentation import phase, count
 
 # Define base directories for inputs and outputs
 input_base_dir = 'Greedy/input'
 output_base_dir = 'Greedy/output'
 instance_numbers = ['01', '02', '03']  # Define the instances
 
-# Function to run the Greedy Assignment Algorithm
-def greedy_assignment(instance_number, service_times_file, estimated_profits_file, delivery_costs_file, workers_file, orders_file):
-    # Load the service times, estimated profits, delivery costs, workers, and orders data
-    service_times_df = pd.read_csv(service_times_file)
-    estimated_profits_df = pd.read_csv(estimated_profits_file)
-    delivery_costs_df = pd.read_csv(delivery_costs_file)
-    workers_df = pd.read_csv(workers_file)
-    orders_df = pd.read_csv(orders_file)
-
-    # Combine the metrics into a single DataFrame for easy processing
-    combined_df = service_times_df.merge(estimated_profits_df, on=['order_id', 'worker_id']).merge(delivery_costs_df, on=['order_id', 'worker_id'])
-
-    # Standardize worker locations
-    workers_df['current_location'] = workers_df['current_location'].str.strip().str.upper()
-
-    # Initialize assignment dictionary
-    assignments = []
-
-    assigned_workers = set()  # To keep track of workers that have already been assigned
-
-    # Process each order
-    for _, order in orders_df.iterrows():
-        order_id = order['order_id']
-
-        # Filter to get only the relevant rows for this order
-        relevant_rows = combined_df[combined_df['order_id'] == order_id]
-
-        best_worker = None
-        best_distance = float('inf')
-
-        # Find the best (closest) worker for this order
-        for _, row in relevant_rows.iterrows():
-            worker_id = row['worker_id']
-
-            if worker_id not in assigned_workers:  # Ensure this worker hasn't been assigned yet
-                distance = row['service_time']  # Using service time as a proxy for distance/effort
-
-                if distance < best_distance:
-                    best_distance = distance
-                    best_worker = worker_id
-
-        # Assign the closest worker to the order
-        if best_worker is not None:
-            assignments.append({
-                'order_id': order_id,
-                'worker_id': best_worker,
-                'service_time': best_distance,
-                'delivery_cost': relevant_rows.loc[relevant_rows['worker_id'] == best_worker, 'delivery_cost'].values[0],
-                'estimated_profit': relevant_rows.loc[relevant_rows['worker_id'] == best_worker, 'estimated_profit'].values[0]
-            })
-
-            assigned_workers.add(best_worker)  # Mark this worker as assigned
+# Greedy modes: 'sequential' (orders in file order, each takes its fastest free worker), 'service_time'
+# (the globally fastest remaining pair is committed first) or 'utility' (the remaining pair with the highest
+# estimated profit minus service time is committed first)
+greedy_modes = ['sequential', 'service_time', 'utility']
+greedy_mode = 'sequential'
+
+# Order-sequential greedy over a candidate graph (common/candidate_graph.py): orders are taken in the given row order
+# and each one gets the unassigned candidate worker with the lowest service time (the first such worker on ties).
+# Rows of -1 stand for orders without any candidates. Each order only compares its own candidates, so the work grows
+# with the number of candidate pairs instead of orders x workers. Returns the chosen (row, column) pairs.
+def greedy_graph_assignment(graph, order_rows):
+    indptr = graph['indptr'].tolist()
+    indices = graph['indices']
+    service_time = graph['service_time']
+    blocked = np.zeros(graph['shape'][1])  # 0 for free workers, inf once a worker has been assigned
+
+    pairs = []
+    for row in np.asarray(order_rows).tolist():
+        if row < 0 or indptr[row] == indptr[row + 1]:
+            continue
+
+        # Candidates are in ascending worker column, so argmin breaks ties like the dense scan
+        start, end = indptr[row], indptr[row + 1]
+        candidates = service_time[start:end] + blocked[indices[start:end]]
+        k = int(np.argmin(candidates))
+        if candidates[k] == np.inf:
+            continue  # No unassigned candidate left for this order
+
+        col = indices.item(start + k)
+        blocked[col] = np.inf  # Mark this worker as assigned
+        pairs.append((row, col))
+
+    return pairs
+
+# Global best-pair greedy over a candidate graph: the candidate pairs of the given order rows are ranked (by service
+# time, lowest first, or by utility = estimated profit - service time, highest first; ties go to the earlier order
+# in order_rows, then the lower worker column) and the best remaining pair is committed again and again, skipping
+# pairs whose order or worker is taken. Returns the chosen (row, column) pairs in order_rows order.
+#
+# Only the best pairs are ranked at a time: a window of the lowest scores is cut out with a partition and sorted,
+# and the window doubles until every order or every worker is taken. Within a window, each round commits at once
+# all the pairs that are the best remaining pair of both their order and their worker, then drops the pairs of
+# the orders and workers they took. The pair the one-by-one walk commits next is always among them, so both give
+# the same assignment.
+def greedy_global_assignment(graph, order_rows, by='service_time'):
+    num_rows, num_cols = graph['shape']
+    unique_rows, first = np.unique(np.asarray(order_rows), return_index=True)
+    order_position = np.full(num_rows, -1, dtype=np.int64)  # First position of every row in order_rows
+    order_position[unique_rows[unique_rows >= 0]] = first[unique_rows >= 0]
+
+    rows = edge_rows(graph)
+    keep = order_position[rows] >= 0
+    rows = rows[keep]
+    cols = graph['indices'][keep].astype(np.int64)
+    if by == 'service_time':
+        score = graph['service_time'][keep]
+    elif by == 'utility':
+        score = -(graph['estimated_profit'][keep] - graph['service_time'][keep])
+    else:
+        raise ValueError(f"Unknown greedy ranking {by!r}, expected 'service_time' or 'utility'")
+
+    taken_orders = np.zeros(num_rows, dtype=bool)
+    taken_workers = np.zeros(num_cols, dtype=bool)
+    orders_left = np.count_nonzero(np.bincount(rows, minlength=num_rows))  # Orders and workers with candidates
+    workers_left = np.count_nonzero(np.bincount(cols, minlength=num_cols))
+    window = 4 * max(1, min(orders_left, workers_left))
+    chosen_rows = [np.zeros(0, dtype=np.int64)]
+    chosen_cols = [np.zeros(0, dtype=np.int64)]
+
+    while len(rows) and orders_left and workers_left:
+        # All pairs up to the window-th lowest score (equal scores never straddle two windows)
+        if len(rows) > window:
+            inside = score <= np.partition(score, window - 1)[window - 1]
+        else:
+            inside = np.ones(len(rows), dtype=bool)
+        ranked = np.lexsort((cols[inside], order_position[rows[inside]], score[inside]))
+        window_rows = rows[inside][ranked]
+        window_cols = cols[inside][ranked]
+
+        while len(window_rows):
+            # Rank of the best remaining pair of every order and of every worker in the window
+            positions = np.arange(len(window_rows))
+            order_best = np.full(num_rows, len(window_rows))
+            np.minimum.at(order_best, window_rows, positions)
+            worker_best = np.full(num_cols, len(window_rows))
+            np.minimum.at(worker_best, window_cols, positions)
+
+            chosen = (order_best[window_rows] == positions) & (worker_best[window_cols] == positions)
+            chosen_rows.append(window_rows[chosen])
+            chosen_cols.append(window_cols[chosen])
+            taken_orders[window_rows[chosen]] = True
+            taken_workers[window_cols[chosen]] = True
+            orders_left -= int(chosen.sum())
+            workers_left -= int(chosen.sum())
+
+            remaining = ~(taken_orders[window_rows] | taken_workers[window_cols])
+            window_rows = window_rows[remaining]
+            window_cols = window_cols[remaining]
+
+        remaining = ~inside & ~(taken_orders[rows] | taken_workers[cols])
+        rows = rows[remaining]
+        cols = cols[remaining]
+        score = score[remaining]
+        window *= 2
+
+    chosen_rows = np.concatenate(chosen_rows)
+    chosen_cols = np.concatenate(chosen_cols)
+    in_file_order = np.argsort(order_position[chosen_rows], kind='stable')
+    return list(zip(chosen_rows[in_file_order].tolist(), chosen_cols[in_file_order].tolist()))
+
+# Function to run the Greedy Assignment Algorithm (output_dir defaults to output_base_dir/instance-XX).
+# Service times, delivery costs and estimated profits all come from the matrix store of service_times_file's folder.
+# Orders only get workers with a service time of at most s_max (None: any worker with a known service time).
+# mode is one of greedy_modes. A run stats dict (common/instrumentation.py) passed as stats gets the load / build /
+# solve / write times and the candidate_pairs and assigned_orders counters.
+def greedy_assignment(instance_number, service_times_file, orders_file, output_dir=None, s_max=None, mode='sequential', stats=None):
+    if mode not in greedy_modes:
+        raise ValueError(f"Unknown greedy mode {mode!r}, expected one of {greedy_modes}")
+
+    with phase(stats, 'load'):
+        # Load the orders, which are assigned in file order
+        orders_df = read_orders(orders_file)
+
+        # Open the instance's matrix store (converted from the cost CSVs next to service_times_file on first use)
+        matrices = load_matrices_for_csv(service_times_file)
+
+    # Matrix row of every order, processed in file order
+    order_rows = pd.Index(matrices['order_ids']).get_indexer(orders_df['order_id'])
+
+    # Candidate workers of every order in the store
+    with phase(stats, 'build'):
+        if mode == 'sequential':
+            graph = candidate_graph({'service_time': matrices['service_time']}, s_max)
+        else:
+            graph = candidate_graph({'service_time': matrices['service_time'], 'estimated_profit': matrices['estimated_profit']}, s_max)
+    with phase(stats, 'solve'):
+        if mode == 'sequential':
+            pairs = greedy_graph_assignment(graph, order_rows)
+        else:
+            pairs = greedy_global_assignment(graph, order_rows, mode)
+    count(stats, 'candidate_pairs', len(graph['indices']))
+    count(stats, 'assigned_orders', len(pairs))
+    rows = np.array([row for row, _ in pairs], dtype=np.intp)
+    cols = np.array([col for _, col in pairs], dtype=np.intp)
+
+    # Cost and profit of the chosen pairs are direct index reads
+    assignments = {
+        'order_id': matrices['order_ids'][rows],
+        # Worker IDs stay floats so the output matches the previous row-wise implementation byte for byte
+        'worker_id': matrices['worker_ids'][cols].astype(float),
+        'service_time': csv_values(matrices['service_time'][rows, cols]),
+        'delivery_cost': csv_values(matrices['delivery_cost'][rows, cols]),
+        'estimated_profit': csv_values(matrices['estimated_profit'][rows, cols]),
+    }
 
     # Convert assignments to DataFrame for output
     assignments_df = pd.DataFrame(assignments)
 
     # Save the results to a CSV file in the output folder for this instance
-    output_dir = os.path.join(output_base_dir, f'instance-{instance_number}')
+    if output_dir is None:
+        output_dir = os.path.join(output_base_dir, f'instance-{instance_number}')
     os.makedirs(output_dir, exist_ok=True)  # Create the output directory if it doesn't exist
     output_file = os.path.join(output_dir, f'greedy_assignments_{instance_number}.csv')
-    assignments_df.to_csv(output_file, index=False)
+    with phase(stats, 'write'):
+        assignments_df.to_csv(output_file, index=False)
 
     print(f"Greedy assignments for instance {instance_number} saved to {output_file}")
     return assignments_df
 
-# Loop over each instance and run the greedy assignment process
-for instance_number in instance_numbers:
-    print(f"Processing instance {instance_number} with Greedy Assignment...")
+if __name__ == '__main__':
+    # Loop over each instance and run the greedy assignment process
+    for instance_number in instance_numbers:
+        print(f"Processing instance {instance_number} with Greedy Assignment...")
 
-    # Define file paths for the current instance
-    instance_input_dir = os.path.join(input_base_dir, f'instance-{instance_number}')
-    service_times_file = os.path.join(instance_input_dir, f'service-times-{instance_number}.csv')
-    estimated_profits_file = os.path.join(instance_input_dir, f'estimated-profits-{instance_number}.csv')
-    delivery_costs_file = os.path.join(instance_input_dir, f'delivery-costs-{instance_number}.csv')
-    workers_file = os.path.join(instance_input_dir, f'workers-{instance_number}.csv')
-    orders_file = os.path.join(instance_input_dir, f'orders-{instance_number}.csv')
+        # Define file paths for the current instance
+        instance_input_dir = os.path.join(input_base_dir, f'instance-{instance_number}')
+        service_times_file = os.path.join(instance_input_dir, f'service-times-{instance_number}.csv')
+        orders_file = os.path.join(instance_input_dir, f'orders-{instance_number}.csv')
 
-    # Run the greedy assignment method for this instance
-    greedy_assignment(instance_number, service_times_file, estimated_profits_file, delivery_costs_file, workers_file, orders_file)
+        # Run the greedy assignment method for this instance
+        greedy_assignment(instance_number, service_times_file, orders_file, mode=greedy_mode)
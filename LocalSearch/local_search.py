@@ -0,0 +1,204 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Make the shared modules in common/ importable when running this file as a script
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, repo_dir)
+
+from common.matrix_store import load_instance_matrices, csv_values
+
+# Cost matrices are read from Alg1's outputs; the assignments to polish are the other algorithms' outputs
+matrices_base_dir = 'alg-1/alg1-outputs'
+output_base_dir = 'LocalSearch/output'
+instance_numbers = ['01', '02', '03']  # Define the instances
+assignment_files = {
+    'greedy': 'Greedy/output/instance-{n}/greedy_assignments_{n}.csv',
+    'random': 'Naive/output/random_assignments_{n}.csv',
+    'wwo': 'alg-3/alg3-outputs/instance-{n}/optimal_assignment.csv',  # The file alg-3/Alg3.py writes
+}
+
+# Maximum allowed service time of an assigned pair (the cut the WWO fitness is computed with)
+s_max = 100
+
+# Gains at or below this are rounding noise, not improvements
+min_gain = 1e-9
+
+
+# Value of every pair for the WWO's fitness: with n orders assigned, fitness = sum(profit - service_time / s_max) / n,
+# so a move that raises the summed pair values raises the fitness by the same amount / n
+def pair_values(service_time, estimated_profit, s_max):
+    return estimated_profit - service_time / s_max
+
+
+# Alg3's fitness of an assignment from its pair values (-1 when a pair is above s_max or a worker over capacity)
+def assignment_fitness(service_time, estimated_profit, cols, capacity, s_max):
+    n = len(service_time)
+    if n == 0 or (service_time > s_max).any() or (np.bincount(cols, minlength=len(capacity)) > capacity).any():
+        return -1
+    s_w = service_time.sum() / (n * s_max)
+    p_w = estimated_profit.sum() / n
+    if s_w > 1 or p_w < 0:
+        return -1
+    return p_w - s_w
+
+
+# Best swap partner of every order: gain[i, j] of orders i and j exchanging their workers is
+# values[i, cols[j]] + values[j, cols[i]] - current[i] - current[j], computed block_rows rows at a time
+def best_swaps(values, cols, current, block_rows=1024):
+    n = len(cols)
+    partner = np.zeros(n, dtype=np.int64)
+    gain = np.full(n, -np.inf)
+    to_current = values[:, cols]  # to_current[i, j] = value of order i on order j's worker
+    from_current = np.ascontiguousarray(to_current.T)
+    shared_workers = len(np.unique(cols)) < n  # Only with capacities above 1
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        block = to_current[start:stop] + from_current[start:stop]
+        block -= current[start:stop, np.newaxis]
+        block -= current[np.newaxis, :]
+        # Orders on the same worker have nothing to swap (an order always shares its own worker)
+        if shared_workers:
+            block[cols[start:stop, np.newaxis] == cols[np.newaxis, :]] = -np.inf
+        else:
+            block[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+        partner[start:stop] = np.argmax(block, axis=1)
+        gain[start:stop] = block[np.arange(stop - start), partner[start:stop]]
+    return partner, gain
+
+
+# Local search on worker columns: values is the (assigned orders x workers) matrix of pair_values, -inf for pairs
+# an order may not move to (above s_max or unknown), cols the current worker column of every order and capacity
+# the number of orders each worker can take. Every round computes the gains of all 2-swaps and of all relocations
+# to a worker with spare capacity, then applies the improving moves best first as long as they touch different
+# orders and workers (their gains then add up exactly). Stops at a local optimum, after max_rounds rounds or once
+# time_budget seconds have passed. Returns the new columns and the statistics of the run.
+def local_search_columns(values, cols, capacity, current=None, time_budget=None, max_rounds=None):
+    start_time = time.perf_counter()
+    cols = np.array(cols, dtype=np.int64)
+    n, num_workers = values.shape
+    order_index = np.arange(n)
+    if current is None:
+        current = values[order_index, cols]
+    current = np.array(current, dtype=float)
+    load = np.bincount(cols, minlength=num_workers)
+    stats = {'rounds': 0, 'swaps': 0, 'relocations': 0, 'gain': 0.0}
+
+    while n and (max_rounds is None or stats['rounds'] < max_rounds):
+        if time_budget is not None and time.perf_counter() - start_time >= time_budget:
+            break
+
+        # Moves: (gain, order, other order or -1, new worker of the order)
+        partner, swap_gain = best_swaps(values, cols, current)
+        spare = np.flatnonzero(load < capacity)
+        if len(spare):
+            relocate = values[:, spare] - current[:, np.newaxis]
+            target = np.argmax(relocate, axis=1)
+            relocate_gain = relocate[order_index, target]
+            target = spare[target]
+        else:
+            relocate_gain = np.full(n, -np.inf)
+            target = np.zeros(n, dtype=np.int64)
+
+        gains = np.concatenate([swap_gain, relocate_gain])
+        improving = np.flatnonzero(gains > min_gain)
+        if len(improving) == 0:
+            break  # Local optimum
+
+        used_orders = set()
+        used_workers = set()
+        for k in improving[np.argsort(-gains[improving], kind='stable')].tolist():
+            i = k % n
+            if k < n:
+                j = partner.item(i)
+                touched_orders = (i, j)
+                touched_workers = (cols.item(i), cols.item(j))
+            else:
+                j = -1
+                touched_orders = (i,)
+                touched_workers = (cols.item(i), target.item(i))
+            if any(o in used_orders for o in touched_orders) or any(w in used_workers for w in touched_workers):
+                continue
+            used_orders.update(touched_orders)
+            used_workers.update(touched_workers)
+
+            if j >= 0:
+                cols[i], cols[j] = cols[j], cols[i]
+                current[i] = values[i, cols[i]]
+                current[j] = values[j, cols[j]]
+                stats['swaps'] += 1
+            else:
+                load[cols[i]] -= 1
+                cols[i] = target[i]
+                load[cols[i]] += 1
+                current[i] = values[i, cols[i]]
+                stats['relocations'] += 1
+            stats['gain'] += gains.item(k)
+
+        stats['rounds'] += 1
+
+    stats['seconds'] = time.perf_counter() - start_time
+    return cols, stats
+
+
+# Improve an assignment (a DataFrame with order_id and worker_id columns, e.g. the output of Greedy, Naive or Alg3)
+# on the matrices of its instance (an open matrix store). The assigned orders keep a worker; they may only move to
+# pairs within s_max, and every worker takes at most q_w[worker_id] orders (1 for workers not in q_w).
+# Returns the improved assignment with the usual output columns and the statistics of the search.
+def local_search(assignments_df, matrices, s_max, q_w=None, time_budget=None, max_rounds=None):
+    order_rows = pd.Index(matrices['order_ids']).get_indexer(assignments_df['order_id'])
+    worker_cols = pd.Index(matrices['worker_ids']).get_indexer(assignments_df['worker_id'])
+    if (order_rows < 0).any() or (worker_cols < 0).any():
+        raise KeyError("The assignment has orders or workers without costs in the matrices")
+
+    service_time = csv_values(matrices['service_time'][order_rows])
+    estimated_profit = csv_values(matrices['estimated_profit'][order_rows])
+    values = pair_values(service_time, estimated_profit, s_max)
+
+    order_index = np.arange(len(order_rows))
+    current = values[order_index, worker_cols]
+    if np.isnan(current).any():
+        raise ValueError("The assignment has pairs without a service time or estimated profit")
+    values[~(service_time <= s_max) | np.isnan(values)] = -np.inf  # Never move to these pairs
+
+    capacity = np.ones(len(matrices['worker_ids']), dtype=np.int64)
+    if q_w is not None:
+        capacity = np.array([q_w.get(w, 1) for w in matrices['worker_ids'].tolist()], dtype=np.int64)
+
+    cols, stats = local_search_columns(values, worker_cols, capacity, current, time_budget, max_rounds)
+    stats['fitness_before'] = assignment_fitness(service_time[order_index, worker_cols], estimated_profit[order_index, worker_cols],
+                                                 worker_cols, capacity, s_max)
+    stats['fitness'] = assignment_fitness(service_time[order_index, cols], estimated_profit[order_index, cols],
+                                          cols, capacity, s_max)
+
+    improved_df = pd.DataFrame({
+        'order_id': matrices['order_ids'][order_rows],
+        'worker_id': matrices['worker_ids'][cols],
+        'service_time': service_time[order_index, cols],
+        'delivery_cost': csv_values(matrices['delivery_cost'][order_rows, cols]),
+        'estimated_profit': estimated_profit[order_index, cols],
+    })
+    return improved_df, stats
+
+
+if __name__ == '__main__':
+    time_budget = None  # Seconds per assignment (None: run to a local optimum)
+
+    for instance_number in instance_numbers:
+        matrices = load_instance_matrices(os.path.join(matrices_base_dir, f'instance-{instance_number}'), instance_number)
+        for source, file_pattern in assignment_files.items():
+            assignment_file = file_pattern.format(n=instance_number)
+            if not os.path.exists(assignment_file):
+                print(f"Skipping {assignment_file}: not found")
+                continue
+
+            assignments_df = pd.read_csv(assignment_file)
+            improved_df, stats = local_search(assignments_df, matrices, s_max, time_budget=time_budget)
+            print(f"Instance {instance_number}, {source}: fitness {stats['fitness_before']} -> {stats['fitness']} "
+                  f"({stats['swaps']} swaps, {stats['relocations']} relocations, {stats['rounds']} rounds, {stats['seconds']:.4f}s)")
+
+            output_dir = os.path.join(output_base_dir, f'instance-{instance_number}')
+            os.makedirs(output_dir, exist_ok=True)
+            improved_df.to_csv(os.path.join(output_dir, f'local_search_{source}_{instance_number}.csv'), index=False)
@@ -1,7 +1,16 @@
 import os
+import sys
+import numpy as np
 import pandas as pd
 import random
 
+# Make the shared modules in common/ importable when running this file as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from common.matrix_store import load_matrices_for_csv, csv_values
+from common.instance_csv import read_orders, read_workers
+from common.instrumentation import phase, count
+
 # Define base directories for inputs and outputs
 input_base_dir = 'Naive/input'
 output_base_dir = 'Naive/output'
@@ -10,16 +19,72 @@ instance_numbers = ['01', '02', '03']  # Define the instances
 # Set a random seed for reproducibility
 random_seed = 42  # You can choose any seed value
 
-# Function to implement a one-to-one random assignment method
-def random_assignment_one_to_one(instance_number, orders_file, workers_file, service_times_file, delivery_costs_file, estimated_profits_file):
+# Number of random assignments drawn for the distribution of the baseline (1 = only the single seeded shuffle)
+num_samples = 10000
+
+# Metrics reported per random assignment and the percentiles of their distribution
+sample_metrics = ['service_time', 'delivery_cost', 'estimated_profit']
+sample_percentiles = [5, 25, 50, 75, 95]
+
+
+# Dense (orders x workers) service time, delivery cost and estimated profit matrices of an instance,
+# with rows and columns in the order of the orders and workers files
+def load_dense_matrices(service_times_file, orders, workers):
+    matrices = load_matrices_for_csv(service_times_file)
+    order_rows = pd.Index(matrices['order_ids']).get_indexer(orders)
+    worker_cols = pd.Index(matrices['worker_ids']).get_indexer(workers)
+    if (order_rows < 0).any() or (worker_cols < 0).any():
+        raise KeyError(f"Orders or workers without service times in {service_times_file}")
+
+    grid = np.ix_(order_rows, worker_cols)
+    return {name: csv_values(matrices[name][grid]) for name in sample_metrics}
+
+
+# Draw num_samples random one-to-one assignments at once as (samples x orders) arrays of worker columns and
+# gather each metric with fancy indexing. Returns one row per sample with the average of every metric.
+# Samples are drawn in chunks of at most chunk_pairs (sample, order) pairs to bound memory.
+# Values are gathered as float32 (half the cache traffic of the random reads) and summed in float64.
+def sample_random_assignments(matrices, num_samples, seed=random_seed, chunk_pairs=10_000_000):
+    num_orders, num_workers = matrices[sample_metrics[0]].shape
+    rng = np.random.default_rng(seed)
+    flat = {name: np.ascontiguousarray(matrices[name], dtype=np.float32).reshape(-1) for name in sample_metrics}
+    row_offsets = np.arange(num_orders) * num_workers  # Order i assigned to worker j reads flat index i*M + j
+
+    averages = {name: np.empty(num_samples) for name in sample_metrics}
+    chunk_size = max(1, chunk_pairs // max(1, num_orders))
+    for start in range(0, num_samples, chunk_size):
+        stop = min(start + chunk_size, num_samples)
+        permutations = rng.permuted(np.tile(np.arange(num_workers), (stop - start, 1)), axis=1)
+        pair_index = permutations[:, :num_orders] + row_offsets
+        for name in sample_metrics:
+            averages[name][start:stop] = flat[name][pair_index].sum(axis=1, dtype=np.float64) / num_orders
+
+    return pd.DataFrame({f'avg_{name}': averages[name] for name in sample_metrics})
+
+
+# Mean, standard deviation, extremes and percentiles of every per-sample metric (one row per metric)
+def summarize_samples(samples_df):
+    rows = []
+    for column in samples_df.columns:
+        values = samples_df[column].values
+        row = {'metric': column, 'samples': len(values), 'mean': values.mean(), 'std': values.std(), 'min': values.min()}
+        for q, value in zip(sample_percentiles, np.percentile(values, sample_percentiles)):
+            row[f'p{q}'] = value
+        row['max'] = values.max()
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+# Function to implement a one-to-one random assignment method (returns the assignments DataFrame, None on errors).
+# Service times, delivery costs and estimated profits all come from the matrix store of service_times_file's folder.
+# A run stats dict (common/instrumentation.py) passed as stats gets the load / solve / write times and the
+# assigned_orders counter.
+def random_assignment_one_to_one(instance_number, orders_file, workers_file, service_times_file, seed=random_seed, output_dir=output_base_dir, stats=None):
     try:
-        # Load the orders, workers, service times, delivery costs, and estimated profits data
-        orders_df = pd.read_csv(orders_file)
-        workers_df = pd.read_csv(workers_file)
-        service_times_df = pd.read_csv(service_times_file)
-        delivery_costs_df = pd.read_csv(delivery_costs_file)
-        estimated_profits_df = pd.read_csv(estimated_profits_file)
-        
+        # Load the orders and workers data
+        with phase(stats, 'load'):
+            orders_df = read_orders(orders_file)
+            workers_df = read_workers(workers_file)
+
         # Extract order and worker IDs
         orders = orders_df['order_id'].tolist()
         workers = workers_df['worker_id'].tolist()
@@ -29,28 +94,28 @@ def random_assignment_one_to_one(instance_number, orders_file, workers_file, ser
             print(f"Error: The number of orders ({len(orders)}) and workers ({len(workers)}) must be equal for a one-to-one assignment.")
             return
 
+        # Service times, delivery costs and estimated profits come from the instance's matrix store
+        # (converted from the cost CSVs next to service_times_file on first use)
+        with phase(stats, 'load'):
+            matrices = load_dense_matrices(service_times_file, orders, workers)
+
         # Set the random seed before shuffling the workers to ensure reproducibility
-        random.seed(random_seed)
-        random.shuffle(workers)
-
-        # Assign each worker to exactly one order (one-to-one mapping)
-        random_assignments = []
-        for order, worker in zip(orders, workers):
-            # Retrieve corresponding service time, delivery cost, and estimated profit
-            service_time = service_times_df.loc[(service_times_df['order_id'] == order) & (service_times_df['worker_id'] == worker), 'service_time'].values[0]
-            delivery_cost = delivery_costs_df.loc[(delivery_costs_df['order_id'] == order) & (delivery_costs_df['worker_id'] == worker), 'delivery_cost'].values[0]
-            estimated_profit = estimated_profits_df.loc[(estimated_profits_df['order_id'] == order) & (estimated_profits_df['worker_id'] == worker), 'estimated_profit'].values[0]
-            
-            random_assignments.append({
-                'order_id': order,
-                'worker_id': worker,
-                'service_time': service_time,
-                'delivery_cost': delivery_cost,
-                'estimated_profit': estimated_profit
-            })
-
-        # Convert to DataFrame with the same structure as your other assignments
-        random_assignments_df = pd.DataFrame(random_assignments)
+        # (shuffling worker positions draws the same random numbers as shuffling the IDs)
+        with phase(stats, 'solve'):
+            worker_cols = list(range(len(workers)))
+            random.seed(seed)
+            random.shuffle(worker_cols)
+        count(stats, 'assigned_orders', len(orders))
+
+        # Assign each worker to exactly one order (one-to-one mapping) and read its values from the matrices
+        rows = np.arange(len(orders))
+        random_assignments_df = pd.DataFrame({
+            'order_id': orders,
+            'worker_id': np.array(workers)[worker_cols],
+            'service_time': matrices['service_time'][rows, worker_cols],
+            'delivery_cost': matrices['delivery_cost'][rows, worker_cols],
+            'estimated_profit': matrices['estimated_profit'][rows, worker_cols],
+        })
 
         # Calculate and print summary statistics
         avg_service_time = random_assignments_df['service_time'].mean()
@@ -62,26 +127,60 @@ def random_assignment_one_to_one(instance_number, orders_file, workers_file, ser
         print(f"Average Estimated Profit: {avg_estimated_profit}")
 
         # Save the random assignments to a CSV file with the same structure as greedy assignments
-        output_file = os.path.join(output_base_dir, f'random_assignments_{instance_number}.csv')
-        random_assignments_df.to_csv(output_file, index=False)
+        os.makedirs(output_dir, exist_ok=True)
+        output_file = os.path.join(output_dir, f'random_assignments_{instance_number}.csv')
+        with phase(stats, 'write'):
+            random_assignments_df.to_csv(output_file, index=False)
         print(f"Random assignments saved to {output_file}")
+        return random_assignments_df
     
     except FileNotFoundError as e:
         print(f"Error: {e}. Please make sure the file exists at the specified path for instance {instance_number}.")
     except Exception as e:
         print(f"An unexpected error occurred in instance {instance_number}: {e}")
 
-# Loop over each instance and run the random one-to-one assignment method
-for instance_number in instance_numbers:
-    print(f"Processing Instance {instance_number} with Random One-to-One Assignment...")
+# Distribution of the random baseline over num_samples random one-to-one assignments, saved as
+# random_distribution_XX.csv (returns the summary DataFrame, None on errors)
+def random_assignment_distribution(instance_number, orders_file, workers_file, service_times_file, num_samples=num_samples, seed=random_seed, output_dir=output_base_dir):
+    try:
+        orders = read_orders(orders_file)['order_id'].tolist()
+        workers = read_workers(workers_file)['worker_id'].tolist()
+        if len(orders) != len(workers):
+            print(f"Error: The number of orders ({len(orders)}) and workers ({len(workers)}) must be equal for a one-to-one assignment.")
+            return
+
+        matrices = load_dense_matrices(service_times_file, orders, workers)
+        samples_df = sample_random_assignments(matrices, num_samples, seed)
+        summary_df = summarize_samples(samples_df)
+
+        print(f"\nRandom Assignment Distribution for Instance {instance_number} ({num_samples} samples):")
+        print(summary_df.to_string(index=False))
+
+        os.makedirs(output_dir, exist_ok=True)
+        output_file = os.path.join(output_dir, f'random_distribution_{instance_number}.csv')
+        summary_df.to_csv(output_file, index=False)
+        print(f"Random assignment distribution saved to {output_file}")
+        return summary_df
+
+    except FileNotFoundError as e:
+        print(f"Error: {e}. Please make sure the file exists at the specified path for instance {instance_number}.")
+    except Exception as e:
+        print(f"An unexpected error occurred in instance {instance_number}: {e}")
+
+if __name__ == '__main__':
+    # Loop over each instance and run the random one-to-one assignment method
+    for instance_number in instance_numbers:
+        print(f"Processing Instance {instance_number} with Random One-to-One Assignment...")
+
+        # Define file paths for the current instance
+        instance_input_dir = os.path.join(input_base_dir, f'instance-{instance_number}')
+        orders_file = os.path.join(instance_input_dir, f'orders-{instance_number}.csv')
+        workers_file = os.path.join(instance_input_dir, f'workers-{instance_number}.csv')
+        service_times_file = os.path.join(instance_input_dir, f'service-times-{instance_number}.csv')
 
-    # Define file paths for the current instance
-    instance_input_dir = os.path.join(input_base_dir, f'instance-{instance_number}')
-    orders_file = os.path.join(instance_input_dir, f'orders-{instance_number}.csv')
-    workers_file = os.path.join(instance_input_dir, f'workers-{instance_number}.csv')
-    service_times_file = os.path.join(instance_input_dir, f'service-times-{instance_number}.csv')
-    delivery_costs_file = os.path.join(instance_input_dir, f'delivery-costs-{instance_number}.csv')
-    estimated_profits_file = os.path.join(instance_input_dir, f'estimated-profits-{instance_number}.csv')
+        # Run the random assignment method for this instance
+        random_assignment_one_to_one(instance_number, orders_file, workers_file, service_times_file)
 
-    # Run the random assignment method for this instance
-    random_assignment_one_to_one(instance_number, orders_file, workers_file, service_times_file, delivery_costs_file, estimated_profits_file)
+        # Distribution over many random assignments to put the other algorithms' results in context
+        if num_samples > 1:
+            random_assignment_distribution(instance_number, orders_file, workers_file, service_times_file, num_samples)
@@ -0,0 +1,469 @@
+import os
+import random
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Make the shared modules in common/ and the Alg1 / Alg3 / local search scripts importable (their folder names are
+# not packages)
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, repo_dir)
+for folder in ['alg-1', 'alg-3', 'LocalSearch']:
+    sys.path.insert(0, os.path.join(repo_dir, folder))
+
+from common.matrix_store import csv_decimals
+from Alg1 import load_instance, instance_coordinates, pair_values
+from Alg3 import build_model, water_wave_optimization_arrays, new_solution_state
+from local_search import pair_values as fitness_pair_values, local_search_columns
+
+# Online dispatch: a long-lived dispatcher holds the cost matrices of the orders and workers currently in the system
+# together with the current assignment. Events (orders and workers added, removed or moved) only recompute the
+# matrix rows of the orders and the columns of the workers they touch, and a dispatch tick keeps every assignment
+# that is still feasible and only assigns the orders the events left without a worker. A tick therefore costs about
+# (changed orders + changed workers) x fleet size instead of a full Alg1 + solver run.
+#
+# Orders and workers live in slots (the rows and columns of the matrices). Freed slots are reused, and the matrices
+# double in size when they are full. Slots that are not in use hold NaN.
+
+# Example run on an Alg1 input instance (the first tick assigns everything, the later ones apply random events)
+input_folder = 'alg-1/alg1-inputs/instance-03'
+instance_number = '03'
+num_ticks = 5
+change_fraction = 0.02  # Share of the orders and workers touched by the events of a tick
+
+# Solvers for the orders a tick has to assign: 'greedy' (each order gets its free worker with the lowest service
+# time, in arrival order) or 'wwo' (the greedy assignment refined with Alg3's WWO from a population of perturbed
+# greedy assignments, then with swap / relocate local search; needs s_max)
+solvers = ['greedy', 'wwo']
+
+order_coordinates = ['pickup_x', 'pickup_y', 'delivery_x', 'delivery_y', 'waiting_time']
+worker_coordinates = ['worker_x', 'worker_y']
+cost_names = ['service_time', 'delivery_cost', 'estimated_profit']
+
+
+def new_dispatcher(mu, m_ow, speed, s_max=None, solver='greedy', wwo_iterations=20, seed=42, order_capacity=64, worker_capacity=64, wwo_time_budget=None, wwo_population=10):
+    if solver not in solvers:
+        raise ValueError(f"Unknown solver {solver!r}, expected one of {solvers}")
+    if solver == 'wwo' and s_max is None:
+        raise ValueError("The WWO solver needs s_max")
+
+    order_capacity = max(1, order_capacity)
+    worker_capacity = max(1, worker_capacity)
+    coords = {name: np.full(order_capacity, np.nan) for name in order_coordinates}
+    coords.update({name: np.full(worker_capacity, np.nan) for name in worker_coordinates})
+
+    dispatcher = {
+        'mu': mu,
+        'm_ow': m_ow,
+        'speed': speed,
+        's_max': s_max,
+        'solver': solver,
+        'wwo_iterations': wwo_iterations,
+        'wwo_time_budget': wwo_time_budget,  # Seconds a tick's WWO may run (None: all wwo_iterations passes)
+        'wwo_population': wwo_population,  # Solutions the WWO starts from: the greedy one and perturbed copies
+        'random_state': random.Random(seed).getstate(),  # The WWO's own random numbers, same as random.seed(seed)
+        'coords': coords,
+        'order_ids': np.full(order_capacity, None, dtype=object),
+        'worker_ids': np.full(worker_capacity, None, dtype=object),
+        'order_slot': {},  # Order ID -> slot
+        'worker_slot': {},  # Worker ID -> slot
+        'free_order_slots': [],
+        'free_worker_slots': [],
+        'order_slots_used': 0,
+        'worker_slots_used': 0,
+        'order_active': np.zeros(order_capacity, dtype=bool),
+        'worker_active': np.zeros(worker_capacity, dtype=bool),
+        'arrival': np.zeros(order_capacity, dtype=np.int64),  # Orders are assigned in arrival order
+        'next_arrival': 0,
+        'assigned_worker': np.full(order_capacity, -1, dtype=np.int64),
+        'assigned_order': np.full(worker_capacity, -1, dtype=np.int64),
+        'blocked': np.full(worker_capacity, np.inf),  # 0 for active workers without an order, inf otherwise
+        'pending': set(),  # Order slots to assign at the next tick (new orders and orders that lost their worker)
+        'waiting': set(),  # Order slots the last tick could not assign
+        'changed_workers': set(),  # Worker slots that became available or moved since the last tick
+    }
+    for name in cost_names:
+        dispatcher[name] = np.full((order_capacity, worker_capacity), np.nan)
+    return dispatcher
+
+
+# Grow a 1-D array (or the given axis of a matrix) to size, filling the new entries with fill
+def _grown(values, size, fill, axis=0):
+    shape = list(values.shape)
+    shape[axis] = size
+    grown = np.full(shape, fill, dtype=values.dtype)
+    grown[tuple(slice(0, n) for n in values.shape)] = values
+    return grown
+
+
+def _new_order_slot(dispatcher):
+    if dispatcher['free_order_slots']:
+        return dispatcher['free_order_slots'].pop()
+
+    slot = dispatcher['order_slots_used']
+    capacity = len(dispatcher['order_active'])
+    if slot == capacity:
+        size = 2 * capacity
+        for name in order_coordinates:
+            dispatcher['coords'][name] = _grown(dispatcher['coords'][name], size, np.nan)
+        for name in cost_names:
+            dispatcher[name] = _grown(dispatcher[name], size, np.nan, axis=0)
+        dispatcher['order_ids'] = _grown(dispatcher['order_ids'], size, None)
+        dispatcher['order_active'] = _grown(dispatcher['order_active'], size, False)
+        dispatcher['arrival'] = _grown(dispatcher['arrival'], size, 0)
+        dispatcher['assigned_worker'] = _grown(dispatcher['assigned_worker'], size, -1)
+    dispatcher['order_slots_used'] += 1
+    return slot
+
+
+def _new_worker_slot(dispatcher):
+    if dispatcher['free_worker_slots']:
+        return dispatcher['free_worker_slots'].pop()
+
+    slot = dispatcher['worker_slots_used']
+    capacity = len(dispatcher['worker_active'])
+    if slot == capacity:
+        size = 2 * capacity
+        for name in worker_coordinates:
+            dispatcher['coords'][name] = _grown(dispatcher['coords'][name], size, np.nan)
+        for name in cost_names:
+            dispatcher[name] = _grown(dispatcher[name], size, np.nan, axis=1)
+        dispatcher['worker_ids'] = _grown(dispatcher['worker_ids'], size, None)
+        dispatcher['worker_active'] = _grown(dispatcher['worker_active'], size, False)
+        dispatcher['assigned_order'] = _grown(dispatcher['assigned_order'], size, -1)
+        dispatcher['blocked'] = _grown(dispatcher['blocked'], size, np.inf)
+    dispatcher['worker_slots_used'] += 1
+    return slot
+
+
+# Recompute the costs of every (order slot, worker slot) pair of the block with Alg1's cost model,
+# rounded to the 5 decimals of the cost CSVs so ties break like they do on Alg1's output
+def _update_costs(dispatcher, order_slots, worker_slots):
+    if len(order_slots) == 0 or len(worker_slots) == 0:
+        return
+
+    coords = dispatcher['coords']
+    block_coords = {name: coords[name][order_slots] for name in order_coordinates}
+    block_coords.update({name: coords[name][worker_slots] for name in worker_coordinates})
+    rows = np.repeat(np.arange(len(order_slots)), len(worker_slots))
+    cols = np.tile(np.arange(len(worker_slots)), len(order_slots))
+    values = pair_values(block_coords, rows, cols, dispatcher['mu'], dispatcher['m_ow'], dispatcher['speed'])
+
+    grid = np.ix_(order_slots, worker_slots)
+    for name in cost_names:
+        dispatcher[name][grid] = np.round(values[name], csv_decimals).reshape(len(order_slots), len(worker_slots))
+
+
+def _active_orders(dispatcher):
+    return np.flatnonzero(dispatcher['order_active'])
+
+
+def _active_workers(dispatcher):
+    return np.flatnonzero(dispatcher['worker_active'])
+
+
+def _is_feasible(dispatcher, order, worker):
+    service_time = dispatcher['service_time'][order, worker]
+    if np.isnan(service_time):
+        return False
+    return dispatcher['s_max'] is None or service_time <= dispatcher['s_max']
+
+
+def _assign(dispatcher, order, worker):
+    dispatcher['assigned_worker'][order] = worker
+    dispatcher['assigned_order'][worker] = order
+    dispatcher['blocked'][worker] = np.inf
+
+
+# Take the worker away from the order; the worker becomes available again
+def _unassign(dispatcher, order):
+    worker = dispatcher['assigned_worker'][order]
+    if worker < 0:
+        return
+    dispatcher['assigned_worker'][order] = -1
+    dispatcher['assigned_order'][worker] = -1
+    dispatcher['blocked'][worker] = 0
+    dispatcher['changed_workers'].add(int(worker))
+
+
+# New orders: coordinates are (lon, lat) as in Alg1's scaled locations, waiting times in minutes.
+# Their rows are computed against the current workers and they are assigned at the next tick.
+def add_orders(dispatcher, order_ids, pickup_x, pickup_y, delivery_x, delivery_y, waiting_time):
+    values = {'pickup_x': pickup_x, 'pickup_y': pickup_y, 'delivery_x': delivery_x, 'delivery_y': delivery_y,
+              'waiting_time': waiting_time}
+    slots = []
+    for i, order_id in enumerate(order_ids):
+        if order_id in dispatcher['order_slot']:
+            raise KeyError(f"Order {order_id} is already in the dispatcher")
+        slot = _new_order_slot(dispatcher)
+        for name in order_coordinates:
+            dispatcher['coords'][name][slot] = values[name][i]
+        dispatcher['order_ids'][slot] = order_id
+        dispatcher['order_slot'][order_id] = slot
+        dispatcher['order_active'][slot] = True
+        dispatcher['arrival'][slot] = dispatcher['next_arrival']
+        dispatcher['next_arrival'] += 1
+        dispatcher['pending'].add(slot)
+        slots.append(slot)
+
+    _update_costs(dispatcher, np.array(slots, dtype=np.intp), _active_workers(dispatcher))
+
+
+# New workers at (lon, lat); their columns are computed against the current orders
+def add_workers(dispatcher, worker_ids, worker_x, worker_y):
+    slots = []
+    for i, worker_id in enumerate(worker_ids):
+        if worker_id in dispatcher['worker_slot']:
+            raise KeyError(f"Worker {worker_id} is already in the dispatcher")
+        slot = _new_worker_slot(dispatcher)
+        dispatcher['coords']['worker_x'][slot] = worker_x[i]
+        dispatcher['coords']['worker_y'][slot] = worker_y[i]
+        dispatcher['worker_ids'][slot] = worker_id
+        dispatcher['worker_slot'][worker_id] = slot
+        dispatcher['worker_active'][slot] = True
+        dispatcher['blocked'][slot] = 0
+        dispatcher['changed_workers'].add(slot)
+        slots.append(slot)
+
+    _update_costs(dispatcher, _active_orders(dispatcher), np.array(slots, dtype=np.intp))
+
+
+# Orders that were delivered or cancelled; their workers become available
+def remove_orders(dispatcher, order_ids):
+    for order_id in order_ids:
+        slot = dispatcher['order_slot'].pop(order_id)
+        _unassign(dispatcher, slot)
+        for name in cost_names:
+            dispatcher[name][slot, :] = np.nan
+        dispatcher['order_ids'][slot] = None
+        dispatcher['order_active'][slot] = False
+        dispatcher['pending'].discard(slot)
+        dispatcher['waiting'].discard(slot)
+        dispatcher['free_order_slots'].append(slot)
+
+
+# Workers that went off shift; their orders are assigned again at the next tick
+def remove_workers(dispatcher, worker_ids):
+    for worker_id in worker_ids:
+        slot = dispatcher['worker_slot'].pop(worker_id)
+        order = dispatcher['assigned_order'][slot]
+        if order >= 0:
+            _unassign(dispatcher, order)
+            dispatcher['pending'].add(int(order))
+        for name in cost_names:
+            dispatcher[name][:, slot] = np.nan
+        dispatcher['worker_ids'][slot] = None
+        dispatcher['worker_active'][slot] = False
+        dispatcher['blocked'][slot] = np.inf
+        dispatcher['changed_workers'].discard(slot)
+        dispatcher['free_worker_slots'].append(slot)
+
+
+# Orders whose pickup, delivery or waiting time changed. An order keeps its worker while the pair stays within
+# s_max; otherwise, and if it had no worker, it is assigned again at the next tick.
+def move_orders(dispatcher, order_ids, pickup_x, pickup_y, delivery_x, delivery_y, waiting_time):
+    values = {'pickup_x': pickup_x, 'pickup_y': pickup_y, 'delivery_x': delivery_x, 'delivery_y': delivery_y,
+              'waiting_time': waiting_time}
+    slots = np.array([dispatcher['order_slot'][order_id] for order_id in order_ids], dtype=np.intp)
+    for name in order_coordinates:
+        dispatcher['coords'][name][slots] = values[name]
+    _update_costs(dispatcher, slots, _active_workers(dispatcher))
+
+    for slot in slots.tolist():
+        worker = dispatcher['assigned_worker'][slot]
+        if worker < 0 or not _is_feasible(dispatcher, slot, worker):
+            _unassign(dispatcher, slot)
+            dispatcher['pending'].add(slot)
+
+
+# Workers at new positions. A worker keeps its order while the pair stays within s_max; otherwise the order is
+# assigned again at the next tick. Available workers are offered to the orders still waiting for one.
+def move_workers(dispatcher, worker_ids, worker_x, worker_y):
+    slots = np.array([dispatcher['worker_slot'][worker_id] for worker_id in worker_ids], dtype=np.intp)
+    dispatcher['coords']['worker_x'][slots] = worker_x
+    dispatcher['coords']['worker_y'][slots] = worker_y
+    _update_costs(dispatcher, _active_orders(dispatcher), slots)
+
+    for slot in slots.tolist():
+        order = dispatcher['assigned_order'][slot]
+        if order < 0:
+            dispatcher['changed_workers'].add(slot)
+        elif not _is_feasible(dispatcher, order, slot):
+            _unassign(dispatcher, order)
+            dispatcher['pending'].add(int(order))
+
+
+# Greedy choice for one order among the given worker slots (all of them when None): the available worker with the
+# lowest service time within s_max, lowest slot on ties. Returns the worker slot or -1.
+def _best_worker(dispatcher, order, worker_slots=None):
+    if worker_slots is None:
+        candidates = dispatcher['service_time'][order] + dispatcher['blocked']
+    else:
+        candidates = dispatcher['service_time'][order, worker_slots] + dispatcher['blocked'][worker_slots]
+
+    s_max = dispatcher['s_max']
+    # NaN (unused slots) compares false, so it never qualifies
+    candidates = np.where(candidates <= (np.inf if s_max is None else s_max), candidates, np.inf)
+    k = int(np.argmin(candidates))
+    if candidates[k] == np.inf:
+        return -1
+    return k if worker_slots is None else int(worker_slots[k])
+
+
+# Copy of X with random swap / relocate moves that keep every pair feasible: an order takes a random worker position,
+# swapping with the order holding it or moving there when it is free. About one move per order.
+def _perturbed_solution(X, feasible):
+    X = X.copy()
+    holder = np.full(feasible.shape[1], -1, dtype=np.int64)
+    holder[X] = np.arange(len(X))
+    for _ in range(len(X)):
+        i = random.randrange(len(X))
+        w = random.randrange(feasible.shape[1])
+        j = holder.item(w)
+        if j == i or not feasible[i, w] or (j >= 0 and not feasible[j, X.item(i)]):
+            continue
+        if j >= 0:
+            X[j] = X[i]
+            holder[X[j]] = j
+        else:
+            holder[X[i]] = -1
+        X[i] = w
+        holder[w] = i
+    return X
+
+
+# Refine the assignment of the given (just assigned) orders over their workers and the available workers within
+# s_max of any of them. Greedy assigns in arrival order, so an early order may take the worker a later one needed:
+# Alg3's WWO runs from the greedy assignment and wwo_population - 1 perturbed copies of it, and its best solution is
+# polished with swap / relocate local search (the WWO's own moves only reassign single orders, which on a one-to-one
+# assignment rarely stay feasible). Kept only when it improves the fitness.
+def _refine_assignment(dispatcher, order_slots):
+    order_slots = np.array(order_slots, dtype=np.intp)
+    available = np.flatnonzero(dispatcher['blocked'] == 0)
+    near = available[(dispatcher['service_time'][np.ix_(order_slots, available)] <= dispatcher['s_max']).any(axis=0)]
+    worker_slots = np.concatenate([dispatcher['assigned_worker'][order_slots], near]).astype(np.intp)
+
+    grid = np.ix_(order_slots, worker_slots)
+    service_time = dispatcher['service_time'][grid]
+    estimated_profit = dispatcher['estimated_profit'][grid]
+    O = list(range(len(order_slots)))
+    W = list(range(len(worker_slots)))
+    model = build_model(O, W, dispatcher['s_max'], {w: 1 for w in W}, service_time, estimated_profit, feasible_moves=True)
+    initial = np.arange(len(order_slots), dtype=np.int32)  # Order i starts with worker position i
+    feasible = service_time <= dispatcher['s_max']
+
+    random.setstate(dispatcher['random_state'])
+    solutions = [initial] + [_perturbed_solution(initial, feasible) for _ in range(dispatcher['wwo_population'] - 1)]
+    X_star = water_wave_optimization_arrays(model, np.array(solutions, dtype=np.int32), len(O),
+                                            dispatcher['wwo_iterations'], dispatcher['wwo_time_budget'])
+    dispatcher['random_state'] = random.getstate()
+
+    values = fitness_pair_values(service_time, estimated_profit, dispatcher['s_max'])
+    values[~feasible] = -np.inf
+    X_star, _ = local_search_columns(values, X_star, np.ones(len(W), dtype=np.int64))
+
+    if new_solution_state(X_star, model)['fitness'] > new_solution_state(initial, model)['fitness']:
+        for order in order_slots.tolist():
+            _unassign(dispatcher, order)
+        for order, position in zip(order_slots.tolist(), X_star.tolist()):
+            _assign(dispatcher, order, int(worker_slots[position]))
+
+
+# Assign the orders the events since the last tick left without a worker, in arrival order, keeping all other
+# assignments. Orders still waiting from earlier ticks only look at the workers that became available or moved
+# (the others were already no option for them). Returns the orders this tick assigned or left waiting, with the
+# same columns as the other algorithms' outputs (worker_id None for orders that are still waiting).
+def dispatch_tick(dispatcher):
+    pending = dispatcher['pending']
+    changed_workers = np.array(sorted(dispatcher['changed_workers']), dtype=np.intp)
+    retry = dispatcher['waiting'] - pending if len(changed_workers) else set()
+    arrival = dispatcher['arrival']
+
+    assigned = []
+    for order in sorted(pending | retry, key=lambda o: arrival[o]):
+        worker = _best_worker(dispatcher, order, None if order in pending else changed_workers)
+        if worker < 0:
+            dispatcher['waiting'].add(order)
+            continue
+        _assign(dispatcher, order, worker)
+        dispatcher['waiting'].discard(order)
+        assigned.append(order)
+
+    # Workers the refinement frees again are offered to the waiting orders at the next tick
+    dispatcher['changed_workers'] = set()
+    if dispatcher['solver'] == 'wwo' and assigned:
+        _refine_assignment(dispatcher, assigned)
+
+    reported = sorted(set(assigned) | pending, key=lambda o: arrival[o])
+    dispatcher['pending'] = set()
+    return assignment_frame(dispatcher, np.array(reported, dtype=np.intp))
+
+
+# Assignment rows of the given order slots
+def assignment_frame(dispatcher, order_slots):
+    workers = dispatcher['assigned_worker'][order_slots]
+    has_worker = workers >= 0
+    columns = {
+        'order_id': dispatcher['order_ids'][order_slots],
+        'worker_id': np.where(has_worker, dispatcher['worker_ids'][np.where(has_worker, workers, 0)], None),
+    }
+    for name in cost_names:
+        columns[name] = np.where(has_worker, dispatcher[name][order_slots, np.where(has_worker, workers, 0)], np.nan)
+    return pd.DataFrame(columns)
+
+
+# The whole current assignment (assigned orders in arrival order)
+def current_assignments(dispatcher):
+    orders = np.flatnonzero(dispatcher['order_active'] & (dispatcher['assigned_worker'] >= 0))
+    return assignment_frame(dispatcher, orders[np.argsort(dispatcher['arrival'][orders], kind='stable')])
+
+
+# Dispatcher holding the orders and workers of an Alg1 input instance (nothing is assigned before the first tick)
+def dispatcher_from_instance(folder_path, instance_num, s_max=None, solver='greedy', wwo_iterations=20, seed=42, wwo_time_budget=None, wwo_population=10):
+    orders, workers, locations, mu, m_ow, speed = load_instance(folder_path, instance_num)
+    coords = instance_coordinates(orders, workers, locations)
+
+    dispatcher = new_dispatcher(mu, m_ow, speed, s_max, solver, wwo_iterations, seed, len(orders), len(workers), wwo_time_budget,
+                                wwo_population)
+    add_workers(dispatcher, workers['worker_id'].tolist(), coords['worker_x'], coords['worker_y'])
+    add_orders(dispatcher, orders['order_id'].tolist(), coords['pickup_x'], coords['pickup_y'],
+               coords['delivery_x'], coords['delivery_y'], coords['waiting_time'])
+    return dispatcher, locations
+
+
+if __name__ == '__main__':
+    s_max = None  # Service time limit of an assignment (None: any; needed by the 'wwo' solver)
+    solver = 'greedy'
+
+    dispatcher, locations = dispatcher_from_instance(input_folder, instance_number, s_max, solver)
+    start = time.perf_counter()
+    tick_df = dispatch_tick(dispatcher)
+    print(f"Initial tick assigned {tick_df['worker_id'].notna().sum()} of {len(tick_df)} orders in {time.perf_counter() - start:.4f}s")
+
+    # Random events on the instance's locations: workers move, orders are delivered and new ones arrive
+    rng = np.random.default_rng(0)
+    next_order_id = max(dispatcher['order_slot']) + 1
+    for tick in range(1, num_ticks + 1):
+        worker_ids = list(dispatcher['worker_slot'])
+        order_ids = list(dispatcher['order_slot'])
+        num_changes = max(1, int(change_fraction * len(worker_ids)))
+
+        start = time.perf_counter()
+        moved = rng.choice(worker_ids, num_changes, replace=False).tolist()
+        spots = locations.sample(num_changes, random_state=rng.integers(1 << 31))
+        move_workers(dispatcher, moved, spots['x'].values, spots['y'].values)
+
+        remove_orders(dispatcher, rng.choice(order_ids, num_changes, replace=False).tolist())
+        pickups = locations.sample(num_changes, random_state=rng.integers(1 << 31))
+        deliveries = locations.sample(num_changes, random_state=rng.integers(1 << 31))
+        new_ids = list(range(next_order_id, next_order_id + num_changes))
+        next_order_id += num_changes
+        add_orders(dispatcher, new_ids, pickups['x'].values, pickups['y'].values,
+                   deliveries['x'].values, deliveries['y'].values, np.zeros(num_changes))
+
+        tick_df = dispatch_tick(dispatcher)
+        print(f"Tick {tick}: {num_changes} workers moved, {num_changes} orders replaced, "
+              f"{len(tick_df)} orders (re)assigned in {time.perf_counter() - start:.4f}s")
+
+    print(current_assignments(dispatcher).to_string(index=False))
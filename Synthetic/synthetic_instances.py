@@ -0,0 +1,208 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Seeded generator of synthetic instances in the schema of the bundled ones, for testing the algorithms beyond
+# 20-60 orders. An instance folder gets
+#
+#   orders-XX.csv      order_id, pickup_location (a restaurant), delivery_location (homeN, one per order),
+#                      ready_time, fetch_time, placement_time, arrive_time (Unix seconds)
+#   workers-XX.csv     worker_id, current_location ({worker_id}_loc)
+#   locations-XX.csv   location_id, x, y (degrees * 1e6, as integers)
+#   parameters-XX.csv  mu, m_ow, speed
+#
+# The geography follows the sample data: restaurants in a few dense hot spots around the city center, customers
+# spread over wider neighbourhoods and workers waiting near the restaurant hot spots. Orders and workers are
+# generated and appended to the files chunk_rows at a time, so memory stays bounded by the chunk size (and the
+# restaurant table) whatever the instance size. Each chunk has its own random stream derived from the seed,
+# so the same seed always gives the same files.
+
+output_base_dir = 'Synthetic/output'
+
+# City center of the sample instances, in degrees (x = longitude, y = latitude)
+center_x = 174.533
+center_y = 45.907
+coordinate_scale = 1e6
+
+# Spread of the geography, in degrees: hot spot centers around the city center, restaurants around their hot spot,
+# neighbourhood centers around the city center, customers around their neighbourhood, workers around a hot spot
+hotspot_spread = 0.006
+restaurant_spread = 0.002
+neighbourhood_spread = 0.012
+customer_spread = 0.004
+worker_spread = 0.005
+
+# Order times, in seconds: ready times are spread over horizon_s from start_time, the kitchen takes up to
+# max_preparation_s after placement, and workers fetch orders a log-normally distributed time after they are
+# ready (median fetch_delay_s, as in the sample data)
+start_time = 1666000000
+horizon_s = 12 * 3600
+max_preparation_s = 900
+fetch_delay_s = 700
+fetch_delay_sigma = 0.5
+min_fetch_delay_s = 60
+
+default_parameters = {'mu': 2, 'm_ow': 15, 'speed': 7}
+
+# Rows generated and written per chunk
+chunk_rows = 100_000
+
+# Random streams of the generator, combined with the seed and the chunk number
+restaurant_stream = 0
+order_stream = 1
+worker_stream = 2
+neighbourhood_stream = 3
+
+
+def _chunk_rng(seed, stream, chunk=0):
+    return np.random.default_rng([seed, stream, chunk])
+
+
+# Restaurant IDs and coordinates (degrees), grouped in num_hotspots hot spots; returns the hot spot centers too
+def generate_restaurants(num_restaurants, num_hotspots, seed):
+    rng = _chunk_rng(seed, restaurant_stream)
+    hotspot_x = center_x + rng.normal(0, hotspot_spread, num_hotspots)
+    hotspot_y = center_y + rng.normal(0, hotspot_spread, num_hotspots)
+    hotspot = rng.integers(0, num_hotspots, num_restaurants)
+    restaurants = pd.DataFrame({
+        'location_id': [f'r{k}' for k in range(1, num_restaurants + 1)],
+        'x': hotspot_x[hotspot] + rng.normal(0, restaurant_spread, num_restaurants),
+        'y': hotspot_y[hotspot] + rng.normal(0, restaurant_spread, num_restaurants),
+    })
+    return restaurants, hotspot_x, hotspot_y
+
+
+# Centers of the customer neighbourhoods (degrees)
+def generate_neighbourhoods(num_neighbourhoods, seed):
+    rng = _chunk_rng(seed, neighbourhood_stream)
+    return (center_x + rng.normal(0, neighbourhood_spread, num_neighbourhoods),
+            center_y + rng.normal(0, neighbourhood_spread, num_neighbourhoods))
+
+
+# Orders first_order .. first_order + count - 1 (IDs start at 1) with their home locations; restaurants are
+# chosen with Zipf-like popularity so a few restaurants get many of the orders, as in the sample data
+def generate_orders(first_order, count, restaurants, neighbourhood_x, neighbourhood_y, speed, seed, chunk):
+    rng = _chunk_rng(seed, order_stream, chunk)
+    popularity = 1 / np.arange(1, len(restaurants) + 1)
+    restaurant = rng.choice(len(restaurants), count, p=popularity / popularity.sum())
+    neighbourhood = rng.integers(0, len(neighbourhood_x), count)
+    home_x = neighbourhood_x[neighbourhood] + rng.normal(0, customer_spread, count)
+    home_y = neighbourhood_y[neighbourhood] + rng.normal(0, customer_spread, count)
+
+    placement_time = start_time + rng.integers(0, horizon_s, count)
+    ready_time = placement_time + rng.integers(0, max_preparation_s, count)
+    fetch_delay = np.maximum(rng.lognormal(np.log(fetch_delay_s), fetch_delay_sigma, count), min_fetch_delay_s)
+    fetch_time = ready_time + fetch_delay.astype(np.int64)
+    # Delivered after the ride from the restaurant to the home at the courier speed (km/h)
+    ride_km = _distance_km(restaurants['x'].values[restaurant], restaurants['y'].values[restaurant], home_x, home_y)
+    arrive_time = fetch_time + np.ceil(ride_km / speed * 3600).astype(np.int64)
+
+    order_ids = np.arange(first_order, first_order + count)
+    homes = np.char.add('home', order_ids.astype(str))
+    orders = pd.DataFrame({
+        'order_id': order_ids,
+        'pickup_location': restaurants['location_id'].values[restaurant],
+        'delivery_location': homes,
+        'ready_time': ready_time,
+        'fetch_time': fetch_time,
+        'placement_time': placement_time,
+        'arrive_time': arrive_time,
+    })
+    return orders, pd.DataFrame({'location_id': homes, 'x': home_x, 'y': home_y})
+
+
+# Workers first_worker .. first_worker + count - 1 with their locations near the restaurant hot spots
+def generate_workers(first_worker, count, hotspot_x, hotspot_y, seed, chunk):
+    rng = _chunk_rng(seed, worker_stream, chunk)
+    hotspot = rng.integers(0, len(hotspot_x), count)
+    worker_ids = np.arange(first_worker, first_worker + count)
+    worker_locations = np.char.add(worker_ids.astype(str), '_loc')
+    workers = pd.DataFrame({'worker_id': worker_ids, 'current_location': worker_locations})
+    locations = pd.DataFrame({
+        'location_id': worker_locations,
+        'x': hotspot_x[hotspot] + rng.normal(0, worker_spread, count),
+        'y': hotspot_y[hotspot] + rng.normal(0, worker_spread, count),
+    })
+    return workers, locations
+
+
+# Equirectangular distance in km between points given in degrees (close to haversine at city scale)
+def _distance_km(x1, y1, x2, y2):
+    dx = np.radians(x2 - x1) * np.cos(np.radians((y1 + y2) / 2))
+    dy = np.radians(y2 - y1)
+    return 6371.0 * np.sqrt(dx * dx + dy * dy)
+
+
+# Coordinates in the file format: degrees * 1e6 as integers
+def _scaled_locations(locations):
+    return locations.assign(x=np.round(locations['x'] * coordinate_scale).astype(np.int64),
+                            y=np.round(locations['y'] * coordinate_scale).astype(np.int64))
+
+
+# Append rows to a CSV file, writing the header (after a UTF-8 BOM, like the sample files) on the first chunk
+def _append_csv(df, path, first):
+    if first:
+        df.to_csv(path, index=False, encoding='utf-8-sig')
+    else:
+        df.to_csv(path, index=False, header=False, mode='a', encoding='utf-8')
+
+
+# Write a synthetic instance to output_dir/{orders,workers,locations,parameters}-{instance_number}.csv.
+# num_restaurants defaults to one per four orders (at least 5), num_hotspots and num_neighbourhoods to about
+# the square root of the restaurants and orders. Returns the paths of the written files.
+def generate_instance(output_dir, instance_number, num_orders, num_workers, seed=42, num_restaurants=None,
+                      num_hotspots=None, num_neighbourhoods=None, parameters=None):
+    if num_orders < 0 or num_workers < 0:
+        raise ValueError("The numbers of orders and workers must not be negative")
+    if num_restaurants is None:
+        num_restaurants = max(5, num_orders // 4)
+    if num_hotspots is None:
+        num_hotspots = max(1, int(np.sqrt(num_restaurants)))
+    if num_neighbourhoods is None:
+        num_neighbourhoods = max(1, int(np.sqrt(num_orders)))
+    parameters = dict(default_parameters, **(parameters or {}))
+
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {name: os.path.join(output_dir, f'{name}-{instance_number}.csv')
+             for name in ['orders', 'workers', 'locations', 'parameters']}
+
+    restaurants, hotspot_x, hotspot_y = generate_restaurants(num_restaurants, num_hotspots, seed)
+    neighbourhood_x, neighbourhood_y = generate_neighbourhoods(num_neighbourhoods, seed)
+    _append_csv(_scaled_locations(restaurants), paths['locations'], first=True)
+
+    # Headers first (also for empty instances), then the rows chunk by chunk
+    empty_orders, _ = generate_orders(1, 0, restaurants, neighbourhood_x, neighbourhood_y, parameters['speed'], seed, 0)
+    _append_csv(empty_orders, paths['orders'], first=True)
+    for chunk, first_order in enumerate(range(1, num_orders + 1, chunk_rows)):
+        count = min(chunk_rows, num_orders + 1 - first_order)
+        orders, homes = generate_orders(first_order, count, restaurants, neighbourhood_x, neighbourhood_y,
+                                        parameters['speed'], seed, chunk)
+        _append_csv(orders, paths['orders'], first=False)
+        _append_csv(_scaled_locations(homes), paths['locations'], first=False)
+
+    empty_workers, _ = generate_workers(1, 0, hotspot_x, hotspot_y, seed, 0)
+    _append_csv(empty_workers, paths['workers'], first=True)
+    for chunk, first_worker in enumerate(range(1, num_workers + 1, chunk_rows)):
+        count = min(chunk_rows, num_workers + 1 - first_worker)
+        workers, worker_locations = generate_workers(first_worker, count, hotspot_x, hotspot_y, seed, chunk)
+        _append_csv(workers, paths['workers'], first=False)
+        _append_csv(_scaled_locations(worker_locations), paths['locations'], first=False)
+
+    _append_csv(pd.DataFrame([parameters], columns=['mu', 'm_ow', 'speed']), paths['parameters'], first=True)
+    return paths
+
+
+if __name__ == '__main__':
+    seed = 42
+
+    # Instance number -> (orders, workers)
+    instance_sizes = {
+        's1k': (1_000, 500),
+        's10k': (10_000, 5_000),
+        's100k': (100_000, 50_000),
+    }
+
+    for instance_number, (num_orders, num_workers) in instance_sizes.items():
+        output_dir = os.path.join(output_base_dir, f'instance-{instance_number}')
+        generate_instance(output_dir, instance_number, num_orders, num_workers, seed)
+        print(f"Instance {instance_number}: {num_orders} orders, {num_workers} workers written to {output_dir}")
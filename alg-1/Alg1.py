@@ -1,43 +1,340 @@
+import contextlib
 import pandas as pd
 import numpy as np
 import os
-from datetime import datetime, timezone
-from math import radians, sin, cos, sqrt, atan2
+import sys
+import time
 
-def calculate_waiting_time(fetch_time, ready_time):
-    fetch_time_dt = datetime.fromtimestamp(fetch_time, timezone.utc)
-    ready_time_dt = datetime.fromtimestamp(ready_time, timezone.utc)
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
 
- # If the worker arrives before the order is ready, calculate waiting time
-    if fetch_time_dt <= ready_time_dt:
-        return 0
-    
-    waiting_time_seconds = (fetch_time_dt - ready_time_dt).total_seconds()
-    return waiting_time_seconds / 60  # Convert seconds to minutes
+# Make the shared modules in common/ importable when running this file as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-def scale_coordinates(value, scale_factor=1e6):
-    return value / scale_factor
+from common.matrix_store import create_matrix_store, append_matrix_rows, finish_matrix_store, close_matrix_store, write_matrix_store, store_dir_for
+from common.distance_cache import open_distance_cache, save_distance_cache, cached_distances
+from common.instance_csv import read_orders, read_workers, read_locations, read_instance_csv
+from common.instrumentation import phase, count
 
-# Calculate the great-circle distance between two points on the Earth using their latitude and longitude.
-def haversine(lat1, lon1, lat2, lon2):
+# Great-circle distance between points given by latitude and longitude: takes NumPy arrays (or scalars) and
+# broadcasts them against each other
+def haversine_np(lat1, lon1, lat2, lon2):
     R = 6371.0  # Radius of the Earth in kilometers
-    lat1_rad = radians(lat1)
-    lon1_rad = radians(lon1)
-    lat2_rad = radians(lat2)
-    lon2_rad = radians(lon2)
-    
+    lat1_rad = np.radians(lat1)
+    lon1_rad = np.radians(lon1)
+    lat2_rad = np.radians(lat2)
+    lon2_rad = np.radians(lon2)
+
     # Differences in coordinates
     dlat = lat2_rad - lat1_rad
     dlon = lon2_rad - lon1_rad
-    
+
     # Haversine formula
-    a = sin(dlat / 2)**2 + cos(lat1_rad) * cos(lat2_rad) * sin(dlon / 2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    distance = R * c 
-    
+    a = np.sin(dlat / 2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlon / 2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    distance = R * c
+
     return distance # Distance in kilometers
 
-def algorithm_1(folder_path, instance_num):
+# Look up the (x, y) coordinates of each location ID; returns two arrays aligned with location_ids
+def resolve_coordinates(locations, location_ids):
+    # Keep the first row per location ID, like the original boolean-mask lookup did
+    lookup = locations.drop_duplicates(subset='location_id', keep='first').set_index('location_id')[['x', 'y']]
+    location_ids = pd.Index(location_ids)
+    positions = lookup.index.get_indexer(location_ids)
+
+    if (positions < 0).any():
+        missing = location_ids[positions < 0].unique().tolist()
+        raise KeyError(f"Unknown location IDs: {missing}")
+
+    coords = lookup.values[positions]
+    return coords[:, 0], coords[:, 1]
+
+# Resolve the worker, pickup and delivery coordinates of an instance into flat arrays (done once per instance).
+# The location IDs are kept too, so distances can be computed once per distinct pair of locations and taken
+# from / added to distance_cache (common/distance_cache.py) when one is given.
+def instance_coordinates(orders, workers, locations, distance_cache=None):
+    worker_x, worker_y = resolve_coordinates(locations, workers['current_location'].values)
+    pickup_x, pickup_y = resolve_coordinates(locations, orders['pickup_location'].values)
+    delivery_x, delivery_y = resolve_coordinates(locations, orders['delivery_location'].values)
+    return {
+        'worker_x': worker_x, 'worker_y': worker_y,
+        'pickup_x': pickup_x, 'pickup_y': pickup_y,
+        'delivery_x': delivery_x, 'delivery_y': delivery_y,
+        'waiting_time': orders['waiting_time'].values.astype(float),
+        'worker_location': np.asarray(workers['current_location'], dtype=str),
+        'pickup_location': np.asarray(orders['pickup_location'], dtype=str),
+        'delivery_location': np.asarray(orders['delivery_location'], dtype=str),
+        'distance_cache': distance_cache,
+    }
+
+# Distances of (from, to) location pairs, through the distance cache when there is one
+def location_distances(distance_cache, from_ids, from_x, from_y, to_ids, to_x, to_y):
+    if distance_cache is None:
+        return haversine_np(from_y, from_x, to_y, to_x)
+    return cached_distances(distance_cache, from_ids, from_x, from_y, to_ids, to_x, to_y, haversine_np)
+
+# Worker -> pickup distance of every pair of the order rows (orders along the rows, workers along the columns).
+# When location IDs repeat enough (or there is a distance cache that can hold them), every distinct
+# (worker location, pickup location) pair is computed once and spread over the matrix.
+def pickup_distances(coords, rows):
+    pickup_x = coords['pickup_x'][rows]
+    pickup_y = coords['pickup_y'][rows]
+    worker_x = coords['worker_x']
+    worker_y = coords['worker_y']
+
+    if 'worker_location' in coords:
+        distance_cache = coords['distance_cache']
+        worker_ids, worker_first, worker_inverse = np.unique(coords['worker_location'], return_index=True, return_inverse=True)
+        pickup_ids, pickup_first, pickup_inverse = np.unique(coords['pickup_location'][rows], return_index=True, return_inverse=True)
+        num_pairs = len(worker_ids) * len(pickup_ids)
+        if distance_cache is not None and num_pairs > distance_cache['max_entries']:
+            distance_cache = None  # The cache could not keep them anyway
+
+        if distance_cache is not None or 2 * num_pairs <= len(worker_x) * len(pickup_x):
+            table = location_distances(
+                distance_cache,
+                np.repeat(worker_ids, len(pickup_ids)), np.repeat(worker_x[worker_first], len(pickup_ids)),
+                np.repeat(worker_y[worker_first], len(pickup_ids)),
+                np.tile(pickup_ids, len(worker_ids)), np.tile(pickup_x[pickup_first], len(worker_ids)),
+                np.tile(pickup_y[pickup_first], len(worker_ids)),
+            ).reshape(len(worker_ids), len(pickup_ids))
+            return table.T[np.ix_(pickup_inverse, worker_inverse)]
+
+    return haversine_np(worker_y[np.newaxis, :], worker_x[np.newaxis, :], pickup_y[:, np.newaxis], pickup_x[:, np.newaxis])
+
+# Pickup -> delivery distance of the order rows (the same for every worker)
+def delivery_distances(coords, rows):
+    if coords.get('distance_cache') is None:
+        return haversine_np(coords['pickup_y'][rows], coords['pickup_x'][rows], coords['delivery_y'][rows], coords['delivery_x'][rows])
+    return location_distances(coords['distance_cache'],
+                              coords['pickup_location'][rows], coords['pickup_x'][rows], coords['pickup_y'][rows],
+                              coords['delivery_location'][rows], coords['delivery_x'][rows], coords['delivery_y'][rows])
+
+# Compute the (orders x workers) matrices for the order rows in [row_start, row_end)
+def pair_matrices(coords, mu, m_ow, speed, row_start=0, row_end=None):
+    rows = slice(row_start, row_end)
+
+    # Worker -> pickup distance for every pair (orders along the rows, workers along the columns)
+    d_p = pickup_distances(coords, rows)
+    # Pickup -> delivery distance only depends on the order
+    d_d = delivery_distances(coords, rows)[:, np.newaxis]
+
+    t_p = (d_p / speed) * 60  # Convert hours to minutes
+    t_w = coords['waiting_time'][rows][:, np.newaxis]  # Already in minutes
+    t_d = (d_d / speed) * 60  # Convert hours to minutes
+
+    service_time = t_p + t_w + t_d
+    delivery_cost = mu * (d_p + d_d)
+    estimated_profit = m_ow - delivery_cost
+
+    return {
+        'service_time': service_time,
+        'delivery_cost': delivery_cost,
+        'estimated_profit': estimated_profit,
+        't_p': t_p,
+        # Per-order columns are exposed as read-only broadcast views instead of copies
+        't_d': np.broadcast_to(t_d, t_p.shape),
+        't_w': np.broadcast_to(t_w, t_p.shape),
+    }
+
+# Build the dense (orders x workers) matrices for t_p, t_d, t_w, service time, delivery cost and estimated profit.
+# orders needs pickup_location, delivery_location and waiting_time, workers needs current_location,
+# and locations must already be normalized and scaled.
+def cost_matrices(orders, workers, locations, mu, m_ow, speed, distance_cache=None):
+    return pair_matrices(instance_coordinates(orders, workers, locations, distance_cache), mu, m_ow, speed)
+
+# Yield (row_start, row_end, matrices) blocks of whole order rows, each holding roughly block_pairs pairs.
+# Only one block is alive at a time, so memory depends on block_pairs and not on the instance size.
+def cost_blocks(orders, workers, locations, mu, m_ow, speed, block_pairs=1_000_000, distance_cache=None):
+    coords = instance_coordinates(orders, workers, locations, distance_cache)
+    num_orders = len(orders)
+    block_orders = max(1, block_pairs // max(1, len(workers)))
+
+    for row_start in range(0, num_orders, block_orders):
+        row_end = min(row_start + block_orders, num_orders)
+        yield row_start, row_end, pair_matrices(coords, mu, m_ow, speed, row_start, row_end)
+
+# Emit the long-format service-times / delivery-costs / estimated-profits DataFrames from the dense matrices
+def matrices_to_frames(order_ids, worker_ids, matrices):
+    num_orders = len(order_ids)
+    num_workers = len(worker_ids)
+
+    # Row-major flattening gives the same (order, worker) row order as the original nested loops
+    pair_columns = {
+        'order_id': np.repeat(np.asarray(order_ids), num_workers),
+        'worker_id': np.tile(np.asarray(worker_ids), num_orders),
+    }
+
+    def flat(name):
+        # Rounding values for readability
+        return np.round(np.asarray(matrices[name]).reshape(-1), 5)
+
+    service_times_df = pd.DataFrame({**pair_columns, 'service_time': flat('service_time'), 't_p': flat('t_p'), 't_d': flat('t_d'), 't_w': flat('t_w')})
+    delivery_costs_df = pd.DataFrame({**pair_columns, 'delivery_cost': flat('delivery_cost')})
+    estimated_profits_df = pd.DataFrame({**pair_columns, 'estimated_profit': flat('estimated_profit')})
+
+    return service_times_df, delivery_costs_df, estimated_profits_df
+
+# Kilometres per degree of latitude on the haversine sphere
+km_per_degree = 6371.0 * np.pi / 180
+
+# Uniform lat/lon grid over the worker positions: workers are bucketed by cell and sorted by cell key
+# (row-major over the grid), so the workers of a run of cells in one grid row are one contiguous slice.
+# Cells are cell_km high and roughly cell_km wide at the workers' mean latitude.
+def worker_grid(worker_x, worker_y, cell_km=1.0):
+    worker_x = np.asarray(worker_x, dtype=float)
+    worker_y = np.asarray(worker_y, dtype=float)
+    cell_lat = cell_km / km_per_degree
+    cell_lon = cell_lat / max(np.cos(np.radians(np.abs(worker_y).mean())), 1e-6) if len(worker_y) else cell_lat
+
+    x0 = worker_x.min() if len(worker_x) else 0.0
+    y0 = worker_y.min() if len(worker_y) else 0.0
+    ix = np.floor((worker_x - x0) / cell_lon).astype(np.int64)
+    iy = np.floor((worker_y - y0) / cell_lat).astype(np.int64)
+    nx = int(ix.max()) + 1 if len(ix) else 1
+    ny = int(iy.max()) + 1 if len(iy) else 1
+
+    keys = iy * nx + ix
+    order = np.argsort(keys, kind='stable')
+    return {
+        'x0': x0, 'y0': y0, 'cell_lon': cell_lon, 'cell_lat': cell_lat, 'nx': nx, 'ny': ny,
+        'keys': keys[order], 'workers': order, 'worker_x': worker_x, 'worker_y': worker_y,
+    }
+
+# Workers within radius_km of the point (x, y) = (lon, lat): returns their indices (ascending) and distances.
+# Scans the grid cells of the spherical bounding box of the circle, then filters by the exact haversine distance.
+# Also returns whether the box covered the whole grid, in which case no worker lies outside it.
+# (Longitudes are not wrapped around the antimeridian.)
+def grid_query(grid, x, y, radius_km):
+    if radius_km < 0 or len(grid['workers']) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0), len(grid['workers']) == 0
+
+    dlat = np.degrees(radius_km / 6371.0)
+    cos_lat = np.cos(np.radians(y))
+    ratio = np.sin(min(radius_km / 6371.0, np.pi / 2)) / cos_lat if cos_lat > 0 else np.inf
+    dlon = np.degrees(np.arcsin(ratio)) if ratio < 1 else 180.0
+
+    ix0 = max(int(np.floor((x - dlon - grid['x0']) / grid['cell_lon'])), 0)
+    ix1 = min(int(np.floor((x + dlon - grid['x0']) / grid['cell_lon'])), grid['nx'] - 1)
+    iy0 = max(int(np.floor((y - dlat - grid['y0']) / grid['cell_lat'])), 0)
+    iy1 = min(int(np.floor((y + dlat - grid['y0']) / grid['cell_lat'])), grid['ny'] - 1)
+    covers_grid = ix0 == 0 and iy0 == 0 and ix1 == grid['nx'] - 1 and iy1 == grid['ny'] - 1
+    if ix0 > ix1 or iy0 > iy1:
+        return np.zeros(0, dtype=np.int64), np.zeros(0), covers_grid
+
+    # One contiguous slice of the sorted workers per grid row of the box
+    cell_rows = np.arange(iy0, iy1 + 1) * grid['nx']
+    starts = np.searchsorted(grid['keys'], cell_rows + ix0, side='left')
+    ends = np.searchsorted(grid['keys'], cell_rows + ix1, side='right')
+    workers = np.sort(np.concatenate([grid['workers'][start:end] for start, end in zip(starts, ends)]))
+
+    distances = haversine_np(grid['worker_y'][workers], grid['worker_x'][workers], y, x)
+    within = distances <= radius_km
+    return workers[within], distances[within], covers_grid
+
+# Per-pair values for 1-D arrays of order rows and worker columns (same arithmetic as pair_matrices)
+def pair_values(coords, rows, cols, mu, m_ow, speed):
+    d_p = haversine_np(coords['worker_y'][cols], coords['worker_x'][cols], coords['pickup_y'][rows], coords['pickup_x'][rows])
+    d_d = delivery_distances(coords, slice(None))[rows]
+
+    t_p = (d_p / speed) * 60  # Convert hours to minutes
+    t_w = coords['waiting_time'][rows]  # Already in minutes
+    t_d = (d_d / speed) * 60  # Convert hours to minutes
+
+    delivery_cost = mu * (d_p + d_d)
+    return {
+        'service_time': t_p + t_w + t_d,
+        'delivery_cost': delivery_cost,
+        'estimated_profit': m_ow - delivery_cost,
+        't_p': t_p,
+        't_d': t_d,
+        't_w': t_w,
+        'd_p': d_p,
+    }
+
+# Sparse candidate set instead of the full orders x workers product. With s_max, an order only gets the workers
+# whose service time is <= s_max (searched within the pickup radius (s_max - t_w - t_d) * speed / 60 km);
+# with k, only its k nearest workers (by pickup distance, lower worker index on ties); with both, the k nearest
+# of those within s_max. Returns CSR-style arrays: order i's candidates are cols[indptr[i]:indptr[i + 1]]
+# (ascending worker columns) with their values at the same positions in the matrix_names arrays.
+def candidate_pairs(coords, mu, m_ow, speed, s_max=None, k=None, cell_km=1.0):
+    if s_max is None and k is None:
+        raise ValueError("candidate_pairs needs s_max, k or both")
+
+    num_orders = len(coords['pickup_x'])
+    grid = worker_grid(coords['worker_x'], coords['worker_y'], cell_km)
+    d_d = delivery_distances(coords, slice(None))
+    t_d = (d_d / speed) * 60
+
+    # Candidate workers per order: a superset that is cut down to the exact set below
+    row_parts = []
+    col_parts = []
+    for row in range(num_orders):
+        x = coords['pickup_x'][row]
+        y = coords['pickup_y'][row]
+        if s_max is not None:
+            # Widened slightly so rounding in the radius never drops a pair that passes the service time check
+            radius = (s_max - coords['waiting_time'][row] - t_d[row]) * speed / 60
+            workers, _, _ = grid_query(grid, x, y, radius * (1 + 1e-9) + 1e-9)
+        else:
+            # Grow the search circle until it holds k workers (or the whole grid): the k nearest are inside it
+            radius = cell_km
+            while True:
+                workers, _, covers_grid = grid_query(grid, x, y, radius)
+                if len(workers) >= k:
+                    break
+                if covers_grid:
+                    workers = np.arange(len(grid['workers']))  # Fewer than k within reach: take every worker
+                    break
+                radius *= 2
+        row_parts.append(np.full(len(workers), row, dtype=np.int64))
+        col_parts.append(workers)
+
+    rows = np.concatenate(row_parts) if row_parts else np.zeros(0, dtype=np.int64)
+    cols = np.concatenate(col_parts) if col_parts else np.zeros(0, dtype=np.int64)
+    values = pair_values(coords, rows, cols, mu, m_ow, speed)
+
+    keep = np.ones(len(rows), dtype=bool)
+    if s_max is not None:
+        keep = values['service_time'] <= s_max
+    if k is not None:
+        # Rank the remaining candidates of each order by pickup distance and keep the first k
+        ranked = np.flatnonzero(keep)[np.lexsort((cols[keep], values['d_p'][keep], rows[keep]))]
+        row_start = np.searchsorted(rows[ranked], rows[ranked], side='left')
+        keep = np.zeros(len(rows), dtype=bool)
+        keep[ranked[np.arange(len(ranked)) - row_start < k]] = True
+
+    # Candidates came out per order in ascending worker order, so filtering keeps the CSR layout
+    rows = rows[keep]
+    cols = cols[keep]
+    candidates = {name: values[name][keep] for name in ['service_time', 'delivery_cost', 'estimated_profit', 't_p', 't_d', 't_w']}
+    candidates['cols'] = cols
+    candidates['indptr'] = np.searchsorted(rows, np.arange(num_orders + 1), side='left')
+    return candidates
+
+# Long-format DataFrames (same columns as matrices_to_frames) holding only the candidate pairs
+def candidate_frames(order_ids, worker_ids, candidates):
+    counts = np.diff(candidates['indptr'])
+    pair_columns = {
+        'order_id': np.repeat(np.asarray(order_ids), counts),
+        'worker_id': np.asarray(worker_ids)[candidates['cols']],
+    }
+
+    def flat(name):
+        # Rounding values for readability
+        return np.round(candidates[name], 5)
+
+    service_times_df = pd.DataFrame({**pair_columns, 'service_time': flat('service_time'), 't_p': flat('t_p'), 't_d': flat('t_d'), 't_w': flat('t_w')})
+    delivery_costs_df = pd.DataFrame({**pair_columns, 'delivery_cost': flat('delivery_cost')})
+    estimated_profits_df = pd.DataFrame({**pair_columns, 'estimated_profit': flat('estimated_profit')})
+
+    return service_times_df, delivery_costs_df, estimated_profits_df
+
+# Load and normalize the orders, workers, locations and parameters of one instance
+def load_instance(folder_path, instance_num):
     orders_file = os.path.join(folder_path, f'orders-{instance_num}.csv').replace("\\", "/")
     workers_file = os.path.join(folder_path, f'workers-{instance_num}.csv').replace("\\", "/")
     locations_file = os.path.join(folder_path, f'locations-{instance_num}.csv').replace("\\", "/")
@@ -47,130 +344,189 @@ def algorithm_1(folder_path, instance_num):
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
 
-    orders = pd.read_csv(orders_file)
-    workers = pd.read_csv(workers_file)
-    locations = pd.read_csv(locations_file)
-    instance_params = pd.read_csv(instance_params_file)
-
-    orders['waiting_time'] = orders.apply(lambda row: calculate_waiting_time(row['fetch_time'], row['ready_time']), axis=1)
-
-    locations['location_id'] = locations['location_id'].str.strip().str.upper()
-    orders['pickup_location'] = orders['pickup_location'].str.strip().str.upper()
-    orders['delivery_location'] = orders['delivery_location'].str.strip().str.upper()
-    workers['current_location'] = workers['current_location'].str.strip().str.upper()
-
-    locations['x'] = locations['x'].apply(scale_coordinates)
-    locations['y'] = locations['y'].apply(scale_coordinates)
+    # Typed reads (common/instance_csv.py): location IDs come normalized, coordinates scaled down by 1e6
+    # and the orders carry their waiting time in minutes
+    orders = read_orders(orders_file)
+    workers = read_workers(workers_file)
+    locations = read_locations(locations_file)
+    instance_params = read_instance_csv(instance_params_file)
 
     mu = instance_params.loc[0, 'mu']
     m_ow = instance_params.loc[0, 'm_ow']
     speed = instance_params.loc[0, 'speed']
 
-    service_times = {}
-    delivery_costs = {}
-    estimated_profits = {}
-    
-    # dictionaries to store t_p, t_d, t_w
-    pickup_times = {}
-    delivery_times = {}
-    waiting_times = {}
-
-    for _, order in orders.iterrows():
-        order_id = order['order_id']
-        pickup_location = order['pickup_location']
-        delivery_location = order['delivery_location']
-
-        for _, worker in workers.iterrows():
-            worker_id = worker['worker_id']
-            worker_location = worker['current_location']
-
-            try:
-                worker_coords = locations.loc[locations['location_id'] == worker_location, ['x', 'y']].values[0]
-                pickup_coords = locations.loc[locations['location_id'] == pickup_location, ['x', 'y']].values[0]
-                delivery_coords = locations.loc[locations['location_id'] == delivery_location, ['x', 'y']].values[0]
-                
-                # Calculate distances using the Haversine formula
-                d_p = haversine(worker_coords[1], worker_coords[0], pickup_coords[1], pickup_coords[0]) # Distance from worker to pickup
-                d_d = haversine(pickup_coords[1], pickup_coords[0], delivery_coords[1], delivery_coords[0]) # Distance from pickup to delivery
-                
-                # Calculate times (using the speed parameter to determine travel time)
-                t_p = (d_p / speed) * 60  # Convert hours to minutes
-                t_w = order['waiting_time']  # This is now in minutes
-                t_d = (d_d / speed) * 60  # Convert hours to minutes
-
-                # Store the times
-                pickup_times[(order_id, worker_id)] = t_p
-                waiting_times[(order_id, worker_id)] = t_w
-                delivery_times[(order_id, worker_id)] = t_d
-
-                # Calculate service time
-                s_ow = t_p + t_w + t_d
-                service_times[(order_id, worker_id)] = s_ow
-
-                # Calculate delivery cost
-                c_ow = mu * (d_p + d_d)
-                delivery_costs[(order_id, worker_id)] = c_ow
-
-                # Calculate estimated profit
-                p_ow = m_ow - c_ow
-                estimated_profits[(order_id, worker_id)] = p_ow
-
-            except KeyError as e:
-                print(f"Error processing order {order_id} and worker {worker_id}: {e}")
-
-    # Convert dictionaries to DataFrames
-    service_times_df = pd.DataFrame.from_dict(service_times, orient='index', columns=['service_time'])
-    delivery_costs_df = pd.DataFrame.from_dict(delivery_costs, orient='index', columns=['delivery_cost'])
-    estimated_profits_df = pd.DataFrame.from_dict(estimated_profits, orient='index', columns=['estimated_profit'])
-    
-    # New DataFrames for t_p, t_d, t_w
-    pickup_times_df = pd.DataFrame.from_dict(pickup_times, orient='index', columns=['t_p'])
-    delivery_times_df = pd.DataFrame.from_dict(delivery_times, orient='index', columns=['t_d'])
-    waiting_times_df = pd.DataFrame.from_dict(waiting_times, orient='index', columns=['t_w'])
-
-    # Adding order_id and worker_id columns for merging
-    for df in [service_times_df, delivery_costs_df, estimated_profits_df, pickup_times_df, delivery_times_df, waiting_times_df]:
-        df['order_id'] = df.index.map(lambda x: x[0])
-        df['worker_id'] = df.index.map(lambda x: x[1])
-
-    # Rounding values for readability
-    service_times_df['service_time'] = service_times_df['service_time'].round(5)
-    delivery_costs_df['delivery_cost'] = delivery_costs_df['delivery_cost'].round(5)
-    estimated_profits_df['estimated_profit'] = estimated_profits_df['estimated_profit'].round(5)
-    pickup_times_df['t_p'] = pickup_times_df['t_p'].round(5)
-    delivery_times_df['t_d'] = delivery_times_df['t_d'].round(5)
-    waiting_times_df['t_w'] = waiting_times_df['t_w'].round(5)
-
-    # Merge the data into the service_times_df
-    service_times_df = service_times_df.merge(pickup_times_df, on=['order_id', 'worker_id'], how='left')
-    service_times_df = service_times_df.merge(delivery_times_df, on=['order_id', 'worker_id'], how='left')
-    service_times_df = service_times_df.merge(waiting_times_df, on=['order_id', 'worker_id'], how='left')
-
-    service_times_df = service_times_df[['order_id', 'worker_id', 'service_time', 't_p', 't_d', 't_w']]
-    delivery_costs_df = delivery_costs_df[['order_id', 'worker_id', 'delivery_cost']]
-    estimated_profits_df = estimated_profits_df[['order_id', 'worker_id', 'estimated_profit']]
-
-    return service_times_df, delivery_costs_df, estimated_profits_df
-
-# Define the input directories and corresponding instance numbers
-input_folders = ['alg-1/alg1-inputs/instance-01', 'alg-1/alg1-inputs/instance-02', 'alg-1/alg1-inputs/instance-03']
-instance_numbers = ['01', '02', '03']
-
-# Iterate over each input folder and run the algorithm for each instance
-for folder, instance_num in zip(input_folders, instance_numbers):
+    return orders, workers, locations, mu, m_ow, speed
+
+# Returns the long-format service-times / delivery-costs / estimated-profits DataFrames.
+# With matrix_dir set, the dense matrices are also written there as a binary matrix store (common/matrix_store.py).
+# A run stats dict (common/instrumentation.py) passed as stats gets the load / build / write times and the
+# pairs_computed and distance cache counters (candidate_pairs for the sparse variant).
+def algorithm_1(folder_path, instance_num, matrix_dir=None, distance_cache=None, stats=None):
+    with phase(stats, 'load'):
+        orders, workers, locations, mu, m_ow, speed = load_instance(folder_path, instance_num)
+
+    # Compute every order-worker pair at once as dense (orders x workers) arrays
+    with phase(stats, 'build'), distance_cache_counts(stats, distance_cache):
+        matrices = cost_matrices(orders, workers, locations, mu, m_ow, speed, distance_cache)
+    count(stats, 'pairs_computed', len(orders) * len(workers))
+
+    with phase(stats, 'write'):
+        if matrix_dir is not None:
+            write_matrix_store(matrix_dir, orders['order_id'].values, workers['worker_id'].values, matrices, source=folder_path)
+
+        return matrices_to_frames(orders['order_id'].values, workers['worker_id'].values, matrices)
+
+# Sparse variant of algorithm_1: only the candidate pairs of candidate_pairs (within s_max and/or the k nearest
+# workers of every order) are computed and returned, in the same long format. Orders and workers that end up
+# without candidates do not appear in the frames.
+def algorithm_1_sparse(folder_path, instance_num, s_max=None, k=None, cell_km=1.0, distance_cache=None, stats=None):
+    with phase(stats, 'load'):
+        orders, workers, locations, mu, m_ow, speed = load_instance(folder_path, instance_num)
+    with phase(stats, 'build'), distance_cache_counts(stats, distance_cache):
+        coords = instance_coordinates(orders, workers, locations, distance_cache)
+        candidates = candidate_pairs(coords, mu, m_ow, speed, s_max, k, cell_km)
+    count(stats, 'candidate_pairs', int(candidates['indptr'][-1]))
+    with phase(stats, 'write'):
+        return candidate_frames(orders['order_id'].values, workers['worker_id'].values, candidates)
+
+# Adds the distance cache hits and misses of the with block to the stats counters
+@contextlib.contextmanager
+def distance_cache_counts(stats, distance_cache):
+    if stats is None or distance_cache is None:
+        yield
+        return
+    hits, misses = distance_cache['hits'], distance_cache['misses']
     try:
-        service_times_df, delivery_costs_df, estimated_profits_df = algorithm_1(folder, instance_num)
-
-        output_dir = folder.replace("inputs", "outputs")
-
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-
-        service_times_df.to_csv(os.path.join(output_dir, f'service-times-{instance_num}.csv'), index=False)
-        delivery_costs_df.to_csv(os.path.join(output_dir, f'delivery-costs-{instance_num}.csv'), index=False)
-        estimated_profits_df.to_csv(os.path.join(output_dir, f'estimated-profits-{instance_num}.csv'), index=False)
-
-        print(f"Instance {instance_num} processed and results saved to {output_dir}.")
-
-    except FileNotFoundError as e:
-        print(e)
+        yield
+    finally:
+        count(stats, 'distance_cache_hits', distance_cache['hits'] - hits)
+        count(stats, 'distance_cache_misses', distance_cache['misses'] - misses)
+
+# Peak resident memory of this process in MB (None where the resource module is unavailable, e.g. Windows)
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+# Tiled variant of algorithm_1: computes the matrices block by block and streams every block straight to
+# the long-format CSVs in output_dir and/or to a binary matrix store in matrix_dir.
+# Returns a DataFrame with per-block timings, throughput and peak memory.
+def algorithm_1_tiled(folder_path, instance_num, output_dir=None, matrix_dir=None, block_pairs=1_000_000, verbose=True, distance_cache=None):
+    orders, workers, locations, mu, m_ow, speed = load_instance(folder_path, instance_num)
+    return write_cost_blocks(orders, workers, locations, mu, m_ow, speed, instance_num, output_dir, matrix_dir, block_pairs, verbose, distance_cache)
+
+def write_cost_blocks(orders, workers, locations, mu, m_ow, speed, instance_num, output_dir=None, matrix_dir=None, block_pairs=1_000_000, verbose=True, distance_cache=None):
+    if output_dir is None and matrix_dir is None:
+        raise ValueError("Tiled mode needs an output_dir, a matrix_dir or both")
+
+    order_ids = orders['order_id'].values
+    worker_ids = workers['worker_id'].values
+    shape = (len(order_ids), len(worker_ids))
+
+    csv_files = {}
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+        for name in ['service-times', 'delivery-costs', 'estimated-profits']:
+            csv_files[name] = open(os.path.join(output_dir, f'{name}-{instance_num}.csv'), 'w', newline='')
+
+    store_writer = None
+    if matrix_dir is not None:
+        store_writer = create_matrix_store(matrix_dir, order_ids, worker_ids)
+
+    block_stats = []
+    try:
+        start = time.perf_counter()
+        for block, (row_start, row_end, matrices) in enumerate(cost_blocks(orders, workers, locations, mu, m_ow, speed, block_pairs, distance_cache)):
+            if csv_files:
+                frames = matrices_to_frames(order_ids[row_start:row_end], worker_ids, matrices)
+                for name, df in zip(['service-times', 'delivery-costs', 'estimated-profits'], frames):
+                    df.to_csv(csv_files[name], index=False, header=(block == 0))
+                del frames
+
+            if store_writer is not None:
+                append_matrix_rows(store_writer, matrices)
+
+            end = time.perf_counter()
+            pairs = (row_end - row_start) * shape[1]
+            block_stats.append({
+                'block': block,
+                'orders': row_end - row_start,
+                'pairs': pairs,
+                'seconds': end - start,
+                'pairs_per_s': pairs / (end - start) if end > start else float('inf'),
+                'peak_rss_mb': peak_rss_mb(),
+            })
+            if verbose:
+                stats = block_stats[-1]
+                peak = 'n/a' if stats['peak_rss_mb'] is None else f"{stats['peak_rss_mb']:.1f} MB"
+                print(f"Block {block}: orders {row_start}-{row_end}, {pairs} pairs in {stats['seconds']:.3f}s "
+                      f"({stats['pairs_per_s']:.0f} pairs/s, peak RSS {peak})")
+            start = end
+    finally:
+        for f in csv_files.values():
+            f.close()
+        if store_writer is not None:
+            close_matrix_store(store_writer)
+
+    if store_writer is not None:
+        finish_matrix_store(store_writer, source=f'Alg1 instance {instance_num}')
+
+    return pd.DataFrame(block_stats)
+
+if __name__ == '__main__':
+    # Define the input directories and corresponding instance numbers
+    input_folders = ['alg-1/alg1-inputs/instance-01', 'alg-1/alg1-inputs/instance-02', 'alg-1/alg1-inputs/instance-03']
+    instance_numbers = ['01', '02', '03']
+
+    # Set to a number of pairs per block to stream the outputs in tiles with bounded memory (None = all at once)
+    block_pairs = None
+
+    # Set either (or both) to only emit candidate pairs: service time <= candidate_s_max and/or the candidate_k
+    # nearest workers of every pickup (None for both = the full orders x workers product)
+    candidate_s_max = None
+    candidate_k = None
+
+    # Distances between location pairs are kept in this file and reused by later runs (None = no cache)
+    distance_cache_file = 'alg-1/distance-cache.npz'
+    distance_cache = None if distance_cache_file is None else open_distance_cache(distance_cache_file)
+
+    # Iterate over each input folder and run the algorithm for each instance
+    for folder, instance_num in zip(input_folders, instance_numbers):
+        try:
+            output_dir = folder.replace("inputs", "outputs")
+
+            # Binary matrix store read by the downstream algorithms (common/matrix_store.py)
+            matrix_dir = store_dir_for(output_dir, instance_num)
+
+            if candidate_s_max is not None or candidate_k is not None:
+                frames = algorithm_1_sparse(folder, instance_num, candidate_s_max, candidate_k, distance_cache=distance_cache)
+                os.makedirs(output_dir, exist_ok=True)
+                for name, df in zip(['service-times', 'delivery-costs', 'estimated-profits'], frames):
+                    df.to_csv(os.path.join(output_dir, f'{name}-{instance_num}.csv'), index=False)
+                print(f"Instance {instance_num} processed and {len(frames[0])} candidate pairs saved to {output_dir}.")
+                continue
+
+            if block_pairs is not None:
+                algorithm_1_tiled(folder, instance_num, output_dir=output_dir, matrix_dir=matrix_dir, block_pairs=block_pairs, distance_cache=distance_cache)
+                print(f"Instance {instance_num} processed and results saved to {output_dir}.")
+                continue
+
+            service_times_df, delivery_costs_df, estimated_profits_df = algorithm_1(folder, instance_num, matrix_dir=matrix_dir, distance_cache=distance_cache)
+
+            if not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+
+            service_times_df.to_csv(os.path.join(output_dir, f'service-times-{instance_num}.csv'), index=False)
+            delivery_costs_df.to_csv(os.path.join(output_dir, f'delivery-costs-{instance_num}.csv'), index=False)
+            estimated_profits_df.to_csv(os.path.join(output_dir, f'estimated-profits-{instance_num}.csv'), index=False)
+
+            print(f"Instance {instance_num} processed and results saved to {output_dir}.")
+
+        except FileNotFoundError as e:
+            print(e)
+
+        finally:
+            if distance_cache is not None:
+                save_distance_cache(distance_cache)
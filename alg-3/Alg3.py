@@ -1,189 +1,766 @@
-import os
-import pandas as pd
-import random
-import copy
-
-# Define base directories for inputs and outputs
-input_base_dir = 'alg-3/alg3-inputs'
-output_base_dir = 'alg-3/alg3-outputs'
-
-# Define instance numbers
-instance_numbers = ['01', '02', '03']
-
-# Loop over all instances
-for instance_num in instance_numbers:
-    print(f"Processing instance {instance_num}...")
-
-    # Define paths relative to the base input directory
-    instance_input_dir = os.path.join(input_base_dir, f'instance-{instance_num}')
-    costs_path = os.path.join(instance_input_dir, f'delivery-costs-{instance_num}.csv')
-    estimated_profits_path = os.path.join(instance_input_dir, f'estimated-profits-{instance_num}.csv')
-    initial_solutions_path = os.path.join(instance_input_dir, f'all_feasible_solutions_{instance_num}.csv')
-    orders_path = os.path.join(instance_input_dir, f'orders-{instance_num}.csv')
-    service_times_path = os.path.join(instance_input_dir, f'service-times-{instance_num}.csv')
-    workers_path = os.path.join(instance_input_dir, f'workers-{instance_num}.csv')
-
-    # Load the CSV files for this instance
-    print("Loading CSV files...")
-    costs_df = pd.read_csv(costs_path)
-    estimated_profits_df = pd.read_csv(estimated_profits_path)
-    initial_solutions_df = pd.read_csv(initial_solutions_path)
-    orders_df = pd.read_csv(orders_path)
-    service_times_df = pd.read_csv(service_times_path)
-    workers_df = pd.read_csv(workers_path)
-    print("CSV files loaded successfully.")
-
-    # Create the list of worker IDs and order IDs
-    O = orders_df['order_id'].tolist()  # Order IDs
-    W = workers_df['worker_id'].tolist()  # Worker IDs
-
-    # Convert DataFrames to Dictionaries
-    print("Converting DataFrames to dictionaries...")
-    costs = {(row['order_id'], row['worker_id']): row['delivery_cost'] for _, row in costs_df.iterrows()}
-    estimated_profits = {(row['order_id'], row['worker_id']): row['estimated_profit'] for _, row in estimated_profits_df.iterrows()}
-    service_times = {(row['order_id'], row['worker_id']): row['service_time'] for _, row in service_times_df.iterrows()}
-    print("Conversion to dictionaries completed.")
-
-    # Clean the initial solutions DataFrame
-    initial_solutions_df_cleaned = initial_solutions_df.dropna()
-
-    # Number of orders
-    num_orders = len(orders_df)
-
-    # Function to initialize population ensuring one-to-one assignment
-    def initialize_population(O, W, initial_solutions_df_cleaned, num_orders):
-        initial_solutions = []
-        for i in range(0, len(initial_solutions_df_cleaned), num_orders):
-            solution = {}
-            chunk = initial_solutions_df_cleaned.iloc[i:i + num_orders]
-            for _, row in chunk.iterrows():
-                order_id = int(row['order_id'])
-                for worker_id in W:
-                    if int(row[str(worker_id)]) == 1:
-                        solution[order_id] = worker_id
-                        break  # Ensure only one worker per order
-            initial_solutions.append(solution)
-        return initial_solutions
-
-    # Define the fitness function
-    def fitness_function(X, service_times, costs, estimated_profits, s_max, q_w):
-        total_profit = 0
-        total_service_time = 0
-        order_count = {worker: 0 for worker in q_w}
-
-        for o, worker in X.items():
-            order_count[worker] += 1
-            if order_count[worker] > q_w[worker]:
-                return -1
-
-            s_ow = service_times[(o, worker)]
-            p_ow = estimated_profits[(o, worker)]
-            total_profit += p_ow
-            total_service_time += s_ow
-
-            if s_ow > s_max:
-                return -1
-
-        s_w = total_service_time / (len(X) * s_max)
-        p_w = total_profit / len(X)
-
-        if s_w > 1 or p_w < 0:
-            return -1
-
-        return p_w - s_w
-
-    # Updated λX calculation to ensure it's at least 1
-    def calculate_lambda_X(X, P, lambda_max):
-        sum_f_X_prime = sum(fitness_function(X_prime, service_times, costs, estimated_profits, s_max, q_w) for X_prime in P)
-        f_X = fitness_function(X, service_times, costs, estimated_profits, s_max, q_w)
-        if sum_f_X_prime == 0:
-            return lambda_max  # Avoid division by zero
-        lambda_X = lambda_max * (sum_f_X_prime - f_X) / sum_f_X_prime
-        return max(1, lambda_X)  # Ensure λX is at least 1
-
-    # Ensure one-to-one assignment during propagation
-    def propagate_solution(X, O, W):
-        X_prime = copy.deepcopy(X)
-        selected_order = random.choice(O)  # Changed variable name to avoid reassignment of O
-        current_worker = X_prime[selected_order]
-        available_workers = [worker for worker in W if worker != current_worker]
-
-        if available_workers:
-            new_worker = random.choice(available_workers)
-            X_prime[selected_order] = new_worker
-
-        return X_prime
-
-    # Define the Water Wave Optimization algorithm
-    def water_wave_optimization(O, W, s_max, q_w, service_times, costs, estimated_profits, P, lambda_max, max_iter=100):
-        print("Starting the Water Wave Optimization...")
-        X_star = max(P, key=lambda X: fitness_function(X, service_times, costs, estimated_profits, s_max, q_w))
-        iter = 0
-        while iter <= max_iter:
-            for X in P:
-                lambda_X = calculate_lambda_X(X, P, lambda_max)
-                W_iter = random.randint(1, int(lambda_X))  # Changed variable name to avoid collision with W
-
-                X_prime = copy.deepcopy(X)
-                for _ in range(W_iter):
-                    X_prime = propagate_solution(X_prime, O, W)
-
-                if fitness_function(X_prime, service_times, costs, estimated_profits, s_max, q_w) > fitness_function(X, service_times, costs, estimated_profits, s_max, q_w):
-                    P.remove(X)
-                    P.append(X_prime)
-
-                    if fitness_function(X_prime, service_times, costs, estimated_profits, s_max, q_w) > fitness_function(X_star, service_times, costs, estimated_profits, s_max, q_w):
-                        X_star = X_prime
-
-                nb = random.randint(1, len(W))
-                for _ in range(nb):
-                    X_n = copy.deepcopy(X_star)
-                    X_n = propagate_solution(X_n, O, W)
-
-                    if fitness_function(X_n, service_times, costs, estimated_profits, s_max, q_w) > fitness_function(X_star, service_times, costs, estimated_profits, s_max, q_w):
-                        X_star = X_n
-
-            iter += 1
-        print("Finished the optimization.")
-        return X_star
-
-    # Initialize population with the corrected method
-    initial_solutions = initialize_population(O, W, initial_solutions_df_cleaned, num_orders)
-
-    # Example usage
-    s_max = 15  # Example value, adjust as necessary
-    q_w = {worker_id: 1 for worker_id in W}  # Worker capacity set to 1 for all workers
-    lambda_max = len(O)  # Maximum allowable wavelength
-
-    # Run the Water Wave Optimization algorithm using the loaded data
-    X_star = water_wave_optimization(O, W, s_max, q_w, service_times, costs, estimated_profits, initial_solutions, lambda_max)
-
-    # Convert the result to a DataFrame with additional metrics
-    output_rows = []
-    for o, w in X_star.items():
-        service_time = service_times[(o, w)]
-        delivery_cost = costs[(o, w)]
-        estimated_profit = estimated_profits[(o, w)]
-
-        output_rows.append({
-            "order_id": o,
-            "worker_id": w,
-            "service_time": service_time,
-            "delivery_cost": delivery_cost,
-            "estimated_profit": estimated_profit
-        })
-
-    # Creating the output DataFrame
-    print(f"Creating output DataFrame for instance {instance_num}...")
-    output_df = pd.DataFrame(output_rows)
-
-    # Define output path for this instance
-    instance_output_dir = os.path.join(output_base_dir, f'instance-{instance_num}')
-    os.makedirs(instance_output_dir, exist_ok=True)  # Ensure the directory exists
-    output_file = os.path.join(instance_output_dir, 'optimal_assignment.csv')
-
-    # Save the result to a CSV file
-    print(f"Saving output to {output_file}...")
-    output_df.to_csv(output_file, index=False)
-
-    print(f"Output saved successfully for instance {instance_num}.")
+import bisect
+import multiprocessing
+import os
+import sys
+import numpy as np
+import pandas as pd
+import random
+import time
+
+# Make the shared modules in common/ importable when running this file as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from common.matrix_store import load_instance_matrices, csv_values, csv_decimals
+from common.candidate_graph import candidate_graph, edge_rows
+from common.solution_io import iter_solutions
+from common.instance_csv import read_orders, read_workers
+from common.instrumentation import phase, count, add_counters
+
+# Define base directories for inputs and outputs
+input_base_dir = 'alg-3/alg3-inputs'
+output_base_dir = 'alg-3/alg3-outputs'
+
+# Define instance numbers
+instance_numbers = ['01', '02', '03']
+
+# Set a random seed for reproducibility
+random_seed = 42
+
+# Island model: number of WWO populations run in parallel processes (1 = the single population WWO)
+# and the number of passes between migrations of the global best solution
+num_islands = 1
+migration_interval = 10
+
+# Random moves only reassign an order to one of its feasible workers (service time <= s_max) instead of any worker
+feasible_moves = True
+
+# The neighbors of X_star tried after every solution step are drawn and scored as one batch before the improving
+# ones are applied (False: drawn and tried one after the other)
+batch_neighbors = True
+
+# Profits and service times are summed as exact integers in units of 10^-5 (the precision of the cost CSVs),
+# so that a move followed by its undo gives back exactly the same fitness
+value_scale = 10 ** csv_decimals
+
+
+# Function to initialize population ensuring one-to-one assignment
+# (reads alg2's compact, binary or one-hot solution files, see common/solution_io.py)
+def initialize_population(O, W, initial_solutions_path, num_orders):
+    known_workers = set(W)
+    initial_solutions = []
+    for order_ids, solutions in iter_solutions(initial_solutions_path, num_orders):
+        for assignment in solutions.tolist():
+            solution = {int(o): w for o, w in zip(order_ids.tolist(), assignment) if w in known_workers}
+            initial_solutions.append(solution)
+    return initial_solutions
+
+
+# Define the fitness function (evaluates a solution from scratch)
+def fitness_function(X, service_times, costs, estimated_profits, s_max, q_w):
+    total_profit = 0
+    total_service_time = 0
+    order_count = {worker: 0 for worker in q_w}
+
+    for o, worker in X.items():
+        order_count[worker] += 1
+        if order_count[worker] > q_w[worker]:
+            return -1
+
+        s_ow = service_times[(o, worker)]
+        p_ow = estimated_profits[(o, worker)]
+        total_profit += p_ow
+        total_service_time += s_ow
+
+        if s_ow > s_max:
+            return -1
+
+    s_w = total_service_time / (len(X) * s_max)
+    p_w = total_profit / len(X)
+
+    if s_w > 1 or p_w < 0:
+        return -1
+
+    return p_w - s_w
+
+
+# Dense (orders x workers) matrix of a dict keyed by (order, worker); pairs missing from the dict get fill
+def pair_matrix(values, O, W, fill=np.nan):
+    matrix = np.full((len(O), len(W)), fill, dtype=float)
+    if not values:
+        return matrix
+
+    pair_orders, pair_workers = zip(*values.keys())
+    rows = pd.Index(O).get_indexer(pair_orders)
+    cols = pd.Index(W).get_indexer(pair_workers)
+    pair_values = np.fromiter(values.values(), dtype=float, count=len(values))
+
+    known = (rows >= 0) & (cols >= 0)
+    matrix[rows[known], cols[known]] = pair_values[known]
+    return matrix
+
+
+# Everything the optimization looks up, built from a candidate graph (common/candidate_graph.py) whose rows and
+# columns are the positions in O and W and whose pairs are those with service time <= s_max: the profit and service
+# time of every candidate pair as integers in units of 10^-5, the sorted pair keys of the candidates
+# (order position * len(W) + worker position) and the worker capacities. Any other pair is above s_max (or has no
+# service time), so a solution using it has fitness -1 whatever its values are. Candidates are only looked up in
+# these arrays (see pair_edge and key_edges), so the model stays a few arrays at any number of pairs.
+# With feasible_moves, random moves only pick among the candidates of the order; with batch_neighbors the
+# neighbors of X_star are scored as one batch (see batch_neighbor_moves). A run stats dict (common/instrumentation.py)
+# set as the model's 'stats' gets the WWO counters of water_wave_steps.
+def graph_model(O, W, s_max, q_w, graph, feasible_moves=False, batch_neighbors=False):
+    keys = edge_rows(graph) * len(W) + graph['indices']  # Ascending, the graph is in row-major order
+    return {
+        'O': O,
+        'W': W,
+        'num_workers': len(W),
+        's_max': s_max,
+        'capacity': np.array([q_w[w] for w in W], dtype=np.int32),
+        'indptr': graph['indptr'],
+        'indices': graph['indices'],
+        'edge_keys': keys.astype(np.int64),
+        'service_units': np.round(graph['service_time'] * value_scale).astype(np.int64),
+        'profit_units': np.round(graph['estimated_profit'] * value_scale).astype(np.int64),
+        'feasible_moves': feasible_moves,
+        'batch_neighbors': batch_neighbors,
+        'stats': None,
+    }
+
+
+# The model of dense (orders x workers) service-time and profit matrices (NaN for pairs without values)
+def build_model(O, W, s_max, q_w, service_time, estimated_profit, feasible_moves=False, batch_neighbors=False):
+    graph = candidate_graph({'service_time': service_time, 'estimated_profit': estimated_profit}, s_max)
+    return graph_model(O, W, s_max, q_w, graph, feasible_moves, batch_neighbors)
+
+
+# Candidate of every pair key (order position * len(W) + worker position), -1 for pairs that are not candidates
+def key_edges(keys, model):
+    edge_keys = model['edge_keys']
+    if len(edge_keys) == 0:
+        return np.full(len(keys), -1, dtype=np.int64)
+    edges = np.minimum(np.searchsorted(edge_keys, keys), len(edge_keys) - 1)
+    return np.where(edge_keys[edges] == keys, edges, -1)
+
+
+# Candidate of the pair (order position o, worker position w), -1 when it is not a candidate: a binary search
+# over the order's candidates, which are in ascending worker position. A memoryview reads the items as plain
+# Python ints, several times faster than indexing the NumPy array item by item.
+def pair_edge(model, o, w):
+    indptr = model['indptr']
+    start = indptr.item(o)
+    end = indptr.item(o + 1)
+    indices = memoryview(model['indices'])
+    edge = bisect.bisect_left(indices, w, start, end)
+    return edge if edge < end and indices[edge] == w else -1
+
+
+# Per-candidate values of the given candidates, 0 for -1
+def _edge_values(values, edges):
+    if len(values) == 0:
+        return np.zeros(len(edges), dtype=values.dtype)
+    return np.where(edges >= 0, values[np.maximum(edges, 0)], 0)
+
+
+# Same value as fitness_function, computed from the cached totals in O(1)
+def _state_fitness(n, profit, service_time, overloaded, over_s_max, s_max):
+    if overloaded or over_s_max:
+        return -1
+
+    s_w = (service_time / value_scale) / (n * s_max)
+    p_w = (profit / value_scale) / n
+
+    if s_w > 1 or p_w < 0:
+        return -1
+
+    return p_w - s_w
+
+
+# A solution is an int32 array of worker positions (one entry per order position) together with the candidate
+# of every order's pair (-1 for pairs above s_max) and its cached totals: summed profit and service time of its
+# candidate pairs, per-worker load, the number of overloaded workers and the number of pairs above s_max
+def new_solution_state(X, model):
+    X = np.asarray(X, dtype=np.int32)
+    keys = np.arange(len(X), dtype=np.int64) * model['num_workers'] + X
+    edges = key_edges(keys, model)
+    load = np.bincount(X, minlength=len(model['W'])).astype(np.int32)
+    state = {
+        'X': X,
+        'edges': edges,
+        'load': load,
+        'profit': int(model['profit_units'][edges[edges >= 0]].sum()),
+        'service_time': int(model['service_units'][edges[edges >= 0]].sum()),
+        'overloaded': int((load > model['capacity']).sum()),
+        'over_s_max': int((edges < 0).sum()),
+    }
+    state['fitness'] = _state_fitness(len(X), state['profit'], state['service_time'],
+                                      state['overloaded'], state['over_s_max'], model['s_max'])
+    return state
+
+
+def copy_state(state):
+    new_state = dict(state)
+    new_state['X'] = state['X'].copy()
+    new_state['edges'] = state['edges'].copy()
+    new_state['load'] = state['load'].copy()
+    return new_state
+
+
+# Reassign the order at position o to the worker at position new_worker in place and update the fitness in O(1).
+# new_edge is the candidate of the new pair when the caller already knows it (looked up with pair_edge otherwise).
+def apply_move(state, o, new_worker, model, new_edge=None):
+    X = state['X']
+    edges = state['edges']
+    load = state['load']
+    capacity = model['capacity']
+    profit_units = model['profit_units']
+    service_units = model['service_units']
+    old_worker = X.item(o)
+    old_edge = edges.item(o)
+    if new_edge is None:
+        new_edge = pair_edge(model, o, new_worker)
+
+    # .item() reads plain Python scalars, which keeps the per-move bookkeeping free of NumPy scalar objects
+    if old_edge < 0:
+        state['over_s_max'] -= 1
+    else:
+        state['profit'] -= profit_units.item(old_edge)
+        state['service_time'] -= service_units.item(old_edge)
+    if new_edge < 0:
+        state['over_s_max'] += 1
+    else:
+        state['profit'] += profit_units.item(new_edge)
+        state['service_time'] += service_units.item(new_edge)
+
+    if load.item(old_worker) == capacity.item(old_worker) + 1:
+        state['overloaded'] -= 1
+    load[old_worker] -= 1
+    load[new_worker] += 1
+    if load.item(new_worker) == capacity.item(new_worker) + 1:
+        state['overloaded'] += 1
+
+    X[o] = new_worker
+    edges[o] = new_edge
+    state['fitness'] = _state_fitness(len(X), state['profit'], state['service_time'],
+                                      state['overloaded'], state['over_s_max'], model['s_max'])
+
+
+# Fitness the solution would have after a move, without keeping the move (apply, read, undo)
+def move_fitness(state, o, new_worker, model, new_edge=None):
+    old_worker = state['X'].item(o)
+    old_edge = state['edges'].item(o)
+    old_fitness = state['fitness']
+    apply_move(state, o, new_worker, model, new_edge)
+    fitness = state['fitness']
+    apply_move(state, o, old_worker, model, old_edge)
+    state['fitness'] = old_fitness
+    return fitness
+
+
+# Per-solution entries of a population, one row per solution
+solution_keys = ['X', 'edges', 'load', 'profit', 'service_time', 'overloaded', 'over_s_max', 'fitness']
+
+
+# The population as one (solutions x orders) int32 array of worker positions, with the cached totals
+# of every solution in parallel arrays and the running fitness sum of the whole population in 'fitness_sum'
+def new_population(solutions, model):
+    states = [new_solution_state(X, model) for X in solutions]
+    num_orders = len(model['O'])
+    population = {
+        'X': np.array([state['X'] for state in states], dtype=np.int32).reshape(len(states), num_orders),
+        'edges': np.array([state['edges'] for state in states], dtype=np.int64).reshape(len(states), num_orders),
+        'load': np.array([state['load'] for state in states], dtype=np.int32).reshape(len(states), len(model['W'])),
+    }
+    for key in ['profit', 'service_time', 'overloaded', 'over_s_max', 'fitness']:
+        population[key] = np.array([state[key] for state in states], dtype=float if key == 'fitness' else np.int64)
+    population['fitness_sum'] = sum(population['fitness'].tolist())
+    return population
+
+
+# Solution i of the population as a separate state
+def population_state(population, i):
+    return {
+        'X': population['X'][i].copy(),
+        'edges': population['edges'][i].copy(),
+        'load': population['load'][i].copy(),
+        'profit': int(population['profit'][i]),
+        'service_time': int(population['service_time'][i]),
+        'overloaded': int(population['overloaded'][i]),
+        'over_s_max': int(population['over_s_max'][i]),
+        'fitness': float(population['fitness'][i]),
+    }
+
+
+# Drop solution i and append state at the end (shifts the solutions after i one slot up, like list.remove + append)
+def replace_solution(population, i, state):
+    population['fitness_sum'] += state['fitness'] - population['fitness'].item(i)
+    for key in solution_keys:
+        values = population[key]
+        values[i:-1] = values[i + 1:]
+        values[-1] = state[key]
+
+
+# Pick a random order position of the solution and a random other worker position for it (None when there is no
+# other worker), plus the candidate of the new pair when it is known (with feasible_moves, else None). Draws the same random numbers as random.choice(O) followed by
+# random.choice([worker for worker in W if worker != current_worker]), or with the model's feasible_moves by
+# random.choice over the order's other candidates.
+def random_move(state, model):
+    X = state['X']
+    num_workers = model['num_workers']
+    selected_order = random.randrange(len(X))
+
+    if model['feasible_moves']:
+        # The order's candidates are ascending worker positions, so skipping the current worker keeps the order
+        first = model['indptr'].item(selected_order)
+        current_edge = state['edges'].item(selected_order)
+        num_candidates = model['indptr'].item(selected_order + 1) - first - (current_edge >= 0)
+        if num_candidates == 0:
+            return selected_order, None, None
+
+        new_edge = first + random.randrange(num_candidates)
+        if current_edge >= 0 and new_edge >= current_edge:
+            new_edge += 1  # Skip the current worker
+        return selected_order, model['indices'].item(new_edge), new_edge
+
+    if num_workers < 2:
+        return selected_order, None, None
+
+    new_worker = random.randrange(num_workers - 1)
+    if new_worker >= X.item(selected_order):
+        new_worker += 1  # Skip the current worker
+    return selected_order, new_worker, None
+
+
+# nb random moves of the solution drawn at once with rng, of the same kind as random_move's: arrays of order
+# positions and new worker positions (orders without another worker to move to are left out)
+def random_moves(state, nb, model, rng):
+    X = state['X']
+    num_workers = model['num_workers']
+    orders = rng.integers(len(X), size=nb)
+    current = X[orders].astype(np.int64)
+
+    if model['feasible_moves']:
+        indptr = model['indptr']
+        current_edges = state['edges'][orders]
+        num_candidates = indptr[orders + 1] - indptr[orders] - (current_edges >= 0)
+        valid = num_candidates > 0
+        orders = orders[valid]
+        current_edges = current_edges[valid]
+        new_edges = indptr[orders] + (rng.random(len(orders)) * num_candidates[valid]).astype(np.int64)
+        new_edges += (current_edges >= 0) & (new_edges >= current_edges)  # Skip the current worker
+        return orders, model['indices'][new_edges].astype(np.int64)
+
+    if num_workers < 2:
+        return orders[:0], current[:0]
+    workers = rng.integers(num_workers - 1, size=nb)
+    workers += workers >= current  # Skip the current worker
+    return orders, workers
+
+
+# Fitness the solution would have after each of the moves on its own (orders[k] to workers[k]), computed for all
+# of them at once from the cached totals; the same values move_fitness gives one by one
+def moves_fitness(state, orders, workers, model):
+    X = state['X']
+    num_workers = model['num_workers']
+    old_workers = X[orders].astype(np.int64)
+    old_edges = state['edges'][orders]
+    new_edges = key_edges(orders * num_workers + workers, model)
+
+    profit = (state['profit'] - _edge_values(model['profit_units'], old_edges)
+              + _edge_values(model['profit_units'], new_edges))
+    service_time = (state['service_time'] - _edge_values(model['service_units'], old_edges)
+                    + _edge_values(model['service_units'], new_edges))
+    over_s_max = state['over_s_max'] - (old_edges < 0) + (new_edges < 0)
+
+    # Moving leaves old_worker (no longer overloaded if it was one over) and joins workers (overloaded if full)
+    load = state['load']
+    capacity = model['capacity']
+    overloaded = (state['overloaded'] - (load[old_workers] == capacity[old_workers] + 1)
+                  + (load[workers] == capacity[workers]))
+
+    n = len(X)
+    s_w = (service_time / value_scale) / (n * model['s_max'])
+    p_w = (profit / value_scale) / n
+    fitness = p_w - s_w
+    fitness[(overloaded > 0) | (over_s_max > 0) | (s_w > 1) | (p_w < 0)] = -1
+    return fitness
+
+
+# Breaking step with the model's batch_neighbors: nb random neighbors of X_star are drawn with rng (the run's
+# neighbor_rng) and scored together. Only the improving ones are looked at again, best first: each is applied in
+# place if it still improves X_star after the moves applied before it.
+def batch_neighbor_moves(X_star, nb, model, rng):
+    orders, workers = random_moves(X_star, nb, model, rng)
+    if len(orders) == 0:
+        return
+
+    fitness = moves_fitness(X_star, orders, workers, model)
+    improving = np.flatnonzero(fitness > X_star['fitness'])
+    for k in improving[np.argsort(-fitness[improving], kind='stable')].tolist():
+        selected_order = orders.item(k)
+        new_worker = workers.item(k)
+        if move_fitness(X_star, selected_order, new_worker, model) > X_star['fitness']:
+            apply_move(X_star, selected_order, new_worker, model)
+
+
+# NumPy generator for the batched breaking steps of one run or island (None without the model's batch_neighbors).
+# It is created once and seeded from the random module, so runs stay reproducible with random.seed.
+def neighbor_rng(model):
+    if not model['batch_neighbors']:
+        return None
+    return np.random.default_rng(random.getrandbits(64))
+
+
+# Ensure one-to-one assignment during propagation
+def propagate_solution(state, model):
+    selected_order, new_worker, new_edge = random_move(state, model)
+    if new_worker is not None:
+        apply_move(state, selected_order, new_worker, model, new_edge)
+
+
+# Updated λX calculation to ensure it's at least 1 (sum_f_P is the fitness sum of the whole population)
+def calculate_lambda_X(f_X, sum_f_P, lambda_max):
+    if sum_f_P == 0:
+        return lambda_max  # Avoid division by zero
+    lambda_X = lambda_max * (sum_f_P - f_X) / sum_f_P
+    return max(1, lambda_X)  # Ensure λX is at least 1
+
+
+# Define the Water Wave Optimization algorithm. P is a list of order -> worker dicts that assign every order
+# in O to a worker in W; the best solution found is returned in the same form.
+def water_wave_optimization(O, W, s_max, q_w, service_times, costs, estimated_profits, P, lambda_max, max_iter=100):
+    print("Starting the Water Wave Optimization...")
+    model = build_model(O, W, s_max, q_w, pair_matrix(service_times, O, W), pair_matrix(estimated_profits, O, W))
+    X_star = water_wave_optimization_arrays(model, solution_positions(P, O, W), lambda_max, max_iter)
+    print("Finished the optimization.")
+    return {o: W[j] for o, j in zip(O, X_star.tolist())}
+
+
+# Order -> worker dicts as rows of worker positions in the order of O
+def solution_positions(P, O, W):
+    worker_positions = {w: j for j, w in enumerate(W)}
+    return np.array([[worker_positions[X[o]] for o in O] for X in P], dtype=np.int32).reshape(len(P), len(O))
+
+
+# The optimization itself on dense worker positions; returns the best solution as an int32 array.
+# time_budget, stagnation_rounds and trace are those of iter_water_wave_optimization.
+def water_wave_optimization_arrays(model, solutions, lambda_max, max_iter=100, time_budget=None, stagnation_rounds=None, trace=None):
+    X_star = None
+    for X_star, _ in iter_water_wave_optimization(model, solutions, lambda_max, max_iter, time_budget, stagnation_rounds, trace):
+        pass
+    return X_star
+
+
+# Anytime WWO: yields (X_star as an int32 array, fitness) for the best initial solution and then for every
+# improvement of X_star as soon as it is found, so a caller can stop at any moment and keep the last one.
+# Stops after max_iter + 1 passes over the population, once time_budget seconds have passed (checked after every
+# solution of a pass), or after stagnation_rounds passes in a row without improving X_star.
+# A list passed as trace gets one entry per finished pass: {'round', 'best_fitness', 'elapsed_s'}.
+def iter_water_wave_optimization(model, solutions, lambda_max, max_iter=100, time_budget=None, stagnation_rounds=None, trace=None):
+    start = time.perf_counter()
+    population = new_population(solutions, model)
+    X_star = population_state(population, int(np.argmax(population['fitness'])))
+    best_fitness = X_star['fitness']
+    yield X_star['X'].copy(), best_fitness
+
+    rng = neighbor_rng(model)
+    last_improved = -1  # Pass of the last improvement (-1: the initial population)
+    for round_num, round_done, X_star in water_wave_steps(population, X_star, model, lambda_max, max_iter + 1, rng):
+        if X_star['fitness'] > best_fitness:
+            best_fitness = X_star['fitness']
+            last_improved = round_num
+            yield X_star['X'].copy(), best_fitness
+
+        elapsed = time.perf_counter() - start
+        if round_done and trace is not None:
+            trace.append({'round': round_num, 'best_fitness': best_fitness, 'elapsed_s': elapsed})
+        if time_budget is not None and elapsed >= time_budget:
+            return
+        if round_done and stagnation_rounds is not None and round_num - last_improved >= stagnation_rounds:
+            return
+
+
+# Run rounds passes of the WWO over the population (updated in place); returns the new X_star state
+def water_wave_rounds(population, X_star, model, lambda_max, rounds, rng=None):
+    for _, _, X_star in water_wave_steps(population, X_star, model, lambda_max, rounds, rng):
+        pass
+    return X_star
+
+
+# The WWO passes as a generator: after every solution of the population (propagated, then X_star's neighbors
+# tried) yields (pass number, whether the pass is finished, X_star state). X_star may be updated in place.
+# rng is the run's neighbor_rng, needed with the model's batch_neighbors.
+# With the model's stats set, every step counts its wave_steps, fitness_evaluations (propagation moves and
+# neighbors scored), accepted_waves (propagated solutions that replaced theirs) and x_star_improvements.
+def water_wave_steps(population, X_star, model, lambda_max, rounds, rng=None):
+    stats = model.get('stats')
+    for round_num in range(rounds):
+        # The running fitness sum is kept up to date by replace_solution in O(1) per accepted wave. Its float
+        # rounding can drift from a fresh sum in the last bits, so it is summed again once per pass (O(|P|)).
+        population['fitness_sum'] = sum(population['fitness'].tolist())
+
+        # Walk the population by position: an improved solution is moved to the end and the next one shifts
+        # into the current slot, exactly like removing from and appending to a list while iterating over it
+        i = 0
+        while i < len(population['X']):
+            f_X = float(population['fitness'][i])
+            lambda_X = calculate_lambda_X(f_X, population['fitness_sum'], lambda_max)
+            W_iter = random.randint(1, int(lambda_X))  # Changed variable name to avoid collision with W
+
+            X_prime = population_state(population, i)
+            for _ in range(W_iter):
+                propagate_solution(X_prime, model)
+
+            f_star = X_star['fitness']
+            accepted = X_prime['fitness'] > f_X
+            if accepted:
+                # Replace the first solution equal to X, like list.remove does
+                removed = int(np.flatnonzero((population['X'] == population['X'][i]).all(axis=1))[0])
+                replace_solution(population, removed, X_prime)
+
+                if X_prime['fitness'] > X_star['fitness']:
+                    X_star = copy_state(X_prime)
+
+            nb = random.randint(1, len(model['W']))
+            if model['batch_neighbors']:
+                batch_neighbor_moves(X_star, nb, model, rng)
+            else:
+                for _ in range(nb):
+                    # Neighbors of X_star are scored in place; only an improving move is kept
+                    selected_order, new_worker, new_edge = random_move(X_star, model)
+                    if new_worker is None:
+                        continue
+                    if move_fitness(X_star, selected_order, new_worker, model, new_edge) > X_star['fitness']:
+                        apply_move(X_star, selected_order, new_worker, model, new_edge)
+
+            if stats is not None:
+                add_counters(stats, {'wave_steps': 1, 'fitness_evaluations': W_iter + nb, 'accepted_waves': int(accepted),
+                                     'x_star_improvements': int(X_star['fitness'] > f_star)})
+            i += 1
+            yield round_num, i == len(population['X']), X_star
+
+
+# One island of the island model: its own population, X_star, random number generator state and neighbor_rng
+def new_island(model, solutions, seed):
+    population = new_population(solutions, model)
+    random.seed(seed)
+    rng = neighbor_rng(model)
+    return {
+        'population': population,
+        'X_star': population_state(population, int(np.argmax(population['fitness']))),
+        'random_state': random.getstate(),
+        'rng': rng,
+    }
+
+
+# Take in a migrant solution: it replaces the island's worst solution and X_star when it is better than them
+def receive_migrant(island, migrant, model):
+    state = new_solution_state(np.array(migrant, dtype=np.int32), model)
+    population = island['population']
+
+    worst = int(np.argmin(population['fitness']))
+    if state['fitness'] > population['fitness'][worst]:
+        population['fitness_sum'] += state['fitness'] - population['fitness'].item(worst)
+        for key in solution_keys:
+            population[key][worst] = state[key]
+
+    if state['fitness'] > island['X_star']['fitness']:
+        island['X_star'] = state
+
+
+# Run an island for rounds passes after taking in the migrant (None in the first epoch).
+# The island's random state is restored and saved around the run, so islands are independent of each other
+# and of the process they run in.
+def run_island_epoch(island, model, lambda_max, rounds, migrant=None):
+    if migrant is not None:
+        receive_migrant(island, migrant, model)
+
+    random.setstate(island['random_state'])
+    island['X_star'] = water_wave_rounds(island['population'], island['X_star'], model, lambda_max, rounds, island['rng'])
+    island['random_state'] = random.getstate()
+    return island['X_star']['X'].copy(), island['X_star']['fitness']
+
+
+# Island process: builds its island, then runs one epoch per ('run', rounds, migrant) message and answers
+# with its best solution and fitness, until it receives None
+def island_worker(connection, model, solutions, seed, lambda_max):
+    island = new_island(model, solutions, seed)
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        _, rounds, migrant = message
+        connection.send(run_island_epoch(island, model, lambda_max, rounds, migrant))
+    connection.close()
+
+
+# Island-model WWO: the initial solutions are dealt round-robin to num_islands populations, each with its own seed
+# (seed + island number unless seeds is given). Every migration_interval passes the best solution over all islands
+# is sent to every island. Islands run in separate processes when parallel is True, otherwise one after the other
+# in this process (same results). Returns the global best solution as an int32 array.
+# time_budget, stagnation_rounds and trace work as in iter_water_wave_optimization, but are only checked and
+# recorded at the migrations.
+def island_water_wave_optimization(model, solutions, lambda_max, max_iter=100, num_islands=4, migration_interval=10, seed=random_seed, seeds=None, parallel=True, time_budget=None, stagnation_rounds=None, trace=None):
+    start = time.perf_counter()
+    solutions = np.asarray(solutions, dtype=np.int32)
+    num_islands = max(1, min(num_islands, len(solutions)))  # Every island needs at least one solution
+    if seeds is None:
+        seeds = [seed + k for k in range(num_islands)]
+    island_solutions = [solutions[k::num_islands] for k in range(num_islands)]
+
+    if parallel:
+        connections = []
+        processes = []
+        for k in range(num_islands):
+            parent_connection, child_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=island_worker,
+                                              args=(child_connection, model, island_solutions[k], seeds[k], lambda_max))
+            process.start()
+            connections.append(parent_connection)
+            processes.append(process)
+    else:
+        islands = [new_island(model, island_solutions[k], seeds[k]) for k in range(num_islands)]
+
+    total_rounds = max_iter + 1
+    rounds_done = 0
+    migrant = None
+    best_fitness = None
+    last_improved = 0  # Passes done at the last improvement of the global best
+    try:
+        while rounds_done < total_rounds:
+            rounds = min(migration_interval, total_rounds - rounds_done)
+            if parallel:
+                for connection in connections:
+                    connection.send(('run', rounds, migrant))
+                results = [connection.recv() for connection in connections]
+            else:
+                results = [run_island_epoch(island, model, lambda_max, rounds, migrant) for island in islands]
+            rounds_done += rounds
+
+            # The global best (the first island's on ties) migrates to all islands
+            best = max(range(num_islands), key=lambda k: results[k][1])
+            migrant = results[best][0]
+
+            if best_fitness is None or results[best][1] > best_fitness:
+                best_fitness = results[best][1]
+                last_improved = rounds_done
+            elapsed = time.perf_counter() - start
+            if trace is not None:
+                trace.append({'round': rounds_done - 1, 'best_fitness': best_fitness, 'elapsed_s': elapsed})
+            if time_budget is not None and elapsed >= time_budget:
+                break
+            if stagnation_rounds is not None and rounds_done - last_improved >= stagnation_rounds:
+                break
+    finally:
+        if parallel:
+            for connection in connections:
+                try:
+                    connection.send(None)
+                except (BrokenPipeError, OSError):
+                    pass  # The island process is already gone
+            for process in processes:
+                process.join()
+
+    return migrant
+
+
+# Run the WWO on one instance directory (orders, workers, cost CSVs or matrix store and the initial solutions)
+# and save the best assignment to output_dir (defaults to output_base_dir/instance-XX).
+# With time_budget (seconds) and/or stagnation_rounds the WWO may stop before max_iter; trace collects its
+# per-pass best fitness and elapsed time (see iter_water_wave_optimization). A run stats dict
+# (common/instrumentation.py) passed as stats gets the load / build / solve / write times and the WWO counters of
+# water_wave_steps (islands running in their own processes keep theirs).
+# Returns the assignment DataFrame and its fitness.
+def algorithm_3(instance_input_dir, instance_num, output_dir=None, s_max=15, seed=random_seed, max_iter=100, initial_solutions_path=None, num_islands=num_islands, migration_interval=migration_interval, feasible_moves=feasible_moves, batch_neighbors=batch_neighbors, time_budget=None, stagnation_rounds=None, trace=None, stats=None):
+    # Define paths relative to the instance's input directory
+    if initial_solutions_path is None:
+        initial_solutions_path = os.path.join(instance_input_dir, f'all_feasible_solutions_{instance_num}.csv')
+    orders_path = os.path.join(instance_input_dir, f'orders-{instance_num}.csv')
+    workers_path = os.path.join(instance_input_dir, f'workers-{instance_num}.csv')
+
+    # Load the CSV files for this instance
+    print("Loading CSV files...")
+    with phase(stats, 'load'):
+        orders_df = read_orders(orders_path)
+        workers_df = read_workers(workers_path)
+        print("CSV files loaded successfully.")
+
+        # Delivery costs, estimated profits and service times come from the instance's matrix store
+        # (converted from the cost CSVs on first use)
+        matrices = load_instance_matrices(instance_input_dir, instance_num)
+
+    # Create the list of worker IDs and order IDs
+    O = orders_df['order_id'].tolist()  # Order IDs
+    W = workers_df['worker_id'].tolist()  # Worker IDs
+
+    # Candidate graph of the pairs within s_max, with rows and columns in the order of O and W
+    order_rows = pd.Index(matrices['order_ids']).get_indexer(O)
+    worker_cols = pd.Index(matrices['worker_ids']).get_indexer(W)
+    if (order_rows < 0).any() or (worker_cols < 0).any():
+        raise KeyError(f"Orders or workers without costs in {instance_input_dir}")
+    with phase(stats, 'build'):
+        graph = candidate_graph(matrices, s_max, order_rows, worker_cols)
+
+    # Number of orders
+    num_orders = len(orders_df)
+
+    # Initialize population with the corrected method
+    with phase(stats, 'load'):
+        initial_solutions = initialize_population(O, W, initial_solutions_path, num_orders)
+
+    q_w = {worker_id: 1 for worker_id in W}  # Worker capacity set to 1 for all workers
+    lambda_max = len(O)  # Maximum allowable wavelength
+
+    # Run the Water Wave Optimization algorithm on worker positions
+    with phase(stats, 'build'):
+        model = graph_model(O, W, s_max, q_w, graph, feasible_moves, batch_neighbors)
+        solutions = solution_positions(initial_solutions, O, W)
+    model['stats'] = stats
+    count(stats, 'candidate_pairs', len(graph['indices']))
+    count(stats, 'initial_solutions', len(solutions))
+    print("Starting the Water Wave Optimization...")
+    with phase(stats, 'solve'):
+        if num_islands > 1:
+            X_star = island_water_wave_optimization(model, solutions, lambda_max, max_iter, num_islands, migration_interval, seed,
+                                                    time_budget=time_budget, stagnation_rounds=stagnation_rounds, trace=trace)
+        else:
+            random.seed(seed)
+            X_star = water_wave_optimization_arrays(model, solutions, lambda_max, max_iter, time_budget, stagnation_rounds, trace)
+    print("Finished the optimization.")
+    fitness = new_solution_state(X_star, model)['fitness']
+    print(f"Best fitness: {fitness}")
+
+    # Convert the result to a DataFrame with additional metrics
+    print(f"Creating output DataFrame for instance {instance_num}...")
+    # Values of the chosen pairs are direct reads from the store (they need not be candidates)
+    chosen_cols = worker_cols[X_star]
+    output_df = pd.DataFrame({
+        "order_id": O,
+        "worker_id": np.array(W)[X_star],
+        "service_time": csv_values(matrices['service_time'][order_rows, chosen_cols]),
+        "delivery_cost": csv_values(matrices['delivery_cost'][order_rows, chosen_cols]),
+        "estimated_profit": csv_values(matrices['estimated_profit'][order_rows, chosen_cols])
+    })
+
+    # Define output path for this instance
+    if output_dir is None:
+        output_dir = os.path.join(output_base_dir, f'instance-{instance_num}')
+    os.makedirs(output_dir, exist_ok=True)  # Ensure the directory exists
+    output_file = os.path.join(output_dir, 'optimal_assignment.csv')
+
+    # Save the result to a CSV file
+    print(f"Saving output to {output_file}...")
+    with phase(stats, 'write'):
+        output_df.to_csv(output_file, index=False)
+
+    print(f"Output saved successfully for instance {instance_num}.")
+    return output_df, fitness
+
+
+if __name__ == '__main__':
+    s_max = 15  # Example value, adjust as necessary
+
+    # Loop over all instances
+    for instance_num in instance_numbers:
+        print(f"Processing instance {instance_num}...")
+        instance_input_dir = os.path.join(input_base_dir, f'instance-{instance_num}')
+        algorithm_3(instance_input_dir, instance_num, s_max=s_max, seed=random_seed)
@@ -1,73 +1,322 @@
 import pandas as pd
+import numpy as np
+import itertools
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Make the shared modules in common/ importable when running this file as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from common.matrix_store import load_matrices_for_csv
+from common.candidate_graph import candidate_graph, sorted_by_service_time
+from common.solution_io import write_solutions, solution_file_name
+from common.instance_csv import read_orders, read_workers
+from common.instrumentation import new_run_stats, phase, add_counters
 
 
 def calculate_utility(p_ow, s_ow):
     return p_ow - s_ow
 
 
-def is_valid_assignment(X, o, w, service_times, s_max):
-    if any(X[o2][w] == 1 for o2 in X):
-        return False
-    service_time = service_times.at[(o, w), 'service_time']
-    if service_time > s_max:
-        return False
+# Per-order candidate workers (column indices) of a candidate graph (common/candidate_graph.py), and the same sets
+# as bitmasks. With sort_by_service_time the candidates of each order are tried fastest first, otherwise in worker
+# file order.
+def graph_candidates(graph, sort_by_service_time=True):
+    if sort_by_service_time:
+        graph = sorted_by_service_time(graph)
+    indptr = graph['indptr'].tolist()
+    indices = graph['indices'].tolist()
+
+    candidates = []
+    feasible_masks = []
+    for row in range(len(indptr) - 1):
+        cols = indices[indptr[row]:indptr[row + 1]]
+        candidates.append(cols)
+        mask = 0
+        for w in cols:
+            mask |= 1 << w
+        feasible_masks.append(mask)
+    return candidates, feasible_masks
+
+
+# Candidates and bitmasks of a dense (orders x workers) service-time matrix, keeping the pairs with service
+# time <= s_max (NaN, a missing pair, is never feasible)
+def build_candidates(service_time, s_max, sort_by_service_time=True):
+    return graph_candidates(candidate_graph({'service_time': service_time}, s_max), sort_by_service_time)
+
+
+# Whether every order can get its own feasible worker at the same time (a matching that covers all orders),
+# checked with augmenting paths (Kuhn's algorithm, with an explicit stack instead of recursion)
+def has_complete_matching(candidates):
+    worker_order = {}  # Worker column -> order row it is matched to
+    order_worker = {}  # Order row -> worker column it is matched to
+
+    for root in range(len(candidates)):
+        # Depth-first search for an augmenting path from the unmatched order root to a free worker
+        visited = set()
+        reached_from = {}  # Worker column -> order row the search reached it from
+        stack = [(root, iter(candidates[root]))]
+        free_worker = None
+        while stack:
+            order, workers = stack[-1]
+            for w in workers:
+                if w not in visited:
+                    break
+            else:
+                stack.pop()  # No unvisited worker left for this order
+                continue
+
+            visited.add(w)
+            reached_from[w] = order
+            if w not in worker_order:
+                free_worker = w
+                break
+            stack.append((worker_order[w], iter(candidates[worker_order[w]])))
+
+        if free_worker is None:
+            return False
+
+        # Flip the path: each worker on it is matched to the order it was reached from
+        w = free_worker
+        while w is not None:
+            order = reached_from[w]
+            previous = order_worker.get(order)
+            worker_order[w] = order
+            order_worker[order] = w
+            w = previous
+
     return True
 
 
-def backtrack_with_early_stop(X, orders, workers, service_times, estimated_profits, s_max, solutions, order_index=0, max_solutions=10):
-    if len(solutions) >= max_solutions:
+# Depth-first enumeration of one-to-one assignments (one worker per order, each worker used at most once).
+# Used workers are tracked as an integer bitmask, and a branch is cut as soon as some remaining order has no free
+# feasible worker left (forward checking). Yields each solution as an int32 array of worker columns, one per order.
+# With a prefix (worker columns of the first len(prefix) orders, see split_prefixes) only that subtree is searched.
+# A run stats dict (common/instrumentation.py) passed as stats gets the search_nodes, pruned_branches and
+# solutions_found counters once the search ends.
+def iter_feasible_solutions(candidates, feasible_masks, max_solutions=10, prefix=(), stats=None):
+    num_orders = len(candidates)
+    fixed = len(prefix)
+    if max_solutions <= 0:
+        return
+    if num_orders == 0:
+        yield np.zeros(0, dtype=np.int32)
+        return
+    # An order without any feasible worker makes the whole instance infeasible, and so does any set of orders
+    # with fewer feasible workers between them than orders (the search would otherwise backtrack exponentially)
+    if any(mask == 0 for mask in feasible_masks):
         return
-    if order_index == len(orders):
-        solution = [[X[o][w] for w in workers] for o in orders]
-        solutions.append(solution)
+    used = 0
+    for w in prefix:
+        used |= 1 << w
+    if not has_complete_matching([[w for w in candidates[k] if not used >> w & 1] for k in range(fixed, num_orders)]):
         return
-    o = orders[order_index]
-    for w in workers:
-        if is_valid_assignment(X, o, w, service_times, s_max):
-            X[o][w] = 1
-            backtrack_with_early_stop(X, orders, workers, service_times, estimated_profits, s_max, solutions, order_index + 1, max_solutions)
-            X[o][w] = 0
+    if fixed == num_orders:
+        yield np.array(prefix, dtype=np.int32)
+        return
+
+    chosen = list(prefix) + [-1] * (num_orders - fixed)
+    next_candidate = [0] * num_orders
+    depth = fixed
+    found = 0
+    nodes = 0  # Branches entered (the forward check passed)
+    pruned = 0  # Branches cut by the forward check
+
+    try:
+        while True:
+            if depth == num_orders:
+                yield np.array(chosen, dtype=np.int32)
+                found += 1
+                if found >= max_solutions:
+                    return
+                # Step back and continue with the next candidate of the last order
+                depth -= 1
+                used ^= 1 << chosen[depth]
+
+            order_candidates = candidates[depth]
+            position = next_candidate[depth]
+            advanced = False
+
+            while position < len(order_candidates):
+                w = order_candidates[position]
+                position += 1
+                bit = 1 << w
+                if used & bit:
+                    continue
+
+                new_used = used | bit
+                # Forward check: every later order still needs a free feasible worker
+                if any((feasible_masks[k] & ~new_used) == 0 for k in range(depth + 1, num_orders)):
+                    pruned += 1
+                    continue
+
+                nodes += 1
+                next_candidate[depth] = position
+                chosen[depth] = w
+                used = new_used
+                depth += 1
+                if depth < num_orders:
+                    next_candidate[depth] = 0
+                advanced = True
+                break
 
+            if not advanced:
+                # All candidates of this order are exhausted: backtrack (never into the fixed prefix)
+                depth -= 1
+                if depth < fixed:
+                    return
+                used ^= 1 << chosen[depth]
+    finally:
+        add_counters(stats, {'search_nodes': nodes, 'pruned_branches': pruned, 'solutions_found': found})
 
-def generate_all_feasible_solutions(orders, workers, service_times, estimated_profits, s_max, max_solutions=10):
-    X = {o: {w: 0 for w in workers} for o in orders}
-    solutions = []
-    backtrack_with_early_stop(X, orders, workers, service_times, estimated_profits, s_max, solutions, max_solutions=max_solutions)
-    return solutions
 
+# Worker columns of the first split_depth orders of every branch that passes the forward check, in search order.
+# Each prefix is the root of an independent subtree of iter_feasible_solutions.
+def split_prefixes(candidates, feasible_masks, split_depth=1):
+    num_orders = len(candidates)
+    prefixes = [((), 0)]  # (prefix, used workers bitmask)
+    for depth in range(min(split_depth, num_orders)):
+        extended = []
+        for prefix, used in prefixes:
+            for w in candidates[depth]:
+                bit = 1 << w
+                if used & bit:
+                    continue
+                new_used = used | bit
+                if any((feasible_masks[k] & ~new_used) == 0 for k in range(depth + 1, num_orders)):
+                    continue
+                extended.append((prefix + (w,), new_used))
+        prefixes = extended
+    return [prefix for prefix, _ in prefixes]
+
+
+# Candidates of the instance being searched, set once per pool process instead of being sent with every subtree
+_subtree_candidates = None
+_subtree_masks = None
+
+
+def _init_subtree_search(candidates, feasible_masks):
+    global _subtree_candidates, _subtree_masks
+    _subtree_candidates = candidates
+    _subtree_masks = feasible_masks
+
+
+# Solutions skip to skip + quota of the subtree under prefix, as a list of int32 arrays, and the search counters
+def _subtree_solutions(prefix, skip, quota):
+    stats = new_run_stats()
+    solutions = list(itertools.islice(iter_feasible_solutions(_subtree_candidates, _subtree_masks, skip + quota, prefix, stats), skip, None))
+    return solutions, stats['counters']
+
+
+# Parallel version of iter_feasible_solutions: the search is split at the first split_depth orders into independent
+# subtrees (one per feasible prefix), which a pool of processes searches with a quota of solutions each. Their
+# streams are merged round robin, so the solutions cover the different workers of the first orders instead of all
+# sharing the first feasible prefix. Subtrees that run dry leave their share to the others: the subtrees that filled
+# their quota are searched again for the missing solutions (skipping the ones already yielded). processes=1 runs
+# the subtrees in this process; split_depth=0 is the sequential search. stats gets the summed search counters of
+# all subtrees (including the solutions searched again).
+def iter_parallel_feasible_solutions(candidates, feasible_masks, max_solutions=10, split_depth=1, processes=None, stats=None):
+    if split_depth <= 0 or len(candidates) == 0 or any(mask == 0 for mask in feasible_masks):
+        yield from iter_feasible_solutions(candidates, feasible_masks, max_solutions, stats=stats)
+        return
+
+    prefixes = split_prefixes(candidates, feasible_masks, split_depth)
+    remaining = max_solutions
+    searched = [0] * len(prefixes)  # Solutions already taken from each subtree
+    open_subtrees = list(range(len(prefixes)))
+
+    executor = None
+    if processes != 1:
+        executor = ProcessPoolExecutor(max_workers=processes, initializer=_init_subtree_search,
+                                       initargs=(candidates, feasible_masks))
+        map_subtrees = executor.map
+    else:
+        _init_subtree_search(candidates, feasible_masks)
+        map_subtrees = map
 
-def algorithm_2(orders_file, workers_file, service_times_file, estimated_profits_file, s_max, output_file, max_solutions=10):
     try:
-        orders_df = pd.read_csv(orders_file)
-        workers_df = pd.read_csv(workers_file)
-        service_times = pd.read_csv(service_times_file, index_col=[0, 1])
-        estimated_profits = pd.read_csv(estimated_profits_file, index_col=[0, 1])
+        while remaining > 0 and open_subtrees:
+            quota = -(-remaining // len(open_subtrees))
+            results = list(map_subtrees(_subtree_solutions, [prefixes[i] for i in open_subtrees],
+                                        [searched[i] for i in open_subtrees], [quota] * len(open_subtrees)))
+            streams = [solutions for solutions, _ in results]
+            for _, counters in results:
+                add_counters(stats, counters)
+            add_counters(stats, {'subtrees': len(results)})
 
-        orders = orders_df['order_id'].tolist()
-        workers = workers_df['worker_id'].tolist()
+            for solution in itertools.islice(_round_robin(streams), remaining):
+                yield solution
+                remaining -= 1
+            for i, stream in zip(open_subtrees, streams):
+                searched[i] += len(stream)
+            # Only subtrees that filled their quota can have more solutions
+            open_subtrees = [i for i, stream in zip(open_subtrees, streams) if len(stream) == quota]
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
 
-        all_solutions = generate_all_feasible_solutions(orders, workers, service_times, estimated_profits, s_max, max_solutions)
 
-        if not all_solutions:
-            print("No feasible solutions found.")
-            return
+# Items of the given lists in turn: the first of each list, then the second of each, ...
+def _round_robin(streams):
+    for position in range(max((len(stream) for stream in streams), default=0)):
+        for stream in streams:
+            if position < len(stream):
+                yield stream[position]
+
+
+# Up to max_solutions feasible assignments over a dense (orders x workers) service-time matrix,
+# returned as a (solutions x orders) int32 array of worker columns (split_depth > 0: parallel subtree search)
+def generate_all_feasible_solutions(service_time, s_max, max_solutions=10, sort_by_service_time=True, split_depth=0, processes=None):
+    candidates, feasible_masks = build_candidates(service_time, s_max, sort_by_service_time)
+    solutions = list(iter_parallel_feasible_solutions(candidates, feasible_masks, max_solutions, split_depth, processes))
+    if not solutions:
+        return np.zeros((0, len(candidates)), dtype=np.int32)
+    return np.stack(solutions)
+
+
+# Enumerate up to max_solutions feasible assignments and stream them to output_file in one of the formats of
+# common/solution_io.py: 'compact' (solution_id,order_id,worker_id), 'binary' (int32) or the original 'onehot' CSV.
+# With split_depth > 0 the search is split at the first split_depth orders and run on processes worker processes.
+# A run stats dict (common/instrumentation.py) passed as stats gets the load / build / solve times (solve includes
+# streaming the solutions to the file) and the search counters of iter_parallel_feasible_solutions.
+# Returns the number of solutions written (None if the instance could not be processed).
+def algorithm_2(orders_file, workers_file, service_times_file, estimated_profits_file, s_max, output_file, max_solutions=10, sort_by_service_time=True, output_format='compact', split_depth=0, processes=None, stats=None):
+    try:
+        with phase(stats, 'load'):
+            orders_df = read_orders(orders_file)
+            workers_df = read_workers(workers_file)
 
-        columns = ['order_id'] + workers
-        final_df = pd.DataFrame(columns=columns)
+            orders = orders_df['order_id'].tolist()
+            workers = workers_df['worker_id'].tolist()
 
-        for solution in all_solutions:
-            temp_df = pd.DataFrame(solution, columns=workers)
-            temp_df.insert(0, 'order_id', orders)
-            final_df = pd.concat([final_df, temp_df], axis=0)
+            # Feasible pairs come from the instance's matrix store (converted from the cost CSVs next to
+            # service_times_file on first use), restricted to these orders and workers in file order
+            matrices = load_matrices_for_csv(service_times_file)
+        order_rows = pd.Index(matrices['order_ids']).get_indexer(orders)
+        worker_cols = pd.Index(matrices['worker_ids']).get_indexer(workers)
+        if (order_rows < 0).any() or (worker_cols < 0).any():
+            raise KeyError(f"Orders or workers without service times in {service_times_file}")
+        with phase(stats, 'build'):
+            graph = candidate_graph({'service_time': matrices['service_time']}, s_max, order_rows, worker_cols)
+            candidates, feasible_masks = graph_candidates(graph, sort_by_service_time)
 
-        final_df.to_csv(output_file, index=False)
-        print(f"Solutions saved to {output_file}")
+        # Stream each solution to the output file as soon as it is found
+        with phase(stats, 'solve'):
+            solutions = iter_parallel_feasible_solutions(candidates, feasible_masks, max_solutions, split_depth, processes, stats)
+            count = write_solutions(output_file, output_format, orders, workers, solutions)
+
+        if count == 0:
+            print("No feasible solutions found.")
+            return count
+
+        print(f"{count} solutions saved to {output_file}")
+        return count
     except Exception as e:
         print(f"An error occurred: {e}")
 
 
-def process_all_instances(base_input_dir, base_output_dir, s_max, max_solutions):
+def process_all_instances(base_input_dir, base_output_dir, s_max, max_solutions, sort_by_service_time=True, output_format='compact', split_depth=0, processes=None):
     instances = ['instance-01', 'instance-02', 'instance-03']
 
     for instance in instances:
@@ -87,21 +336,33 @@ def process_all_instances(base_input_dir, base_output_dir, s_max, max_solutions)
         estimated_profits_file = os.path.join(input_folder, f'estimated-profits-{instance_number}.csv')
 
         # Output file for this instance
-        output_file = os.path.join(output_folder, f'feasible_solutions-{instance_number}.csv')
+        output_file = os.path.join(output_folder, solution_file_name(f'feasible_solutions-{instance_number}', output_format))
 
         # Process the instance
         print(f"Processing {instance}...")
-        algorithm_2(orders_file, workers_file, service_times_file, estimated_profits_file, s_max, output_file, max_solutions)
+        algorithm_2(orders_file, workers_file, service_times_file, estimated_profits_file, s_max, output_file, max_solutions, sort_by_service_time, output_format, split_depth, processes)
+
+
+if __name__ == '__main__':
+    # Set base directory paths
+    base_input_dir = os.path.join(os.path.dirname(__file__), 'alg2-inputs')
+    base_output_dir = os.path.join(os.path.dirname(__file__), 'alg2-outputs')
 
+    # Set the maximum service time and number of solutions
+    s_max = 100
+    max_solutions = 20
 
-# Set base directory paths
-base_input_dir = os.path.join(os.path.dirname(__file__), 'alg2-inputs')
-base_output_dir = os.path.join(os.path.dirname(__file__), 'alg2-outputs')
+    # Try each order's workers fastest first (False = worker file order, the original enumeration order)
+    sort_by_service_time = True
 
-# Set the maximum service time and number of solutions
-s_max = 100
-max_solutions = 20
+    # Output format: 'compact' (solution_id,order_id,worker_id), 'binary' (int32 array file) or 'onehot' (original layout)
+    output_format = 'compact'
 
-# Process all instances
-process_all_instances(base_input_dir, base_output_dir, s_max, max_solutions)
+    # Split the search into one subtree per feasible worker choice of the first split_depth orders, searched in
+    # parallel on processes worker processes (0 = one sequential search, whose solutions all share the first
+    # feasible choices of the first orders; None = one process per CPU)
+    split_depth = 0
+    processes = None
 
+    # Process all instances
+    process_all_instances(base_input_dir, base_output_dir, s_max, max_solutions, sort_by_service_time, output_format, split_depth, processes)
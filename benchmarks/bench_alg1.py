@@ -0,0 +1,140 @@
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+# Make alg-1/Alg1.py importable (the folder name is not a valid package name)
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, repo_dir)
+sys.path.insert(0, os.path.join(repo_dir, 'alg-1'))
+
+from common.distance_cache import open_distance_cache, save_distance_cache
+from Alg1 import algorithm_1, cost_matrices, matrices_to_frames, instance_coordinates, pair_matrices
+
+# Synthetic sizes (orders x workers) on top of the bundled 20/40/60 instances
+synthetic_sizes = [(100, 100), (500, 500), (1000, 1000), (2000, 2000), (5000, 5000)]
+
+# Sizes above this only time the matrix build, building the long-format frames would dominate memory
+max_frame_pairs = 4_000_000
+
+# Snapshots where pickups, deliveries and worker positions repeat over a fixed set of spots:
+# (orders, workers, restaurants, spots)
+hotspot_sizes = [(1000, 1000, 50, 500), (5000, 5000, 200, 2000)]
+
+
+# Build random orders/workers/locations in a lon/lat box, by default around the sample data (already scaled)
+def synthetic_instance(num_orders, num_workers, seed=0, x_range=(174.70, 174.80), y_range=(-36.90, -36.84)):
+    rng = np.random.default_rng(seed)
+
+    def points(prefix, count):
+        return pd.DataFrame({
+            'location_id': [f'{prefix}{i}' for i in range(count)],
+            'x': rng.uniform(*x_range, count),
+            'y': rng.uniform(*y_range, count),
+        })
+
+    pickups = points('R', num_orders)
+    deliveries = points('HOME', num_orders)
+    worker_locations = points('W', num_workers)
+    locations = pd.concat([pickups, deliveries, worker_locations], ignore_index=True)
+
+    orders = pd.DataFrame({
+        'order_id': np.arange(num_orders),
+        'pickup_location': pickups['location_id'],
+        'delivery_location': deliveries['location_id'],
+        'waiting_time': rng.uniform(0, 15, num_orders),
+    })
+    workers = pd.DataFrame({
+        'worker_id': np.arange(num_workers),
+        'current_location': worker_locations['location_id'],
+    })
+    return orders, workers, locations
+
+
+# Orders picked up at one of num_restaurants spots and delivered to any of num_spots, workers standing on a spot
+def hotspot_instance(num_orders, num_workers, num_restaurants, num_spots, seed=0):
+    rng = np.random.default_rng(seed)
+    locations = pd.DataFrame({
+        'location_id': [f'S{i}' for i in range(num_spots)],
+        'x': rng.uniform(174.70, 174.80, num_spots),
+        'y': rng.uniform(-36.90, -36.84, num_spots),
+    })
+    orders = pd.DataFrame({
+        'order_id': np.arange(num_orders),
+        'pickup_location': rng.choice(locations['location_id'].values[:num_restaurants], num_orders),
+        'delivery_location': rng.choice(locations['location_id'].values, num_orders),
+        'waiting_time': rng.uniform(0, 15, num_orders),
+    })
+    workers = pd.DataFrame({
+        'worker_id': np.arange(num_workers),
+        'current_location': rng.choice(locations['location_id'].values, num_workers),
+    })
+    return orders, workers, locations
+
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    rows = []
+
+    # Bundled instances, timed end to end (CSV load + matrices + long-format frames)
+    for instance_num in ['01', '02', '03']:
+        folder = os.path.join(repo_dir, 'alg-1', 'alg1-inputs', f'instance-{instance_num}')
+        (service_times_df, _, _), elapsed = time_call(algorithm_1, folder, instance_num)
+        num_orders = service_times_df['order_id'].nunique()
+        num_workers = service_times_df['worker_id'].nunique()
+        rows.append({'instance': instance_num, 'orders': num_orders, 'workers': num_workers,
+                     'matrices_s': None, 'frames_s': None, 'total_s': elapsed})
+
+    # Synthetic instances, matrix build and frame emission timed separately
+    for num_orders, num_workers in synthetic_sizes:
+        orders, workers, locations = synthetic_instance(num_orders, num_workers)
+        matrices, matrices_time = time_call(cost_matrices, orders, workers, locations, 2, 15, 7)
+
+        frames_time = None
+        if num_orders * num_workers <= max_frame_pairs:
+            _, frames_time = time_call(matrices_to_frames, orders['order_id'].values, workers['worker_id'].values, matrices)
+
+        rows.append({'instance': 'synthetic', 'orders': num_orders, 'workers': num_workers,
+                     'matrices_s': matrices_time, 'frames_s': frames_time,
+                     'total_s': matrices_time + (frames_time or 0)})
+        del matrices
+
+    results_df = pd.DataFrame(rows)
+    results_df['pairs_per_s'] = results_df['orders'] * results_df['workers'] / results_df['total_s']
+    print(results_df.to_string(index=False, float_format=lambda v: f'{v:.4g}'))
+
+    # Repeating locations: one haversine per pair (no location IDs), once per distinct location pair,
+    # and through a distance cache file that a first snapshot filled and a second one reuses
+    rows = []
+    for num_orders, num_workers, num_restaurants, num_spots in hotspot_sizes:
+        orders, workers, locations = hotspot_instance(num_orders, num_workers, num_restaurants, num_spots)
+        coords = instance_coordinates(orders, workers, locations)
+        per_pair_coords = {name: values for name, values in coords.items() if not name.endswith('_location')}
+        per_pair, per_pair_time = time_call(pair_matrices, per_pair_coords, 2, 15, 7)
+        distinct, distinct_time = time_call(cost_matrices, orders, workers, locations, 2, 15, 7)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_file = os.path.join(tmp_dir, 'distance-cache.npz')
+            cache = open_distance_cache(cache_file)
+            _, cold_time = time_call(cost_matrices, orders, workers, locations, 2, 15, 7, cache)
+            save_distance_cache(cache)
+
+            # Next snapshot: new orders and worker positions over the same spots, cache read back from disk
+            orders, workers, locations = hotspot_instance(num_orders, num_workers, num_restaurants, num_spots, seed=1)
+            locations = hotspot_instance(num_orders, num_workers, num_restaurants, num_spots)[2]
+            cache = open_distance_cache(cache_file)
+            _, warm_time = time_call(cost_matrices, orders, workers, locations, 2, 15, 7, cache)
+
+        rows.append({'orders': num_orders, 'workers': num_workers, 'spots': num_spots,
+                     'same_result': all(np.array_equal(per_pair[name], distinct[name]) for name in per_pair),
+                     'per_pair_s': per_pair_time, 'distinct_pairs_s': distinct_time, 'cold_cache_s': cold_time,
+                     'warm_cache_s': warm_time, 'warm_hit_rate': cache['hits'] / (cache['hits'] + cache['misses'])})
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+import pandas as pd
+
+# Make alg-1/Alg1.py importable (the folder name is not a valid package name)
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(repo_dir, 'alg-1'))
+sys.path.insert(0, os.path.join(repo_dir, 'benchmarks'))
+
+from Alg1 import instance_coordinates, pair_matrices, candidate_pairs
+from bench_alg1 import synthetic_instance
+
+mu, m_ow, speed = 2, 15, 7
+
+# Metro-sized box (about 50 x 45 km) and sizes (orders, workers)
+metro_x = (174.50, 175.10)
+metro_y = (-37.10, -36.70)
+sizes = [(2000, 2000), (5000, 5000), (20000, 20000), (50000, 20000)]
+
+# Candidate settings: service time cut, k nearest workers, and both
+candidate_settings = [(30, None), (None, 20), (30, 20)]
+
+# The dense product is only timed up to this many pairs
+max_dense_pairs = 25_000_000
+
+
+if __name__ == '__main__':
+    rows = []
+    for num_orders, num_workers in sizes:
+        orders, workers, locations = synthetic_instance(num_orders, num_workers, x_range=metro_x, y_range=metro_y)
+        coords = instance_coordinates(orders, workers, locations)
+
+        dense_time = None
+        if num_orders * num_workers <= max_dense_pairs:
+            start = time.perf_counter()
+            pair_matrices(coords, mu, m_ow, speed)
+            dense_time = time.perf_counter() - start
+
+        for s_max, k in candidate_settings:
+            start = time.perf_counter()
+            candidates = candidate_pairs(coords, mu, m_ow, speed, s_max, k)
+            sparse_time = time.perf_counter() - start
+            pairs = len(candidates['cols'])
+            rows.append({'orders': num_orders, 'workers': num_workers, 's_max': s_max, 'k': k,
+                         'pairs': pairs, 'pair_fraction': pairs / (num_orders * num_workers),
+                         'dense_s': dense_time, 'sparse_s': sparse_time})
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
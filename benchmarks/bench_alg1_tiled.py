@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import pandas as pd
+
+# Make alg-1/Alg1.py importable (the folder name is not a valid package name)
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(repo_dir, 'alg-1'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Alg1 import write_cost_blocks
+from bench_alg1 import synthetic_instance
+
+# Instance sizes (orders x workers); peak RSS should stay roughly the same across all of them
+tiled_sizes = [(1000, 1000), (5000, 2000), (10000, 5000), (20000, 5000)]
+block_pairs = 1_000_000
+
+# Sizes up to this many pairs also stream the long-format CSVs, larger ones only the .npy matrices
+max_csv_pairs = 2_000_000
+
+
+# Run one size in this process and print its block statistics as JSON
+def run_size(num_orders, num_workers):
+    orders, workers, locations = synthetic_instance(num_orders, num_workers)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_dir = os.path.join(tmp_dir, 'csv') if num_orders * num_workers <= max_csv_pairs else None
+        block_stats = write_cost_blocks(orders, workers, locations, 2, 15, 7, 'bench',
+                                        output_dir=output_dir, matrix_dir=os.path.join(tmp_dir, 'matrices'),
+                                        block_pairs=block_pairs, verbose=False)
+    print(block_stats.to_json(orient='records'))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        run_size(int(sys.argv[1]), int(sys.argv[2]))
+        sys.exit(0)
+
+    # Each size runs in a fresh process, since peak RSS never goes down within a process
+    rows = []
+    for num_orders, num_workers in tiled_sizes:
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), str(num_orders), str(num_workers)],
+                                capture_output=True, text=True, check=True).stdout
+        block_stats = pd.DataFrame(json.loads(output.strip().splitlines()[-1]))
+        rows.append({
+            'orders': num_orders,
+            'workers': num_workers,
+            'csv': num_orders * num_workers <= max_csv_pairs,
+            'blocks': len(block_stats),
+            'total_s': block_stats['seconds'].sum(),
+            'mean_pairs_per_s': block_stats['pairs'].sum() / block_stats['seconds'].sum(),
+            'peak_rss_mb': block_stats['peak_rss_mb'].max(),
+        })
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
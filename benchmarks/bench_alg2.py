@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, repo_dir)
+sys.path.insert(0, os.path.join(repo_dir, 'alg2-new'))
+
+from common.matrix_store import load_instance_matrices, csv_values
+from alg2 import generate_all_feasible_solutions
+
+s_max = 100
+solution_counts = [20, 1000, 10000, 100000]
+# Parallel subtree search: split depths and pool sizes compared with the sequential search (split depth 0)
+split_depths = [0, 1, 2]
+pool_sizes = sorted({1, os.cpu_count()})
+parallel_max_solutions = 10000
+# The previous dict-of-dicts backtracking is only timed up to this many solutions
+max_legacy_solutions = 20
+
+
+# The previous implementation: O(N) worker-availability scan per candidate and a full N x M snapshot per solution
+def legacy_generate(orders, workers, service_times, s_max, max_solutions):
+    X = {o: {w: 0 for w in workers} for o in orders}
+    solutions = []
+
+    def backtrack(order_index):
+        if len(solutions) >= max_solutions:
+            return
+        if order_index == len(orders):
+            solutions.append([[X[o][w] for w in workers] for o in orders])
+            return
+        o = orders[order_index]
+        for w in workers:
+            if not any(X[o2][w] == 1 for o2 in X) and service_times.at[(o, w), 'service_time'] <= s_max:
+                X[o][w] = 1
+                backtrack(order_index + 1)
+                X[o][w] = 0
+
+    backtrack(0)
+    return solutions
+
+
+if __name__ == '__main__':
+    rows = []
+    for instance_num in ['01', '02', '03']:
+        instance_dir = os.path.join(repo_dir, 'alg2-new', 'alg2-inputs', f'instance-{instance_num}')
+        matrices = load_instance_matrices(instance_dir, instance_num)
+        service_time = csv_values(matrices['service_time'])
+
+        for max_solutions in solution_counts:
+            start = time.perf_counter()
+            solutions = generate_all_feasible_solutions(service_time, s_max, max_solutions)
+            bitmask_time = time.perf_counter() - start
+
+            legacy_time = None
+            if max_solutions <= max_legacy_solutions:
+                orders = matrices['order_ids'].tolist()
+                workers = matrices['worker_ids'].tolist()
+                service_times_df = pd.DataFrame({
+                    'order_id': np.repeat(orders, len(workers)),
+                    'worker_id': np.tile(workers, len(orders)),
+                    'service_time': service_time.reshape(-1),
+                }).set_index(['order_id', 'worker_id'])
+                start = time.perf_counter()
+                legacy_generate(orders, workers, service_times_df, s_max, max_solutions)
+                legacy_time = time.perf_counter() - start
+
+            rows.append({'instance': instance_num, 'orders': len(service_time), 'max_solutions': max_solutions,
+                         'found': len(solutions), 'bitmask_s': bitmask_time,
+                         'solutions_per_s': len(solutions) / bitmask_time, 'legacy_s': legacy_time})
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
+
+    # Parallel subtree search: throughput and how many distinct workers the first two orders get over the solutions
+    rows = []
+    for instance_num in ['01', '02', '03']:
+        instance_dir = os.path.join(repo_dir, 'alg2-new', 'alg2-inputs', f'instance-{instance_num}')
+        service_time = csv_values(load_instance_matrices(instance_dir, instance_num)['service_time'])
+        for split_depth in split_depths:
+            for processes in (pool_sizes if split_depth else [1]):
+                start = time.perf_counter()
+                solutions = generate_all_feasible_solutions(service_time, s_max, parallel_max_solutions,
+                                                            split_depth=split_depth, processes=processes)
+                elapsed = time.perf_counter() - start
+                rows.append({'instance': instance_num, 'split_depth': split_depth, 'processes': processes,
+                             'found': len(solutions), 'seconds': elapsed, 'solutions_per_s': len(solutions) / elapsed,
+                             'order1_workers': len(np.unique(solutions[:, 0])) if len(solutions) else 0,
+                             'order2_workers': len(np.unique(solutions[:, 1])) if len(solutions) else 0})
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
@@ -0,0 +1,190 @@
+import copy
+import os
+import random
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Make alg-1/Alg1.py and alg-3/Alg3.py importable (the folder names are not valid package names)
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, repo_dir)
+sys.path.insert(0, os.path.join(repo_dir, 'alg-1'))
+sys.path.insert(0, os.path.join(repo_dir, 'alg-3'))
+sys.path.insert(0, os.path.join(repo_dir, 'benchmarks'))
+
+from common.matrix_store import load_instance_matrices, pair_frame
+from Alg1 import cost_matrices
+from Alg3 import fitness_function, initialize_population, water_wave_optimization, build_model, water_wave_optimization_arrays
+from Alg3 import island_water_wave_optimization, solution_positions, new_solution_state, pair_matrix
+from bench_alg1 import synthetic_instance
+
+s_max_values = [15, 100]
+max_iter = 100
+seed = 42
+
+# Synthetic sizes (orders = workers) for the array-backed loop alone, with a population of random permutations
+synthetic_sizes = [200, 500, 1000, 2000]
+synthetic_population = 20
+synthetic_max_iter = 5
+
+# Island counts for the island model (each island runs the full max_iter passes in its own process)
+island_counts = [1, 2, 4, 8]
+
+# Anytime runs: wall-clock budgets in seconds (None: all max_iter passes) and the stagnation stop
+time_budgets = [0.05, 0.2, 1.0, None]
+stagnation_rounds = 10
+
+# X_star neighbors tried one by one vs as a batch: random (orders, workers) instances with spare workers,
+# each run for the same wall-clock budget
+neighbor_sizes = [(200, 300), (1000, 1500), (3000, 4500)]
+neighbor_budget = 3.0
+
+
+# The previous implementation: every fitness is evaluated from scratch and every neighbor is a deep copy
+def legacy_water_wave_optimization(O, W, s_max, q_w, service_times, costs, estimated_profits, P, lambda_max, max_iter=100):
+    def f(X):
+        return fitness_function(X, service_times, costs, estimated_profits, s_max, q_w)
+
+    def calculate_lambda_X(X, P, lambda_max):
+        sum_f_X_prime = sum(f(X_prime) for X_prime in P)
+        f_X = f(X)
+        if sum_f_X_prime == 0:
+            return lambda_max
+        return max(1, lambda_max * (sum_f_X_prime - f_X) / sum_f_X_prime)
+
+    def propagate_solution(X, O, W):
+        X_prime = copy.deepcopy(X)
+        selected_order = random.choice(O)
+        available_workers = [worker for worker in W if worker != X_prime[selected_order]]
+        if available_workers:
+            X_prime[selected_order] = random.choice(available_workers)
+        return X_prime
+
+    X_star = max(P, key=f)
+    iter = 0
+    while iter <= max_iter:
+        for X in P:
+            W_iter = random.randint(1, int(calculate_lambda_X(X, P, lambda_max)))
+            X_prime = copy.deepcopy(X)
+            for _ in range(W_iter):
+                X_prime = propagate_solution(X_prime, O, W)
+            if f(X_prime) > f(X):
+                P.remove(X)
+                P.append(X_prime)
+                if f(X_prime) > f(X_star):
+                    X_star = X_prime
+            nb = random.randint(1, len(W))
+            for _ in range(nb):
+                X_n = propagate_solution(copy.deepcopy(X_star), O, W)
+                if f(X_n) > f(X_star):
+                    X_star = X_n
+        iter += 1
+    return X_star
+
+
+def timed_run(func, *args):
+    random.seed(seed)
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    rows = []
+    island_inputs = []
+    for instance_num in ['01', '02', '03']:
+        instance_dir = os.path.join(repo_dir, 'alg-3', 'alg3-inputs', f'instance-{instance_num}')
+        O = pd.read_csv(os.path.join(instance_dir, f'orders-{instance_num}.csv'))['order_id'].tolist()
+        W = pd.read_csv(os.path.join(instance_dir, f'workers-{instance_num}.csv'))['worker_id'].tolist()
+
+        pairs_df = pair_frame(load_instance_matrices(instance_dir, instance_num),
+                              ['delivery_cost', 'estimated_profit', 'service_time'])
+        pair_keys = list(zip(pairs_df['order_id'].tolist(), pairs_df['worker_id'].tolist()))
+        costs = dict(zip(pair_keys, pairs_df['delivery_cost'].tolist()))
+        estimated_profits = dict(zip(pair_keys, pairs_df['estimated_profit'].tolist()))
+        service_times = dict(zip(pair_keys, pairs_df['service_time'].tolist()))
+
+        solutions_path = os.path.join(instance_dir, f'all_feasible_solutions_{instance_num}.csv')
+        P = initialize_population(O, W, solutions_path, len(O))
+        q_w = {w: 1 for w in W}
+        island_inputs.append((instance_num, O, W, q_w, service_times, estimated_profits, P))
+
+        for s_max in s_max_values:
+            args = (O, W, s_max, q_w, service_times, costs, estimated_profits)
+            X_star, delta_time = timed_run(water_wave_optimization, *args, [dict(X) for X in P], len(O), max_iter)
+            legacy_X_star, legacy_time = timed_run(legacy_water_wave_optimization, *args, [dict(X) for X in P], len(O), max_iter)
+
+            rows.append({'instance': instance_num, 'orders': len(O), 'workers': len(W), 's_max': s_max,
+                         'fitness': fitness_function(X_star, service_times, costs, estimated_profits, s_max, q_w),
+                         'same_result': X_star == legacy_X_star, 'delta_s': delta_time, 'legacy_s': legacy_time,
+                         'speedup': legacy_time / delta_time})
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
+
+    rows = []
+    for size in synthetic_sizes:
+        orders, workers, locations = synthetic_instance(size, size)
+        matrices = cost_matrices(orders, workers, locations, 2, 15, 7)
+        O = orders['order_id'].tolist()
+        W = workers['worker_id'].tolist()
+        model = build_model(O, W, 100, {w: 1 for w in W}, np.round(matrices['service_time'], 5),
+                            np.round(matrices['estimated_profit'], 5))
+
+        rng = np.random.default_rng(seed)
+        population = np.array([rng.permutation(size) for _ in range(synthetic_population)], dtype=np.int32)
+        _, array_time = timed_run(water_wave_optimization_arrays, model, population, size, synthetic_max_iter)
+        rows.append({'orders': size, 'workers': size, 'max_iter': synthetic_max_iter, 'array_s': array_time})
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
+
+    # Island model on the bundled instances at s_max = 100: wall time and fitness by island count
+    rows = []
+    for instance_num, O, W, q_w, service_times, estimated_profits, P in island_inputs:
+        model = build_model(O, W, 100, q_w, pair_matrix(service_times, O, W), pair_matrix(estimated_profits, O, W))
+        solutions = solution_positions(P, O, W)
+        for num_islands in island_counts:
+            start = time.perf_counter()
+            X_star = island_water_wave_optimization(model, solutions, len(O), max_iter, num_islands, seed=seed)
+            island_time = time.perf_counter() - start
+            rows.append({'instance': instance_num, 'islands': num_islands, 'cpus': os.cpu_count(),
+                         'fitness': new_solution_state(X_star, model)['fitness'], 'seconds': island_time,
+                         # Every pass visits each solution once, however they are split over islands
+                         'solution_visits_per_s': len(solutions) * (max_iter + 1) / island_time})
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
+
+    # Anytime WWO on the bundled instances at s_max = 100: fitness reached within each time budget,
+    # and where the stagnation stop ends the run
+    rows = []
+    for instance_num, O, W, q_w, service_times, estimated_profits, P in island_inputs:
+        model = build_model(O, W, 100, q_w, pair_matrix(service_times, O, W), pair_matrix(estimated_profits, O, W))
+        solutions = solution_positions(P, O, W)
+        runs = [(time_budget, None) for time_budget in time_budgets] + [(None, stagnation_rounds)]
+        for time_budget, stagnation in runs:
+            trace = []
+            X_star, run_time = timed_run(water_wave_optimization_arrays, model, solutions, len(O), max_iter,
+                                         time_budget, stagnation, trace)
+            rows.append({'instance': instance_num, 'time_budget_s': time_budget, 'stagnation_rounds': stagnation,
+                         'passes': len(trace), 'fitness': new_solution_state(X_star, model)['fitness'], 'seconds': run_time})
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
+
+    rows = []
+    rng = np.random.default_rng(seed)
+    for num_orders, num_workers in neighbor_sizes:
+        service_time = np.round(rng.uniform(5, 40, (num_orders, num_workers)), 5)
+        estimated_profit = np.round(rng.uniform(0, 15, (num_orders, num_workers)), 5)
+        O = list(range(num_orders))
+        W = list(range(num_workers))
+        population = np.array([rng.permutation(num_workers)[:num_orders] for _ in range(10)], dtype=np.int32)
+        for batch_neighbors in [False, True]:
+            model = build_model(O, W, 100, {w: 1 for w in W}, service_time, estimated_profit,
+                                feasible_moves=True, batch_neighbors=batch_neighbors)
+            trace = []
+            X_star, run_time = timed_run(water_wave_optimization_arrays, model, population, num_orders, 10 ** 6,
+                                         neighbor_budget, None, trace)
+            rows.append({'orders': num_orders, 'workers': num_workers, 'batch_neighbors': batch_neighbors,
+                         'passes': len(trace), 'seconds': run_time, 'fitness': new_solution_state(X_star, model)['fitness']})
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
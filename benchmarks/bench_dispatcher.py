@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Make Online/dispatcher.py, alg-1/Alg1.py and the other benchmarks importable
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, repo_dir)
+for folder in ['alg-1', 'Greedy', 'Online', 'benchmarks']:
+    sys.path.insert(0, os.path.join(repo_dir, folder))
+
+from Alg1 import instance_coordinates, pair_matrices
+from dispatcher import new_dispatcher, add_orders, add_workers, remove_orders, move_workers, dispatch_tick
+from bench_alg1 import synthetic_instance
+from bench_greedy import greedy_matrix_assignment
+
+mu, m_ow, speed = 2, 15, 7
+
+# Fleet sizes (orders = workers) and the share of orders and workers that change per tick
+fleet_sizes = [1000, 2000, 5000]
+change_fraction = 0.02
+num_ticks = 5
+
+
+if __name__ == '__main__':
+    rows = []
+    for size in fleet_sizes:
+        orders, workers, locations = synthetic_instance(size, size)
+        coords = instance_coordinates(orders, workers, locations)
+
+        # Full recompute: all costs with Alg1 and a greedy assignment from scratch
+        start = time.perf_counter()
+        matrices = pair_matrices(coords, mu, m_ow, speed)
+        greedy_matrix_assignment(np.round(matrices['service_time'], 5), np.arange(size))
+        full_time = time.perf_counter() - start
+        del matrices
+
+        dispatcher = new_dispatcher(mu, m_ow, speed, order_capacity=size, worker_capacity=size)
+        add_workers(dispatcher, list(range(size)), coords['worker_x'], coords['worker_y'])
+        add_orders(dispatcher, list(range(size)), coords['pickup_x'], coords['pickup_y'],
+                   coords['delivery_x'], coords['delivery_y'], coords['waiting_time'])
+        dispatch_tick(dispatcher)
+
+        # Ticks: some workers move, some orders are delivered and as many new ones arrive
+        rng = np.random.default_rng(0)
+        num_changes = int(change_fraction * size)
+        next_order_id = size
+        tick_times = []
+        for _ in range(num_ticks):
+            moved = rng.choice(list(dispatcher['worker_slot']), num_changes, replace=False).tolist()
+            delivered = rng.choice(list(dispatcher['order_slot']), num_changes, replace=False).tolist()
+            new_orders = rng.integers(0, size, num_changes)
+
+            start = time.perf_counter()
+            move_workers(dispatcher, moved, rng.uniform(174.70, 174.80, num_changes), rng.uniform(-36.90, -36.84, num_changes))
+            remove_orders(dispatcher, delivered)
+            add_orders(dispatcher, list(range(next_order_id, next_order_id + num_changes)),
+                       coords['pickup_x'][new_orders], coords['pickup_y'][new_orders],
+                       coords['delivery_x'][new_orders], coords['delivery_y'][new_orders], coords['waiting_time'][new_orders])
+            dispatch_tick(dispatcher)
+            tick_times.append(time.perf_counter() - start)
+            next_order_id += num_changes
+
+        rows.append({'orders': size, 'workers': size, 'changes_per_tick': num_changes, 'full_s': full_time,
+                     'tick_s': np.mean(tick_times), 'speedup': full_time / np.mean(tick_times)})
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
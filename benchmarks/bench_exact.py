@@ -0,0 +1,89 @@
+import itertools
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Make Exact/Exact_assignment.py importable
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, repo_dir)
+sys.path.insert(0, os.path.join(repo_dir, 'Exact'))
+
+import Exact_assignment
+from Exact_assignment import optimal_matrix_assignment
+
+# Random small cases checked against brute force: (orders, workers), cases per size
+check_sizes = [(3, 3), (3, 4), (4, 3), (4, 4)]
+check_cases = 200
+
+# Sizes (orders = workers) timed with SciPy and with the NumPy Hungarian fallback
+timing_sizes = [100, 300, 1000]
+
+# Regression case: mixed-sign utilities where a too small infeasibility penalty makes the solver pick an
+# infeasible pair and serve 2 orders although 3 can be served feasibly
+M = 100
+regression_utility = np.array([[M, -M, 0], [0, M, -M], [-M, 0, 0]], dtype=float)
+regression_feasible = np.array([[1, 1, 0], [0, 1, 1], [1, 0, 0]], dtype=bool)
+
+
+# Best (orders served, summed utility) over all one-to-one assignments using feasible pairs only
+def brute_force(utility, feasible):
+    n, m = utility.shape
+    best = (0, 0.0)
+    for cols in itertools.product(range(-1, m), repeat=n):
+        used = [c for c in cols if c >= 0]
+        if len(used) != len(set(used)) or any(c >= 0 and not feasible[r, c] for r, c in enumerate(cols)):
+            continue
+        best = max(best, (len(used), sum(utility[r, c] for r, c in enumerate(cols) if c >= 0)))
+    return best
+
+
+def solve(utility, feasible, use_scipy):
+    solver = Exact_assignment.linear_sum_assignment
+    if not use_scipy:
+        Exact_assignment.linear_sum_assignment = None
+    try:
+        rows, cols = optimal_matrix_assignment(utility, feasible)
+    finally:
+        Exact_assignment.linear_sum_assignment = solver
+    return len(rows), utility[rows, cols].sum()
+
+
+def matches(utility, feasible, use_scipy):
+    served, total = solve(utility, feasible, use_scipy)
+    best_served, best_total = brute_force(utility, feasible)
+    return served == best_served and abs(total - best_total) < 1e-9
+
+
+if __name__ == '__main__':
+    solvers = [False] + ([True] if Exact_assignment.linear_sum_assignment is not None else [])
+
+    rows = []
+    for use_scipy in solvers:
+        rows.append({'case': 'regression 3x3', 'scipy': use_scipy, 'cases': 1,
+                     'wrong': int(not matches(regression_utility, regression_feasible, use_scipy))})
+    rng = np.random.default_rng(0)
+    for num_orders, num_workers in check_sizes:
+        cases = [(np.round(rng.uniform(-139, 5, (num_orders, num_workers)), 5),
+                  rng.random((num_orders, num_workers)) < 0.5) for _ in range(check_cases)]
+        for use_scipy in solvers:
+            rows.append({'case': f'random {num_orders}x{num_workers}', 'scipy': use_scipy, 'cases': check_cases,
+                         'wrong': sum(not matches(u, f, use_scipy) for u, f in cases)})
+    checks_df = pd.DataFrame(rows)
+    print(checks_df.to_string(index=False))
+
+    rows = []
+    for size in timing_sizes:
+        utility = rng.uniform(-139, 5, (size, size))
+        feasible = rng.random((size, size)) < 0.2
+        row = {'orders': size, 'workers': size}
+        for use_scipy in solvers:
+            start = time.perf_counter()
+            served, _ = solve(utility, feasible, use_scipy)
+            row['scipy_s' if use_scipy else 'hungarian_s'] = time.perf_counter() - start
+            row['served'] = served
+        rows.append(row)
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
+
+    sys.exit(1 if checks_df['wrong'].any() else 0)
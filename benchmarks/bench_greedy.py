@@ -0,0 +1,182 @@
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, repo_dir)
+sys.path.insert(0, os.path.join(repo_dir, 'Greedy'))
+
+from common.matrix_store import create_matrix_store, append_matrix_rows, finish_matrix_store, open_matrix_store, pair_frame, csv_values
+from common.candidate_graph import candidate_graph
+from Greedy_algorithm import greedy_graph_assignment, greedy_global_assignment
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # The exact reference is skipped without SciPy
+    linear_sum_assignment = None
+
+# Sizes (orders x workers); the previous pandas implementation is only timed up to max_legacy_orders
+sizes = [(100, 100), (500, 500), (1000, 1000), (5000, 5000), (10000, 10000), (20000, 20000)]
+max_legacy_orders = 500
+block_rows = 1000
+
+# Service-time cut of the candidate-graph greedy (about a fifth of the random pairs are within it)
+graph_s_max = 30
+
+# Sequential vs global best-pair greedy on the same candidate graphs (quality against the exact utility-maximizing
+# assignment up to max_exact_orders)
+global_sizes = [(1000, 1000), (2000, 2000), (5000, 5000)]
+max_exact_orders = 2000
+
+
+# Write a random store block by block, so the 20k x 20k case does not need the whole matrix in memory
+def write_random_store(store_dir, num_orders, num_workers, seed=0):
+    rng = np.random.default_rng(seed)
+    # float32 is exact for these values (all below 128) and halves the 20k x 20k store
+    writer = create_matrix_store(store_dir, np.arange(num_orders), np.arange(num_workers),
+                                 names=['service_time', 'delivery_cost', 'estimated_profit'], dtype=np.float32)
+    for row_start in range(0, num_orders, block_rows):
+        rows = min(block_rows, num_orders - row_start)
+        delivery_cost = np.round(rng.uniform(0, 10, (rows, num_workers)), 5)
+        append_matrix_rows(writer, {
+            'service_time': np.round(rng.uniform(5, 120, (rows, num_workers)), 5),
+            'delivery_cost': delivery_cost,
+            'estimated_profit': 15 - delivery_cost,
+        })
+    finish_matrix_store(writer)
+
+
+# Order-sequential greedy over a dense (orders x workers) service-time matrix, the reference the candidate-graph
+# greedy is timed against (also used by bench_dispatcher.py).
+# Orders are taken in the given row order and each one gets the unassigned worker with the lowest service time
+# (the first such worker on ties, like a left-to-right scan). Rows of -1 stand for orders without any candidates.
+# Returns the chosen (row, column) pairs.
+def greedy_matrix_assignment(service_time, order_rows):
+    num_workers = service_time.shape[1]
+    blocked = np.zeros(num_workers)  # 0 for free workers, inf once a worker has been assigned
+
+    pairs = []
+    for row in order_rows:
+        if row < 0:
+            continue
+
+        # Compare on the CSV values so ties break exactly as they did on the CSV data
+        candidates = csv_values(service_time[row]) + blocked
+        candidates[np.isnan(candidates)] = np.inf  # Missing pairs are never candidates
+
+        col = int(np.argmin(candidates))
+        if candidates[col] == np.inf:
+            continue  # No unassigned worker left for this order
+
+        blocked[col] = np.inf  # Mark this worker as assigned
+        pairs.append((row, col))
+
+        if len(pairs) == num_workers:
+            break  # Every worker is taken
+
+    return pairs
+
+
+# The previous implementation: a full-table filter per order and a row-wise scan over its candidates
+def legacy_greedy(combined_df, order_ids):
+    assignments = []
+    assigned_workers = set()
+    for order_id in order_ids:
+        relevant_rows = combined_df[combined_df['order_id'] == order_id]
+        best_worker = None
+        best_distance = float('inf')
+        for _, row in relevant_rows.iterrows():
+            worker_id = row['worker_id']
+            if worker_id not in assigned_workers:
+                distance = row['service_time']
+                if distance < best_distance:
+                    best_distance = distance
+                    best_worker = worker_id
+        if best_worker is not None:
+            assignments.append((order_id, best_worker))
+            assigned_workers.add(best_worker)
+    return assignments
+
+
+if __name__ == '__main__':
+    rows = []
+    for num_orders, num_workers in sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store_dir = os.path.join(tmp_dir, 'matrices-bench')
+            write_random_store(store_dir, num_orders, num_workers)
+            store = open_matrix_store(store_dir)
+
+            start = time.perf_counter()
+            pairs = greedy_matrix_assignment(store['service_time'], np.arange(num_orders))
+            matrix_time = time.perf_counter() - start
+
+            # Candidate graph greedy: the graph build scans the store once, the greedy only its candidates
+            start = time.perf_counter()
+            graph = candidate_graph({'service_time': store['service_time']}, graph_s_max)
+            graph_build_time = time.perf_counter() - start
+            start = time.perf_counter()
+            greedy_graph_assignment(graph, np.arange(num_orders))
+            graph_time = time.perf_counter() - start
+            del graph
+
+            legacy_time = same = None
+            if num_orders <= max_legacy_orders:
+                combined_df = pair_frame(store, ['service_time'])
+                start = time.perf_counter()
+                legacy = legacy_greedy(combined_df, store['order_ids'])
+                legacy_time = time.perf_counter() - start
+                same = legacy == [(store['order_ids'][r], store['worker_ids'][c]) for r, c in pairs]
+            del store
+
+        rows.append({'orders': num_orders, 'workers': num_workers, 'matrix_s': matrix_time,
+                     'graph_build_s': graph_build_time, 'graph_s': graph_time,
+                     'legacy_s': legacy_time, 'speedup': legacy_time / matrix_time if legacy_time else None,
+                     'same_result': same})
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
+
+    rows = []
+    for num_orders, num_workers in global_sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store_dir = os.path.join(tmp_dir, 'matrices-bench')
+            write_random_store(store_dir, num_orders, num_workers)
+            store = open_matrix_store(store_dir)
+            graph = candidate_graph(store, graph_s_max)
+            del store
+
+        utility = graph['estimated_profit'] - graph['service_time']
+        # Sorted pair keys of the candidates, to find the values of the chosen pairs
+        keys = np.repeat(np.arange(num_orders), np.diff(graph['indptr'])) * num_workers + graph['indices']
+        runs = [('sequential', greedy_graph_assignment, ()), ('service_time', greedy_global_assignment, ('service_time',)),
+                ('utility', greedy_global_assignment, ('utility',))]
+        for mode, func, args in runs:
+            start = time.perf_counter()
+            pairs = func(graph, np.arange(num_orders), *args)
+            mode_time = time.perf_counter() - start
+            chosen = np.searchsorted(keys, np.array([r * num_workers + c for r, c in pairs], dtype=np.int64))
+            rows.append({'orders': num_orders, 'workers': num_workers, 'mode': mode, 'seconds': mode_time,
+                         'assigned': len(pairs), 'avg_service_time': graph['service_time'][chosen].mean(),
+                         'total_utility': utility[chosen].sum()})
+
+        if linear_sum_assignment is not None and num_orders <= max_exact_orders:
+            # Non-candidates get a prohibitive cost (dropped afterwards): the most candidate pairs, then the
+            # highest total utility
+            edge_rows = np.repeat(np.arange(num_orders), np.diff(graph['indptr']))
+            cost = np.full((num_orders, num_workers), 1e9)
+            cost[edge_rows, graph['indices']] = -utility
+            service_time = np.full((num_orders, num_workers), np.nan)
+            service_time[edge_rows, graph['indices']] = graph['service_time']
+            start = time.perf_counter()
+            exact_rows, exact_cols = linear_sum_assignment(cost)
+            exact_time = time.perf_counter() - start
+            chosen = cost[exact_rows, exact_cols] < 1e9
+            rows.append({'orders': num_orders, 'workers': num_workers, 'mode': 'exact', 'seconds': exact_time,
+                         'assigned': int(chosen.sum()),
+                         'avg_service_time': service_time[exact_rows[chosen], exact_cols[chosen]].mean(),
+                         'total_utility': -cost[exact_rows, exact_cols][chosen].sum()})
+        del graph
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
@@ -0,0 +1,80 @@
+import os
+import random
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, repo_dir)
+sys.path.insert(0, os.path.join(repo_dir, 'Greedy'))
+sys.path.insert(0, os.path.join(repo_dir, 'alg-3'))
+sys.path.insert(0, os.path.join(repo_dir, 'LocalSearch'))
+
+from common.matrix_store import load_instance_matrices, csv_values
+from common.candidate_graph import candidate_graph
+from Greedy_algorithm import greedy_graph_assignment
+from Alg3 import build_model, water_wave_optimization_arrays, new_solution_state
+from local_search import local_search, local_search_columns, pair_values, assignment_fitness
+
+s_max = 100
+wwo_iterations = 100
+seed = 42
+
+# Synthetic sizes (orders x workers) for the local search alone, started from the sequential greedy
+synthetic_sizes = [(1000, 1500), (2000, 3000), (5000, 7500)]
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    # Bundled instances: polish the committed greedy output vs run the WWO from that same assignment
+    rows = []
+    for instance_number in ['01', '02', '03']:
+        matrices = load_instance_matrices(os.path.join(repo_dir, 'alg-1', 'alg1-outputs', f'instance-{instance_number}'), instance_number)
+        greedy_df = pd.read_csv(os.path.join(repo_dir, 'Greedy', 'output', f'instance-{instance_number}', f'greedy_assignments_{instance_number}.csv'))
+
+        (improved_df, stats), polish_time = timed(local_search, greedy_df, matrices, s_max)
+
+        O = greedy_df['order_id'].tolist()
+        W = matrices['worker_ids'].tolist()
+        order_rows = pd.Index(matrices['order_ids']).get_indexer(O)
+        model = build_model(O, W, s_max, {w: 1 for w in W}, csv_values(matrices['service_time'][order_rows]),
+                            csv_values(matrices['estimated_profit'][order_rows]), feasible_moves=True, batch_neighbors=True)
+        start_positions = pd.Index(W).get_indexer(greedy_df['worker_id'])
+        random.seed(seed)
+        X_star, wwo_time = timed(water_wave_optimization_arrays, model, start_positions[np.newaxis], len(O), wwo_iterations)
+
+        rows.append({'instance': instance_number, 'orders': len(O), 'greedy_fitness': stats['fitness_before'],
+                     'polished_fitness': stats['fitness'], 'polish_s': polish_time,
+                     'wwo_fitness': new_solution_state(X_star, model)['fitness'], 'wwo_s': wwo_time})
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.6g}'))
+
+    # Random instances with spare workers: local search time and gain from the sequential greedy start
+    rows = []
+    rng = np.random.default_rng(seed)
+    for num_orders, num_workers in synthetic_sizes:
+        service_time = np.round(rng.uniform(5, 120, (num_orders, num_workers)), 5)
+        estimated_profit = np.round(15 - rng.uniform(0, 10, (num_orders, num_workers)), 5)
+        graph = candidate_graph({'service_time': service_time}, s_max)
+        pairs = greedy_graph_assignment(graph, np.arange(num_orders))
+        order_rows = np.array([row for row, _ in pairs])
+        cols = np.array([col for _, col in pairs])
+
+        values = pair_values(service_time[order_rows], estimated_profit[order_rows], s_max)
+        values[service_time[order_rows] > s_max] = -np.inf
+        capacity = np.ones(num_workers, dtype=np.int64)
+        (new_cols, stats), search_time = timed(local_search_columns, values, cols, capacity)
+
+        fitness = [assignment_fitness(service_time[order_rows, c], estimated_profit[order_rows, c], c, capacity, s_max)
+                   for c in [cols, new_cols]]
+        rows.append({'orders': num_orders, 'workers': num_workers, 'greedy_fitness': fitness[0],
+                     'polished_fitness': fitness[1], 'rounds': stats['rounds'], 'swaps': stats['swaps'],
+                     'relocations': stats['relocations'], 'seconds': search_time})
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.6g}'))
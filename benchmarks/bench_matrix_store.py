@@ -0,0 +1,77 @@
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, repo_dir)
+
+from common.matrix_store import write_matrix_store, open_matrix_store, convert_csv_instance
+from common.instance_csv import read_instance_csv
+
+# Sizes (orders x workers); the long-format CSVs are only written and parsed up to max_csv_pairs
+sizes = [(1000, 1000), (2000, 2000), (5000, 5000), (10000, 10000)]
+max_csv_pairs = 4_000_000
+names = ['service_time', 'delivery_cost', 'estimated_profit']
+
+
+def random_matrices(num_orders, num_workers, seed=0):
+    rng = np.random.default_rng(seed)
+    service_time = np.round(rng.uniform(5, 120, (num_orders, num_workers)), 5)
+    delivery_cost = np.round(rng.uniform(0, 10, (num_orders, num_workers)), 5)
+    return {'service_time': service_time, 'delivery_cost': delivery_cost, 'estimated_profit': 15 - delivery_cost}
+
+
+# Write the three long-format CSVs the way Alg1 does
+def write_csvs(instance_dir, order_ids, worker_ids, matrices):
+    pair_columns = {
+        'order_id': np.repeat(order_ids, len(worker_ids)),
+        'worker_id': np.tile(worker_ids, len(order_ids)),
+    }
+    for file_name, column in [('service-times', 'service_time'), ('delivery-costs', 'delivery_cost'), ('estimated-profits', 'estimated_profit')]:
+        df = pd.DataFrame({**pair_columns, column: matrices[column].reshape(-1)})
+        df.to_csv(os.path.join(instance_dir, f'{file_name}-bench.csv'), index=False)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    rows = []
+    for num_orders, num_workers in sizes:
+        order_ids = np.arange(num_orders)
+        worker_ids = np.arange(num_workers)
+        matrices = random_matrices(num_orders, num_workers)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store_dir = os.path.join(tmp_dir, 'matrices-bench')
+            write_matrix_store(store_dir, order_ids, worker_ids, matrices, names=names)
+
+            # Opening the store maps the matrices without reading them; touching one row shows first access
+            store, open_time = timed(open_matrix_store, store_dir)
+            _, row_time = timed(np.array, store['service_time'][num_orders // 2])
+
+            csv_time = typed_time = csv_mb = typed_mb = convert_time = None
+            if num_orders * num_workers <= max_csv_pairs:
+                write_csvs(tmp_dir, order_ids, worker_ids, matrices)
+                csv_files = [os.path.join(tmp_dir, f'{f}-bench.csv') for f in ['service-times', 'delivery-costs', 'estimated-profits']]
+                # Inferred dtypes with the default parser vs the typed reader of common/instance_csv.py
+                frames, csv_time = timed(lambda: [pd.read_csv(path) for path in csv_files])
+                csv_mb = sum(df.memory_usage(deep=True).sum() for df in frames) / 1e6
+                frames, typed_time = timed(lambda: [read_instance_csv(path) for path in csv_files])
+                typed_mb = sum(df.memory_usage(deep=True).sum() for df in frames) / 1e6
+                del frames
+                _, convert_time = timed(convert_csv_instance, tmp_dir, 'bench', os.path.join(tmp_dir, 'converted'))
+            del store
+
+        rows.append({'orders': num_orders, 'workers': num_workers, 'read_csv_s': csv_time, 'csv_mb': csv_mb,
+                     'typed_read_s': typed_time, 'typed_mb': typed_mb,
+                     'convert_s': convert_time, 'open_store_ms': open_time * 1000, 'first_row_ms': row_time * 1000})
+        del matrices
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
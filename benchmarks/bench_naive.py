@@ -0,0 +1,33 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Make Naive/Naive.py importable
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, repo_dir)
+sys.path.insert(0, os.path.join(repo_dir, 'Naive'))
+
+from Naive import sample_metrics, sample_random_assignments, summarize_samples
+
+# (orders = workers, samples) on random matrices
+sample_sizes = [(100, 10_000), (1000, 10_000), (1000, 100_000)]
+
+
+if __name__ == '__main__':
+    rows = []
+    for size, num_samples in sample_sizes:
+        rng = np.random.default_rng(0)
+        matrices = {name: rng.uniform(0, 50, (size, size)) for name in sample_metrics}
+
+        start = time.perf_counter()
+        samples_df = sample_random_assignments(matrices, num_samples)
+        sample_time = time.perf_counter() - start
+        summary_df = summarize_samples(samples_df)
+
+        rows.append({'orders': size, 'samples': num_samples, 'seconds': sample_time,
+                     'samples_per_s': num_samples / sample_time,
+                     'service_time_p50': summary_df.loc[0, 'p50']})
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
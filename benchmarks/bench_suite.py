@@ -0,0 +1,320 @@
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, repo_dir)
+for folder in ['alg-1', 'Naive', 'Greedy', 'alg2-new', 'alg-3', 'LocalSearch', 'Synthetic']:
+    sys.path.insert(0, os.path.join(repo_dir, folder))
+
+from common.matrix_store import write_matrix_store, open_matrix_store, store_dir_for, csv_values
+from common.candidate_graph import candidate_graph
+from Alg1 import load_instance, cost_matrices, peak_rss_mb
+from Naive import sample_random_assignments
+from Greedy_algorithm import greedy_graph_assignment
+from alg2 import graph_candidates, iter_parallel_feasible_solutions
+from Alg3 import build_model, iter_water_wave_optimization
+from local_search import assignment_fitness
+from synthetic_instances import generate_instance
+
+# End-to-end benchmark of the five algorithms: the Alg1 cost build, Naive random sampling, Greedy, alg2
+# enumeration and the Alg3 WWO, on the bundled instances and on synthetic ones of growing size. Every (stage,
+# instance) case runs in a fresh process (peak RSS never goes down within a process) and records its wall time,
+# peak memory, evaluations per second and solution quality. The results are written to results_file as JSON
+# and compared with baseline_file when it exists: the script exits with status 1 if any case failed, got slower,
+# used more memory or found worse solutions beyond the tolerances below.
+#
+# No baseline comes with the repository, as timings and memory only compare on the same machine: create one
+# locally with --update-baseline. Without a baseline the script only fails on cases that crash; it cannot catch
+# slowdowns, memory growth or quality drops.
+#
+#   python benchmarks/bench_suite.py                     run, write the results and check them against the baseline
+#   python benchmarks/bench_suite.py --update-baseline   run and store the results as the new baseline
+
+results_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'suite_results.json')
+baseline_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'suite_baseline.json')
+
+stages = ['alg1', 'naive', 'greedy', 'alg2', 'alg3']
+
+# Bundled instances (Alg1 inputs) and synthetic sizes (orders x workers, more workers than orders so the
+# one-to-one algorithms have feasible solutions)
+bundled_instances = ['01', '02', '03']
+synthetic_sizes = [(250, 375), (1000, 1500), (2000, 3000)]
+seed = 42
+
+# Algorithm settings shared by all instances
+s_max = 100
+naive_samples = 1000
+alg2_max_solutions = 20
+alg3_max_iter = 10
+
+# Timed calls per case, the fastest one counts (no more calls once repeat_budget_s seconds have been spent)
+repeats = 3
+repeat_budget_s = 5
+
+# Regression tolerances: a case fails when it is more than time_tolerance slower (and by more than min_time_s),
+# uses more than memory_tolerance more peak memory (and more than min_memory_mb), or its fitness drops by more
+# than fitness_tolerance. Wall times are allowed more slack as they are noisy on shared machines.
+time_tolerance = 0.5
+min_time_s = 0.05
+memory_tolerance = 0.25
+min_memory_mb = 20
+fitness_tolerance = 1e-6
+
+
+# Quality of a one-to-one assignment given as the worker column of every order row (None where the
+# assignment is empty)
+def assignment_quality(service_time, estimated_profit, rows, cols):
+    if len(rows) == 0:
+        return {'assigned': 0, 'mean_service_time': None, 'mean_estimated_profit': None, 'fitness': None}
+    st = service_time[rows, cols]
+    ep = estimated_profit[rows, cols]
+    capacity = np.ones(service_time.shape[1], dtype=np.int64)
+    return {'assigned': len(rows), 'mean_service_time': float(st.mean()), 'mean_estimated_profit': float(ep.mean()),
+            'fitness': float(assignment_fitness(st, ep, cols, capacity, s_max))}
+
+
+def best_of(func, repeats):
+    best = None
+    spent = 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        spent += elapsed
+        if spent >= repeat_budget_s:
+            break
+    return result, best
+
+
+# Alg1: instance files -> cost matrices -> matrix store (read by the other stages)
+def run_alg1(instance_dir, instance_num):
+    store_dir = store_dir_for(instance_dir, instance_num)
+
+    def build():
+        orders, workers, locations, mu, m_ow, speed = load_instance(instance_dir, instance_num)
+        matrices = cost_matrices(orders, workers, locations, mu, m_ow, speed)
+        write_matrix_store(store_dir, orders['order_id'].values, workers['worker_id'].values, matrices, source=instance_dir)
+        return matrices
+
+    matrices, seconds = best_of(build, repeats)
+    service_time = matrices['service_time']
+    quality = {'pairs': int(service_time.size), 'feasible_pairs': int((service_time <= s_max).sum()),
+               'mean_service_time': float(np.nanmean(service_time))}
+    return seconds, service_time.size, quality
+
+
+def load_values(instance_dir, instance_num):
+    store = open_matrix_store(store_dir_for(instance_dir, instance_num))
+    return store, csv_values(store['service_time']), csv_values(store['estimated_profit'])
+
+
+# Naive: naive_samples random one-to-one assignments
+def run_naive(instance_dir, instance_num):
+    store, _, _ = load_values(instance_dir, instance_num)
+    matrices = {name: csv_values(store[name]) for name in ['service_time', 'delivery_cost', 'estimated_profit']}
+    samples, seconds = best_of(lambda: sample_random_assignments(matrices, naive_samples, seed), repeats)
+    quality = {'assigned': len(store['order_ids']),
+               'mean_service_time': float(samples['avg_service_time'].mean()),
+               'mean_estimated_profit': float(samples['avg_estimated_profit'].mean()), 'fitness': None}
+    return seconds, naive_samples * len(store['order_ids']), quality
+
+
+# Greedy: candidate graph within s_max, then the sequential fastest-worker assignment
+def run_greedy(instance_dir, instance_num):
+    store, service_time, estimated_profit = load_values(instance_dir, instance_num)
+
+    def assign():
+        graph = candidate_graph(store, s_max)
+        return graph, greedy_graph_assignment(graph, np.arange(len(store['order_ids'])))
+
+    (graph, pairs), seconds = best_of(assign, repeats)
+    rows = np.array([row for row, _ in pairs], dtype=np.int64)
+    cols = np.array([col for _, col in pairs], dtype=np.int64)
+    return seconds, len(graph['indices']), assignment_quality(service_time, estimated_profit, rows, cols)
+
+
+def alg2_solutions(store):
+    candidates, feasible_masks = graph_candidates(candidate_graph(store, s_max))
+    return list(iter_parallel_feasible_solutions(candidates, feasible_masks, alg2_max_solutions, split_depth=0))
+
+
+# alg2: enumeration of up to alg2_max_solutions feasible one-to-one assignments
+def run_alg2(instance_dir, instance_num):
+    store, service_time, estimated_profit = load_values(instance_dir, instance_num)
+    solutions, seconds = best_of(lambda: alg2_solutions(store), repeats)
+    qualities = [assignment_quality(service_time, estimated_profit, np.arange(len(s)), s) for s in solutions]
+    quality = max(qualities, key=lambda q: q['fitness'], default=assignment_quality(service_time, estimated_profit, [], []))
+    quality['solutions'] = len(solutions)
+    return seconds, len(solutions), quality
+
+
+# Alg3: WWO for alg3_max_iter passes from alg2's solutions (enumerated untimed); evaluations are solution updates.
+# Instances without feasible solutions are reported with no time and no assignment.
+def run_alg3(instance_dir, instance_num):
+    store, service_time, estimated_profit = load_values(instance_dir, instance_num)
+    solutions = alg2_solutions(store)
+    if not solutions:
+        return 0.0, 0, assignment_quality(service_time, estimated_profit, [], [])
+    O = store['order_ids'].tolist()
+    W = store['worker_ids'].tolist()
+    model = build_model(O, W, s_max, {w: 1 for w in W}, service_time, estimated_profit, feasible_moves=True, batch_neighbors=True)
+
+    def optimize():
+        random.seed(seed)
+        trace = []
+        X_star = None
+        for X_star, _ in iter_water_wave_optimization(model, np.stack(solutions), len(O), alg3_max_iter, trace=trace):
+            pass
+        return X_star, trace
+
+    (X_star, trace), seconds = best_of(optimize, repeats)
+    quality = assignment_quality(service_time, estimated_profit, np.arange(len(O)), np.asarray(X_star, dtype=np.int64))
+    return seconds, len(trace) * len(solutions), quality
+
+
+stage_runners = {
+    'alg1': run_alg1,
+    'naive': run_naive,
+    'greedy': run_greedy,
+    'alg2': run_alg2,
+    'alg3': run_alg3,
+}
+
+
+# One case in this process, printed as a JSON line for the parent
+def run_case(stage, instance_dir, instance_num):
+    rss_before = peak_rss_mb()
+    seconds, evaluations, quality = stage_runners[stage](instance_dir, instance_num)
+    peak = peak_rss_mb()
+    print(json.dumps({
+        'wall_s': seconds,
+        'peak_rss_mb': peak,
+        'stage_rss_mb': None if peak is None else peak - rss_before,
+        'evaluations': int(evaluations),
+        'evaluations_per_s': evaluations / seconds if seconds > 0 else None,
+        'quality': quality,
+    }))
+
+
+# Bundled instances copied to work_dir (so the stores are written there) and synthetic ones generated there;
+# returns [(name, instance_dir, instance_num)]
+def prepare_instances(work_dir):
+    instances = []
+    for instance_num in bundled_instances:
+        source = os.path.join(repo_dir, 'alg-1', 'alg1-inputs', f'instance-{instance_num}')
+        instance_dir = os.path.join(work_dir, f'instance-{instance_num}')
+        shutil.copytree(source, instance_dir, ignore=shutil.ignore_patterns('matrices-*'))
+        instances.append((instance_num, instance_dir, instance_num))
+    for num_orders, num_workers in synthetic_sizes:
+        instance_num = f'syn{num_orders}x{num_workers}'
+        instance_dir = os.path.join(work_dir, f'instance-{instance_num}')
+        generate_instance(instance_dir, instance_num, num_orders, num_workers, seed)
+        instances.append((instance_num, instance_dir, instance_num))
+    return instances
+
+
+def run_suite():
+    work_dir = tempfile.mkdtemp(prefix='bench-suite-')
+    results = []
+    try:
+        for name, instance_dir, instance_num in prepare_instances(work_dir):
+            orders = len(pd.read_csv(os.path.join(instance_dir, f'orders-{instance_num}.csv')))
+            workers = len(pd.read_csv(os.path.join(instance_dir, f'workers-{instance_num}.csv')))
+            for stage in stages:  # alg1 first: it writes the store the other stages read
+                result = {'stage': stage, 'instance': name, 'orders': orders, 'workers': workers}
+                process = subprocess.run([sys.executable, os.path.abspath(__file__), '--case', stage, instance_dir, instance_num],
+                                         capture_output=True, text=True)
+                if process.returncode == 0:
+                    result.update(json.loads(process.stdout.strip().splitlines()[-1]))
+                else:
+                    result['error'] = process.stderr.strip().splitlines()[-1] if process.stderr.strip() else 'failed'
+                results.append(result)
+                print(f"{stage:6} {name:14} {result.get('wall_s', float('nan')):.4f}s {result.get('error', '')}", flush=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'settings': {'s_max': s_max, 'naive_samples': naive_samples, 'alg2_max_solutions': alg2_max_solutions,
+                     'alg3_max_iter': alg3_max_iter, 'repeats': repeats, 'seed': seed},
+        'results': results,
+    }
+
+
+# Regressions of run against baseline, one message per failing (stage, instance) check
+def find_regressions(run, baseline):
+    previous = {(r['stage'], r['instance']): r for r in baseline['results']}
+    regressions = []
+    for result in run['results']:
+        case = f"{result['stage']} on {result['instance']}"
+        if 'error' in result:
+            continue  # Reported by the caller whether or not there is a baseline
+        old = previous.get((result['stage'], result['instance']))
+        if old is None or 'error' in old:
+            continue
+
+        if result['wall_s'] > old['wall_s'] * (1 + time_tolerance) and result['wall_s'] - old['wall_s'] > min_time_s:
+            regressions.append(f"{case}: {result['wall_s']:.4f}s vs {old['wall_s']:.4f}s")
+        if result['peak_rss_mb'] is not None and old['peak_rss_mb'] is not None and \
+                result['peak_rss_mb'] > old['peak_rss_mb'] * (1 + memory_tolerance) and \
+                result['peak_rss_mb'] - old['peak_rss_mb'] > min_memory_mb:
+            regressions.append(f"{case}: peak {result['peak_rss_mb']:.0f}MB vs {old['peak_rss_mb']:.0f}MB")
+        fitness = result['quality'].get('fitness')
+        old_fitness = old['quality'].get('fitness')
+        if fitness is not None and old_fitness is not None and fitness < old_fitness - fitness_tolerance:
+            regressions.append(f"{case}: fitness {fitness:.6f} vs {old_fitness:.6f}")
+    return regressions
+
+
+def results_table(run):
+    rows = []
+    for result in run['results']:
+        row = {key: result.get(key) for key in ['stage', 'instance', 'orders', 'workers', 'wall_s', 'peak_rss_mb',
+                                               'evaluations_per_s']}
+        quality = result.get('quality', {})
+        row['fitness'] = quality.get('fitness')
+        row['mean_service_time'] = quality.get('mean_service_time')
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 5 and sys.argv[1] == '--case':
+        run_case(sys.argv[2], sys.argv[3], sys.argv[4])
+        sys.exit(0)
+
+    run = run_suite()
+    print(results_table(run).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
+
+    if '--update-baseline' in sys.argv[1:]:
+        with open(baseline_file, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"Baseline saved to {baseline_file}")
+        sys.exit(0)
+
+    with open(results_file, 'w') as f:
+        json.dump(run, f, indent=2)
+    print(f"Results saved to {results_file}")
+
+    regressions = [f"{r['stage']} on {r['instance']}: failed ({r['error']})" for r in run['results'] if 'error' in r]
+    if os.path.exists(baseline_file):
+        with open(baseline_file) as f:
+            regressions += find_regressions(run, json.load(f))
+    else:
+        print(f"No baseline at {baseline_file}, so only failed cases are checked; run with --update-baseline to create one")
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+from common.matrix_store import load_instance_matrices, csv_values
+
+# Sparse order -> candidate workers graph in CSR form, shared by Greedy, alg2 and Alg3.
+#
+#   indptr       int64 (orders + 1): the candidates of order row r are the entries indptr[r] to indptr[r + 1]
+#   indices      int32 worker column of every candidate, ascending within each order
+#   service_time, delivery_cost, estimated_profit   float64 value of every candidate pair, rounded like the CSVs
+#   shape        (orders, workers)
+#   order_ids, worker_ids   IDs of the rows and columns (when built from a matrix store)
+#
+# A pair is a candidate when all its values are known and its service time is at most s_max (s_max None keeps
+# every known pair), so the algorithms' work grows with the number of feasible pairs instead of orders x workers.
+
+# Values kept for every candidate pair (those missing from the source matrices are left out)
+graph_values = ['service_time', 'delivery_cost', 'estimated_profit']
+
+
+# Build the graph from dense (orders x workers) matrices, e.g. an open matrix store. order_rows and worker_cols
+# select the rows and columns and their order in the graph (None takes all of them in matrix order).
+# The matrices are read block_size values at a time, so memory-mapped stores are never loaded as a whole.
+def candidate_graph(matrices, s_max=None, order_rows=None, worker_cols=None, block_size=4_000_000):
+    num_rows, num_cols = matrices['service_time'].shape
+    num_orders = num_rows if order_rows is None else len(order_rows)
+    num_workers = num_cols if worker_cols is None else len(worker_cols)
+    names = [name for name in graph_values if name in matrices]
+
+    counts = [np.zeros(0, dtype=np.int64)]
+    indices = [np.zeros(0, dtype=np.int32)]
+    values = {name: [np.zeros(0)] for name in names}
+
+    rows_per_block = max(1, block_size // max(1, num_workers))
+    for start in range(0, num_orders, rows_per_block):
+        stop = min(start + rows_per_block, num_orders)
+        rows = slice(start, stop) if order_rows is None else np.asarray(order_rows[start:stop], dtype=np.intp)
+        blocks = {}
+        for name in names:
+            block = matrices[name][rows]
+            blocks[name] = (block if worker_cols is None else block[:, worker_cols]).reshape(-1)
+
+        # Only the pairs near or below the cut are rounded to CSV precision and compared exactly
+        # (the margin of 1 is far above any float32 rounding error)
+        service_time = blocks['service_time']
+        near = ~np.isnan(service_time)
+        if s_max is not None:
+            near &= service_time <= s_max + 1
+        near = np.flatnonzero(near)  # Row-major, so the candidates of each order stay in ascending worker column
+        near_values = {name: csv_values(block[near]) for name, block in blocks.items()}
+
+        feasible = np.ones(len(near), dtype=bool)
+        if s_max is not None:
+            feasible &= near_values['service_time'] <= s_max
+        for block in near_values.values():
+            feasible &= ~np.isnan(block)
+
+        block_rows, block_cols = np.divmod(near[feasible], num_workers)
+        counts.append(np.bincount(block_rows, minlength=stop - start))
+        indices.append(block_cols.astype(np.int32))
+        for name, block in near_values.items():
+            values[name].append(block[feasible])
+
+    graph = {
+        'indptr': np.concatenate([[0], np.cumsum(np.concatenate(counts))]).astype(np.int64),
+        'indices': np.concatenate(indices),
+        'shape': (num_orders, num_workers),
+        's_max': s_max,
+    }
+    for name in names:
+        graph[name] = np.concatenate(values[name])
+    if 'order_ids' in matrices:
+        graph['order_ids'] = matrices['order_ids'] if order_rows is None else matrices['order_ids'][order_rows]
+        graph['worker_ids'] = matrices['worker_ids'] if worker_cols is None else matrices['worker_ids'][worker_cols]
+    return graph
+
+
+# Graph of an instance from its matrix store (converted from the cost CSVs on first use). With order_ids or
+# worker_ids the rows or columns follow those IDs, which must all be in the instance's cost CSVs.
+def load_candidate_graph(instance_dir, instance_num, s_max=None, order_ids=None, worker_ids=None):
+    matrices = load_instance_matrices(instance_dir, instance_num)
+
+    order_rows = None if order_ids is None else pd.Index(matrices['order_ids']).get_indexer(order_ids)
+    worker_cols = None if worker_ids is None else pd.Index(matrices['worker_ids']).get_indexer(worker_ids)
+    if (order_rows is not None and (order_rows < 0).any()) or (worker_cols is not None and (worker_cols < 0).any()):
+        raise KeyError(f"Orders or workers without costs in {instance_dir}")
+
+    return candidate_graph(matrices, s_max, order_rows, worker_cols)
+
+
+# Order row of every candidate entry
+def edge_rows(graph):
+    return np.repeat(np.arange(len(graph['indptr']) - 1, dtype=np.int64), np.diff(graph['indptr']))
+
+
+# The same graph with the candidates of every order sorted by service time (lowest worker column first on ties)
+def sorted_by_service_time(graph):
+    order = np.lexsort((graph['indices'], graph['service_time'], edge_rows(graph)))
+    sorted_graph = dict(graph)
+    for name in ['indices'] + [name for name in graph_values if name in graph]:
+        sorted_graph[name] = graph[name][order]
+    return sorted_graph
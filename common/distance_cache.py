@@ -0,0 +1,128 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Persistent cache of distances between pairs of location IDs, reused by Alg1 across instances and dispatch
+# snapshots (restaurants and delivery hot spots repeat between them). Kept in one .npz file:
+#
+#   location_ids, location_x, location_y   every location seen so far, with the coordinates its distances used
+#   keys        int64 pair key: from location code * 2^32 + to location code (codes index location_ids)
+#   distances   float64 distance of each pair
+#   last_used   clock value of the pair's last lookup; beyond max_entries the least recently used pairs are dropped
+#   clock       incremented on every lookup
+#
+# Distances are directional (from -> to), so a cached value is exactly what the distance function returned for
+# the same argument order. A location whose coordinates change loses its cached pairs.
+
+# Default bound on the number of cached pairs (about 24 bytes each, in memory and on disk)
+default_max_entries = 10_000_000
+
+
+def open_distance_cache(path=None, max_entries=default_max_entries):
+    cache = {
+        'path': path,
+        'max_entries': max_entries,
+        'location_ids': np.zeros(0, dtype=str),
+        'location_x': np.zeros(0),
+        'location_y': np.zeros(0),
+        'keys': np.zeros(0, dtype=np.int64),
+        'distances': np.zeros(0),
+        'last_used': np.zeros(0, dtype=np.int64),
+        'clock': 0,
+        'key_index': None,  # pd.Index over keys, rebuilt after the keys change
+        'hits': 0,
+        'misses': 0,
+    }
+    if path is not None and os.path.exists(path):
+        with np.load(path, allow_pickle=False) as data:
+            for name in ['location_ids', 'location_x', 'location_y', 'keys', 'distances', 'last_used']:
+                cache[name] = data[name]
+            cache['clock'] = int(data['clock'][0])
+    return cache
+
+
+# Write the cache to its file (replaced in one step, so an interrupted save leaves the previous file intact)
+def save_distance_cache(cache, path=None):
+    path = cache['path'] if path is None else path
+    if path is None:
+        raise ValueError("The distance cache has no file to save to")
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        np.savez(f, location_ids=cache['location_ids'], location_x=cache['location_x'],
+                 location_y=cache['location_y'], keys=cache['keys'], distances=cache['distances'],
+                 last_used=cache['last_used'], clock=np.array([cache['clock']], dtype=np.int64))
+    os.replace(temp_path, path)
+
+
+# Codes of the given locations, adding new ones and dropping the pairs of locations whose coordinates changed
+def _location_codes(cache, ids, x, y):
+    ids = np.asarray(ids).astype(str)
+    unique_ids, first = np.unique(ids, return_index=True)
+    unique_x = np.asarray(x, dtype=float)[first]
+    unique_y = np.asarray(y, dtype=float)[first]
+
+    codes = pd.Index(cache['location_ids']).get_indexer(unique_ids)
+    known = codes >= 0
+    moved = known.copy()
+    moved[known] = (cache['location_x'][codes[known]] != unique_x[known]) | (cache['location_y'][codes[known]] != unique_y[known])
+    if moved.any():
+        moved_codes = codes[moved]
+        cache['location_x'][moved_codes] = unique_x[moved]
+        cache['location_y'][moved_codes] = unique_y[moved]
+        stale = np.isin(cache['keys'] >> 32, moved_codes) | np.isin(cache['keys'] & 0xFFFFFFFF, moved_codes)
+        for name in ['keys', 'distances', 'last_used']:
+            cache[name] = cache[name][~stale]
+        cache['key_index'] = None
+
+    if not known.all():
+        codes[~known] = len(cache['location_ids']) + np.arange((~known).sum())
+        cache['location_ids'] = np.concatenate([cache['location_ids'], unique_ids[~known]])
+        cache['location_x'] = np.concatenate([cache['location_x'], unique_x[~known]])
+        cache['location_y'] = np.concatenate([cache['location_y'], unique_y[~known]])
+
+    return codes[np.searchsorted(unique_ids, ids)]
+
+
+# Distance of every (from, to) location pair: looked up in the cache, or computed with
+# distance(from_y, from_x, to_y, to_x) for the pairs it does not have yet (each distinct pair once) and added
+def cached_distances(cache, from_ids, from_x, from_y, to_ids, to_x, to_y, distance):
+    from_x = np.asarray(from_x, dtype=float)
+    from_y = np.asarray(from_y, dtype=float)
+    to_x = np.asarray(to_x, dtype=float)
+    to_y = np.asarray(to_y, dtype=float)
+    if len(from_x) == 0:
+        return np.zeros(0)
+
+    from_codes = _location_codes(cache, from_ids, from_x, from_y)
+    to_codes = _location_codes(cache, to_ids, to_x, to_y)
+    keys, first, inverse = np.unique((from_codes << 32) | to_codes, return_index=True, return_inverse=True)
+
+    cache['clock'] += 1
+    if cache['key_index'] is None:
+        cache['key_index'] = pd.Index(cache['keys'])
+    positions = cache['key_index'].get_indexer(keys)
+    found = positions >= 0
+    cache['hits'] += int(found.sum())
+    cache['misses'] += int((~found).sum())
+
+    values = np.empty(len(keys))
+    values[found] = cache['distances'][positions[found]]
+    cache['last_used'][positions[found]] = cache['clock']
+
+    if not found.all():
+        missing = first[~found]
+        values[~found] = distance(from_y[missing], from_x[missing], to_y[missing], to_x[missing])
+        cache['keys'] = np.concatenate([cache['keys'], keys[~found]])
+        cache['distances'] = np.concatenate([cache['distances'], values[~found]])
+        cache['last_used'] = np.concatenate([cache['last_used'], np.full((~found).sum(), cache['clock'])])
+        cache['key_index'] = None
+
+        if len(cache['keys']) > cache['max_entries']:
+            # Keep the most recently used pairs (the earlier entries on equal clocks)
+            keep = np.sort(np.argsort(-cache['last_used'], kind='stable')[:cache['max_entries']])
+            for name in ['keys', 'distances', 'last_used']:
+                cache[name] = cache[name][keep]
+
+    return values[inverse]
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # Multithreaded CSV parser, used through pandas when installed
+    csv_engine = 'pyarrow'
+except ImportError:
+    pyarrow = None
+    csv_engine = 'c'
+
+# Typed reading of the instance CSV files (orders, workers, locations and the long-format cost CSVs) shared by
+# all algorithms. Columns get declared compact types instead of inferred ones:
+#
+#   order_id, worker_id                                  int32
+#   pickup_location, delivery_location,
+#   current_location, location_id                        category, normalized (stripped, upper case)
+#   ready_time, fetch_time                               int64 (Unix seconds)
+#   x, y                                                 float64 (raw coordinates need more than float32 digits)
+#   service_time, t_p, t_d, t_w, delivery_cost,
+#   estimated_profit                                     float64 (float32 loses the 5th decimal from 128 up)
+#
+# Columns not listed here are inferred as before. The UTF-8 BOM some input files start with is dropped.
+
+csv_dtypes = {
+    'order_id': 'int32',
+    'worker_id': 'int32',
+    'pickup_location': 'category',
+    'delivery_location': 'category',
+    'current_location': 'category',
+    'location_id': 'category',
+    'ready_time': 'int64',
+    'fetch_time': 'int64',
+    'x': 'float64',
+    'y': 'float64',
+}
+
+# Cost columns, read as metric_dtype
+metric_columns = ['service_time', 't_p', 't_d', 't_w', 'delivery_cost', 'estimated_profit']
+
+location_columns = ['pickup_location', 'delivery_location', 'current_location', 'location_id']
+
+
+# Read one instance CSV with the declared column types (metric columns as metric_dtype)
+def read_instance_csv(path, usecols=None, metric_dtype=np.float64):
+    dtypes = dict(csv_dtypes)
+    for name in metric_columns:
+        dtypes[name] = metric_dtype
+
+    df = pd.read_csv(path, usecols=usecols, dtype=dtypes, engine=csv_engine, encoding='utf-8-sig')
+    for name in location_columns:
+        if name in df.columns:
+            df[name] = normalize_location_ids(df[name])
+    return df
+
+
+# Location IDs stripped and upper-cased; only the distinct IDs (the categories) are processed
+def normalize_location_ids(ids):
+    if not isinstance(ids.dtype, pd.CategoricalDtype):
+        ids = ids.astype('category')
+    normalized, codes = np.unique(ids.cat.categories.str.strip().str.upper(), return_inverse=True)
+    codes = np.where(ids.cat.codes.values >= 0, codes.reshape(-1)[ids.cat.codes.values], -1)
+    return pd.Series(pd.Categorical.from_codes(codes, pd.Index(normalized, dtype='str')), index=ids.index, name=ids.name)
+
+
+# Minutes a worker waits at pickup when arriving at fetch_time for an order ready at ready_time (0 when on time)
+def waiting_times(fetch_time, ready_time):
+    fetch_time = np.asarray(fetch_time, dtype=np.int64)
+    ready_time = np.asarray(ready_time, dtype=np.int64)
+    return np.maximum(fetch_time - ready_time, 0) / 60
+
+
+# Orders file with normalized locations and, when it has ready and fetch times, their waiting_time in minutes
+def read_orders(path):
+    orders = read_instance_csv(path)
+    if 'fetch_time' in orders.columns and 'ready_time' in orders.columns:
+        orders['waiting_time'] = waiting_times(orders['fetch_time'].values, orders['ready_time'].values)
+    return orders
+
+
+def read_workers(path):
+    return read_instance_csv(path)
+
+
+# Locations file with coordinates divided by scale (the instance files store degrees * 1e6)
+def read_locations(path, scale=1e6):
+    locations = read_instance_csv(path)
+    locations['x'] = locations['x'] / scale
+    locations['y'] = locations['y'] / scale
+    return locations
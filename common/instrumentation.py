@@ -0,0 +1,98 @@
+import cProfile
+import contextlib
+import io
+import json
+import pstats
+import time
+
+# Run statistics of the algorithms' entry functions: per-phase wall times and event counters, kept in a plain
+# dict that the entry functions take as stats=None (the default, which records nothing):
+#
+#   name       label of the run, e.g. 'alg3-01'
+#   timers     phase -> seconds (load, build, solve, write; repeated phases add up)
+#   counters   counter -> total, e.g. pairs_computed, search_nodes, fitness_evaluations
+#   profile    with profile=True, the top functions of a cProfile capture of the run (see profiling)
+#
+# Hot loops count into local integers and add them once at the end, so a disabled run only pays for a few
+# None checks per phase. Sampling profilers such as py-spy need no hooks: attach them to the process instead.
+
+# Functions kept in the profile summary
+profile_top = 25
+
+
+def new_run_stats(name=None, profile=False):
+    return {'name': name, 'timers': {}, 'counters': {}, 'profile': [] if profile else None}
+
+
+# Time a phase: with stats['timers'][name] += the wall time of the with block (nothing when stats is None)
+@contextlib.contextmanager
+def phase(stats, name):
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats['timers'][name] = stats['timers'].get(name, 0.0) + time.perf_counter() - start
+
+
+def count(stats, name, value=1):
+    if stats is not None:
+        stats['counters'][name] = stats['counters'].get(name, 0) + value
+
+
+# Add a dict of counters at once (e.g. the local counts of a search loop)
+def add_counters(stats, counters):
+    if stats is not None:
+        for name, value in counters.items():
+            stats['counters'][name] = stats['counters'].get(name, 0) + value
+
+
+# cProfile capture of the with block when stats asks for a profile: the profile_top functions by cumulative time
+# go to stats['profile'] and, with path set, the full capture to a .prof file (for pstats or snakeviz)
+@contextlib.contextmanager
+def profiling(stats, path=None):
+    if stats is None or stats['profile'] is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        if path is not None:
+            profiler.dump_stats(path)
+        summary = pstats.Stats(profiler, stream=io.StringIO()).sort_stats('cumulative')
+        for function in summary.fcn_list[:profile_top]:
+            primitive_calls, calls, total_s, cumulative_s, _ = summary.stats[function]
+            stats['profile'].append({'function': pstats.func_std_string(function), 'calls': calls,
+                                     'total_s': total_s, 'cumulative_s': cumulative_s})
+
+
+# Sum of the timers and counters of several runs (profiles are not merged)
+def merge_run_stats(stats_list, name=None):
+    merged = new_run_stats(name)
+    for stats in stats_list:
+        for phase_name, seconds in stats['timers'].items():
+            merged['timers'][phase_name] = merged['timers'].get(phase_name, 0.0) + seconds
+        add_counters(merged, stats['counters'])
+    return merged
+
+
+# Timers and counters as flat columns (time_<phase>_s, <counter>) for a summary table row
+def flat_run_stats(stats):
+    row = {f'time_{name}_s': seconds for name, seconds in stats['timers'].items()}
+    row.update(stats['counters'])
+    return row
+
+
+def write_run_stats(stats, path):
+    with open(path, 'w') as f:
+        json.dump(stats, f, indent=2)
+
+
+# One structured log line: run_stats {"name": ..., "timers": ..., "counters": ...}
+def log_run_stats(stats, log=print):
+    log('run_stats ' + json.dumps({key: stats[key] for key in ['name', 'timers', 'counters']}))
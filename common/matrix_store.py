@@ -0,0 +1,258 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from common.instance_csv import read_instance_csv
+
+# Binary instance format shared by all algorithms: a directory holding one dense (orders x workers) .npy
+# matrix per metric plus the order/worker ID arrays that index its rows and columns.
+#
+#   matrices-XX/
+#       meta.json          format, shape, dtype and the list of stored matrices
+#                          (written last, marks the store complete)
+#       order_ids.npy      row index
+#       worker_ids.npy     column index
+#       service_time.npy, delivery_cost.npy, estimated_profit.npy, t_p.npy, t_d.npy, t_w.npy
+#
+# Matrices are opened with np.load(mmap_mode='r'), so opening a store costs the same at any size.
+
+# Matrices kept for every (order, worker) pair
+matrix_names = ['service_time', 'delivery_cost', 'estimated_profit', 't_p', 't_d', 't_w']
+
+# Long-format CSV files of an instance and the matrix columns they carry
+csv_layout = {
+    'service-times': ['service_time', 't_p', 't_d', 't_w'],
+    'delivery-costs': ['delivery_cost'],
+    'estimated-profits': ['estimated_profit'],
+}
+
+# The CSVs carry 5 decimals, which csv_values restores as long as a stored value is within 5e-6 of the CSV value.
+# float32 only guarantees that below 128 (half a float32 step is 2^-18 there and >= 7.6e-6 above), so whole
+# matrices are stored as float32 only when all their values read back exactly (see store_dtype), and as float64
+# otherwise. Stores filled block by block cannot know their values in advance and default to float64.
+csv_decimals = 5
+
+# Version of the store layout; stores of an older format are converted again from the CSVs
+store_format = 2
+
+
+# Default location of the store next to an instance's CSV files
+def store_dir_for(instance_dir, instance_num):
+    return os.path.join(instance_dir, f'matrices-{instance_num}')
+
+
+def is_matrix_store(store_dir):
+    return os.path.exists(os.path.join(store_dir, 'meta.json'))
+
+
+# float32 when every value of the matrices reads back through csv_values as it was (NaNs included), else float64.
+# Checked block_rows rows at a time, so the temporary copies stay small.
+def store_dtype(matrices, block_rows=1024):
+    for matrix in matrices.values():
+        for start in range(0, len(matrix), block_rows):
+            values = csv_values(matrix[start:start + block_rows])
+            if not np.array_equal(csv_values(values.astype(np.float32)), values, equal_nan=True):
+                return np.dtype(np.float64)
+    return np.dtype(np.float32)
+
+
+# Start a store that is filled row block by row block (blocks must arrive in row order).
+# Returns the open writer state for append_matrix_rows / finish_matrix_store.
+def create_matrix_store(store_dir, order_ids, worker_ids, names=matrix_names, dtype=np.float64):
+    os.makedirs(store_dir, exist_ok=True)
+
+    # Drop a stale meta.json first so a half-written store is never picked up
+    meta_file = os.path.join(store_dir, 'meta.json')
+    if os.path.exists(meta_file):
+        os.remove(meta_file)
+
+    order_ids = np.asarray(order_ids)
+    worker_ids = np.asarray(worker_ids)
+    np.save(os.path.join(store_dir, 'order_ids.npy'), order_ids)
+    np.save(os.path.join(store_dir, 'worker_ids.npy'), worker_ids)
+
+    shape = (len(order_ids), len(worker_ids))
+    files = {}
+    for name in names:
+        f = open(os.path.join(store_dir, f'{name}.npy'), 'wb')
+        header = {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)), 'fortran_order': False, 'shape': shape}
+        np.lib.format.write_array_header_1_0(f, header)
+        files[name] = f
+
+    return {'store_dir': store_dir, 'shape': shape, 'dtype': np.dtype(dtype), 'files': files, 'rows_written': 0}
+
+
+# Append the next block of rows; matrices maps each stored name to a (rows x workers) array
+def append_matrix_rows(writer, matrices):
+    rows = None
+    for name, f in writer['files'].items():
+        block = np.ascontiguousarray(matrices[name], dtype=writer['dtype'])
+        block.tofile(f)
+        rows = block.shape[0]
+    writer['rows_written'] += rows or 0
+
+
+def close_matrix_store(writer):
+    for f in writer['files'].values():
+        f.close()
+
+
+# Close the matrix files and write meta.json, which marks the store as complete
+def finish_matrix_store(writer, source=None):
+    close_matrix_store(writer)
+
+    if writer['rows_written'] != writer['shape'][0]:
+        raise ValueError(f"Matrix store {writer['store_dir']} got {writer['rows_written']} rows, expected {writer['shape'][0]}")
+
+    meta = {
+        'format': store_format,
+        'shape': list(writer['shape']),
+        'dtype': writer['dtype'].name,
+        'matrices': list(writer['files']),
+        'source': source,
+    }
+    with open(os.path.join(writer['store_dir'], 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+
+# Write a whole store at once from dense (orders x workers) matrices (dtype None: chosen by store_dtype)
+def write_matrix_store(store_dir, order_ids, worker_ids, matrices, names=None, dtype=None, source=None):
+    if names is None:
+        names = [name for name in matrix_names if name in matrices]
+    if dtype is None:
+        dtype = store_dtype({name: matrices[name] for name in names})
+    writer = create_matrix_store(store_dir, order_ids, worker_ids, names, dtype)
+    try:
+        append_matrix_rows(writer, matrices)
+    except Exception:
+        close_matrix_store(writer)
+        raise
+    finish_matrix_store(writer, source)
+
+
+# Open a store without reading the matrices: they come back as read-only memory maps.
+# Returns a dict with 'order_ids', 'worker_ids', 'meta' and one entry per stored matrix.
+def open_matrix_store(store_dir, mmap_mode='r'):
+    meta_file = os.path.join(store_dir, 'meta.json')
+    if not os.path.exists(meta_file):
+        raise FileNotFoundError(f"No matrix store found in {store_dir}")
+
+    with open(meta_file) as f:
+        meta = json.load(f)
+
+    store = {
+        'meta': meta,
+        'order_ids': np.load(os.path.join(store_dir, 'order_ids.npy')),
+        'worker_ids': np.load(os.path.join(store_dir, 'worker_ids.npy')),
+    }
+    for name in meta['matrices']:
+        store[name] = np.load(os.path.join(store_dir, f'{name}.npy'), mmap_mode=mmap_mode)
+    return store
+
+
+# CSV files of an instance that exist on disk, as {csv name: path}
+def instance_csv_files(instance_dir, instance_num):
+    files = {}
+    for name in csv_layout:
+        path = os.path.join(instance_dir, f'{name}-{instance_num}.csv')
+        if os.path.exists(path):
+            files[name] = path
+    return files
+
+
+# Append the IDs of the instance's orders/workers file (if there is one) that the cost CSVs do not mention,
+# e.g. orders without candidates in a sparse candidate set, so they still get a (NaN) row or column
+def with_instance_ids(ids, instance_dir, file_name, column):
+    path = os.path.join(instance_dir, file_name)
+    if not os.path.exists(path):
+        return ids
+
+    instance_ids = read_instance_csv(path, usecols=[column])[column].values
+    missing = pd.unique(instance_ids[~pd.Index(instance_ids).isin(ids)])
+    return np.concatenate([ids, missing]) if len(missing) else ids
+
+
+# Convert the long-format service-times / delivery-costs / estimated-profits CSVs of an instance into a store.
+# Rows and columns follow the order in which order and worker IDs first appear in the CSVs; pairs missing
+# from a CSV are stored as NaN, and so are the rows/columns of orders and workers that only appear in the
+# instance's orders/workers files. Only the metrics present in the CSVs are stored (dtype None: chosen by
+# store_dtype).
+def convert_csv_instance(instance_dir, instance_num, store_dir=None, dtype=None):
+    if store_dir is None:
+        store_dir = store_dir_for(instance_dir, instance_num)
+
+    csv_files = instance_csv_files(instance_dir, instance_num)
+    if not csv_files:
+        raise FileNotFoundError(f"No cost CSVs for instance {instance_num} in {instance_dir}")
+
+    # Typed reads: int32 IDs and float64 metrics (narrowed to the store's dtype when it is written)
+    frames = {name: read_instance_csv(path, metric_dtype=np.float64) for name, path in csv_files.items()}
+    first = next(iter(frames.values()))
+    order_ids = with_instance_ids(pd.unique(first['order_id']), instance_dir, f'orders-{instance_num}.csv', 'order_id')
+    worker_ids = with_instance_ids(pd.unique(first['worker_id']), instance_dir, f'workers-{instance_num}.csv', 'worker_id')
+    order_index = pd.Index(order_ids)
+    worker_index = pd.Index(worker_ids)
+
+    matrices = {}
+    for name, df in frames.items():
+        rows = order_index.get_indexer(df['order_id'])
+        cols = worker_index.get_indexer(df['worker_id'])
+        if (rows < 0).any() or (cols < 0).any():
+            raise ValueError(f"{csv_files[name]} has order/worker IDs that are not in {next(iter(csv_files.values()))}")
+
+        for column in csv_layout[name]:
+            if column in df.columns:
+                matrix = np.full((len(order_ids), len(worker_ids)), np.nan)
+                matrix[rows, cols] = df[column].values
+                matrices[column] = matrix
+
+    write_matrix_store(store_dir, order_ids, worker_ids, matrices, dtype=dtype, source=sorted(csv_files.values()))
+    return store_dir
+
+
+# Open the store of an instance, converting (and caching) it from the CSVs first if it is missing, older than them
+# or of an older store_format
+def load_instance_matrices(instance_dir, instance_num, store_dir=None):
+    if store_dir is None:
+        store_dir = store_dir_for(instance_dir, instance_num)
+
+    csv_files = instance_csv_files(instance_dir, instance_num)
+    if is_matrix_store(store_dir):
+        store = open_matrix_store(store_dir)
+        store_time = os.path.getmtime(os.path.join(store_dir, 'meta.json'))
+        up_to_date = all(os.path.getmtime(path) <= store_time for path in csv_files.values())
+        if not csv_files or (up_to_date and store['meta'].get('format') == store_format):
+            return store
+        del store
+
+    convert_csv_instance(instance_dir, instance_num, store_dir)
+    return open_matrix_store(store_dir)
+
+
+# Open the store of the instance a cost CSV belongs to, e.g. .../instance-01/service-times-01.csv
+def load_matrices_for_csv(csv_file):
+    instance_dir, file_name = os.path.split(csv_file)
+    instance_num = os.path.splitext(file_name)[0].rsplit('-', 1)[-1]
+    return load_instance_matrices(instance_dir, instance_num)
+
+
+# Matrix values as float64 rounded back to the 5 decimals of the CSV files
+def csv_values(matrix):
+    return np.round(np.asarray(matrix, dtype=np.float64), csv_decimals)
+
+
+# Long-format DataFrame (order_id, worker_id, <names>...) with the same rows and values as the original CSVs
+def pair_frame(store, names):
+    order_ids = store['order_ids']
+    worker_ids = store['worker_ids']
+    columns = {
+        'order_id': np.repeat(order_ids, len(worker_ids)),
+        'worker_id': np.tile(worker_ids, len(order_ids)),
+    }
+    for name in names:
+        columns[name] = csv_values(store[name]).reshape(-1)
+
+    df = pd.DataFrame(columns)
+    # Pairs the CSVs did not have were stored as NaN
+    return df.dropna(subset=list(names)).reset_index(drop=True)
@@ -0,0 +1,208 @@
+import os
+import numpy as np
+import pandas as pd
+
+# File formats for sets of one-to-one assignments (alg2 writes them, Alg3 reads them as its initial population).
+#
+#   compact  CSV with one row per assigned order:  solution_id,order_id,worker_id
+#   binary   int32 array file: the number of orders N, the N order IDs, then N worker IDs per solution
+#   onehot   the original alg2 layout: N rows per solution, order_id followed by one 0/1 column per worker
+#
+# Writers take solutions as int arrays of worker columns (one entry per order, as produced by alg2's
+# enumerator) and buffer at most chunk_size of them, so memory stays bounded however many are streamed.
+solution_formats = ['compact', 'binary', 'onehot']
+
+
+def open_solution_writer(path, output_format, order_ids, worker_ids, chunk_size=1000):
+    if output_format not in solution_formats:
+        raise ValueError(f"Unknown solution format {output_format!r}, expected one of {solution_formats}")
+
+    return {
+        'path': path,
+        'format': output_format,
+        'order_ids': np.asarray(order_ids),
+        'worker_ids': np.asarray(worker_ids),
+        'chunk_size': chunk_size,
+        'buffer': [],
+        'file': None,  # Opened on the first flush, so an empty run leaves no file behind
+        'count': 0,
+    }
+
+
+def _open_output(writer):
+    order_ids = writer['order_ids']
+    if writer['format'] == 'binary':
+        f = open(writer['path'], 'wb')
+        np.array([len(order_ids)], dtype=np.int32).tofile(f)
+        _as_int32(order_ids).tofile(f)
+    else:
+        f = open(writer['path'], 'w', newline='')
+    writer['file'] = f
+
+
+def _as_int32(ids):
+    ids = np.asarray(ids)
+    if ids.size and (ids.min() < np.iinfo(np.int32).min or ids.max() > np.iinfo(np.int32).max):
+        raise ValueError("IDs do not fit into int32 for the binary solution format")
+    return ids.astype(np.int32)
+
+
+def _flush(writer):
+    if not writer['buffer']:
+        return
+    if writer['file'] is None:
+        _open_output(writer)
+
+    f = writer['file']
+    order_ids = writer['order_ids']
+    worker_ids = writer['worker_ids']
+    solutions = np.stack(writer['buffer'])  # (solutions x orders) worker columns
+    first_id = writer['count'] - len(solutions)
+    header = first_id == 0
+
+    if writer['format'] == 'compact':
+        num_solutions, num_orders = solutions.shape
+        chunk_df = pd.DataFrame({
+            'solution_id': np.repeat(np.arange(first_id, first_id + num_solutions), num_orders),
+            'order_id': np.tile(order_ids, num_solutions),
+            'worker_id': worker_ids[solutions.reshape(-1)],
+        })
+        chunk_df.to_csv(f, index=False, header=header)
+    elif writer['format'] == 'binary':
+        _as_int32(worker_ids[solutions]).tofile(f)
+    else:
+        one_hot = np.eye(len(worker_ids), dtype=int)
+        chunk_df = pd.DataFrame(one_hot[solutions.reshape(-1)], columns=worker_ids.tolist())
+        chunk_df.insert(0, 'order_id', np.tile(order_ids, len(solutions)))
+        chunk_df.to_csv(f, index=False, header=header)
+
+    writer['buffer'] = []
+
+
+def write_solution(writer, solution):
+    writer['buffer'].append(np.asarray(solution))
+    writer['count'] += 1
+    if len(writer['buffer']) >= writer['chunk_size']:
+        _flush(writer)
+
+
+# Flush what is left and close the file; returns the number of solutions written
+def close_solution_writer(writer):
+    try:
+        _flush(writer)
+    finally:
+        if writer['file'] is not None:
+            writer['file'].close()
+    return writer['count']
+
+
+# Stream an iterable (typically a generator) of solutions into a file; returns the number written
+def write_solutions(path, output_format, order_ids, worker_ids, solutions, chunk_size=1000):
+    writer = open_solution_writer(path, output_format, order_ids, worker_ids, chunk_size)
+    try:
+        for solution in solutions:
+            write_solution(writer, solution)
+    finally:
+        count = close_solution_writer(writer)
+    return count
+
+
+# Guess the format of a solution file from its extension and CSV header
+def detect_solution_format(path):
+    if not path.endswith('.csv'):
+        return 'binary'
+    with open(path, encoding='utf-8-sig') as f:
+        header = f.readline().strip().split(',')
+    return 'compact' if header[:3] == ['solution_id', 'order_id', 'worker_id'] else 'onehot'
+
+
+# Read solutions back in chunks of up to chunk_size. Yields (order_ids, worker_ids) pairs where worker_ids is a
+# (solutions x orders) array of worker IDs aligned with order_ids (-1 where a one-hot row has no worker set).
+# num_orders is needed for the one-hot layout, whose solutions are consecutive blocks of num_orders rows.
+def iter_solutions(path, num_orders=None, chunk_size=1000, max_solutions=None):
+    output_format = detect_solution_format(path)
+    remaining = max_solutions
+
+    if output_format == 'binary':
+        num_orders = int(np.fromfile(path, dtype=np.int32, count=1)[0])
+        data = np.memmap(path, dtype=np.int32, mode='r', offset=4)
+        order_ids = np.array(data[:num_orders])
+        solutions = data[num_orders:].reshape(-1, num_orders) if num_orders else np.zeros((0, 0), dtype=np.int32)
+        for start in range(0, len(solutions), chunk_size):
+            chunk = np.array(solutions[start:start + chunk_size])
+            if remaining is not None:
+                chunk = chunk[:remaining]
+                remaining -= len(chunk)
+            yield order_ids, chunk
+            if remaining is not None and remaining <= 0:
+                return
+        return
+
+    if output_format == 'compact':
+        # Solutions may straddle CSV chunks: hold back the last (possibly incomplete) solution of each chunk
+        carry = None
+        reader = pd.read_csv(path, chunksize=chunk_size * max(1, num_orders or 100))
+        for chunk_df in reader:
+            if carry is not None:
+                chunk_df = pd.concat([carry, chunk_df], ignore_index=True)
+            last_id = chunk_df['solution_id'].iloc[-1]
+            carry = chunk_df[chunk_df['solution_id'] == last_id]
+            complete = chunk_df[chunk_df['solution_id'] != last_id]
+            if len(complete):
+                result = _compact_to_arrays(complete, remaining)
+                if remaining is not None:
+                    remaining -= len(result[1])
+                yield result
+                if remaining is not None and remaining <= 0:
+                    return
+        if carry is not None and len(carry):
+            yield _compact_to_arrays(carry, remaining)
+        return
+
+    # One-hot layout: rows are grouped into solutions of num_orders consecutive rows
+    if not num_orders:
+        raise ValueError("num_orders is required to read one-hot solution files")
+    rows_per_chunk = chunk_size * num_orders
+    for chunk_df in pd.read_csv(path, chunksize=rows_per_chunk, encoding='utf-8-sig'):
+        chunk_df = chunk_df.dropna()
+        worker_columns = [c for c in chunk_df.columns if c != 'order_id']
+        worker_ids = np.array([int(c) for c in worker_columns])
+        one_hot = chunk_df[worker_columns].values.astype(int) == 1
+        assigned = np.where(one_hot.any(axis=1), worker_ids[one_hot.argmax(axis=1)], -1)
+        num_solutions = len(chunk_df) // num_orders
+        if num_solutions == 0:
+            continue
+        order_ids = chunk_df['order_id'].values[:num_orders].astype(int)
+        solutions = assigned[:num_solutions * num_orders].reshape(num_solutions, num_orders)
+        if remaining is not None:
+            solutions = solutions[:remaining]
+            remaining -= len(solutions)
+        yield order_ids, solutions
+        if remaining is not None and remaining <= 0:
+            return
+
+
+def _compact_to_arrays(chunk_df, remaining=None):
+    solution_ids = pd.unique(chunk_df['solution_id'])
+    if remaining is not None:
+        solution_ids = solution_ids[:remaining]
+        chunk_df = chunk_df[chunk_df['solution_id'].isin(solution_ids)]
+    num_orders = len(chunk_df) // len(solution_ids)
+    order_ids = chunk_df['order_id'].values[:num_orders]
+    return order_ids, chunk_df['worker_id'].values.reshape(len(solution_ids), num_orders)
+
+
+# Read a whole solution file: returns order_ids and a (solutions x orders) array of worker IDs
+def read_solutions(path, num_orders=None, max_solutions=None):
+    order_ids = None
+    chunks = []
+    for order_ids, solutions in iter_solutions(path, num_orders, max_solutions=max_solutions):
+        chunks.append(solutions)
+    if not chunks:
+        return order_ids, np.zeros((0, num_orders or 0), dtype=np.int64)
+    return order_ids, np.concatenate(chunks)
+
+
+# Default extension of each format
+def solution_file_name(base_name, output_format):
+    return f'{base_name}.bin' if output_format == 'binary' else f'{base_name}.csv'